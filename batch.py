@@ -0,0 +1,72 @@
+from __future__ import annotations
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import os
+import sys
+import dumboParser as dp
+import render
+from snapshot import load_data
+
+
+def find_data_files(patterns: list[str]) -> list[str]:
+    """Expands directories to the files they contain and glob patterns to their matches"""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(sorted(entry.path for entry in os.scandir(pattern) if entry.is_file()))
+        else:
+            files.extend(sorted(glob.glob(pattern)))
+    return files
+
+
+def output_path(pattern: str, data_file_name: str) -> str:
+    """Formats pattern with {name} the data file name without extension, {stem} its base name and {dir} its directory"""
+    stem = os.path.splitext(os.path.basename(data_file_name))[0]
+    return pattern.format(name=os.path.splitext(data_file_name)[0], stem=stem,
+                          dir=os.path.dirname(data_file_name) or '.')
+
+
+def data_jobs(src_file_name: str, patterns: list[str], output: str, *excluded: str) -> list[tuple[str, str]]:
+    """(data file, output file) for every data file matching patterns. The template, the other excluded files and
+    the outputs written next to the data are left out."""
+    files = find_data_files(patterns)
+    excluded = [src_file_name, *excluded] + [output_path(output, f) for f in files]
+    excluded = {os.path.normpath(path) for path in excluded if path}
+    return [(f, output_path(output, f)) for f in files if os.path.normpath(f) not in excluded]
+
+
+def _render_file(job: tuple[str, str]) -> Optional[str]:
+    data_file_name, output_file_name = job
+    try:
+        result = render._worker_program.render(load_data(data_file_name))
+        os.makedirs(os.path.dirname(output_file_name) or '.', exist_ok=True)
+        with open(output_file_name, 'w') as output_file:
+            output_file.write(result)
+    except Exception as e:
+        return f'{type(e).__name__}: {e}'
+    return None
+
+
+def run_batch(program: dp.ProgramElement, jobs: list[tuple[str, str]],
+              processes: Optional[int] = None, path: Optional[str] = None) -> dict[str, str]:
+    """Renders program for every (data file, output file) job on a process pool, returns the errors by data file.
+    path is the template file, from which includes are resolved."""
+    processes = processes or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (4 * processes))
+    with ProcessPoolExecutor(processes, initializer=render._init_worker, initargs=(program, path)) as executor:
+        results = executor.map(_render_file, jobs, chunksize=chunksize)
+        return {data_file_name: error for (data_file_name, _), error in zip(jobs, results) if error is not None}
+
+
+def batch(src_file_name, *data, output='{name}.html', jobs=0, parser='lark'):
+    """Renders the template against every data file, given as files, directories or glob patterns"""
+    with open(src_file_name) as src_file:
+        program = dp.parse(src_file.read(), parser)
+    data_files = data_jobs(src_file_name, list(data), output)
+    errors = run_batch(program, data_files, jobs or None, src_file_name)
+    for data_file_name, error in errors.items():
+        print(f'{data_file_name}: {error}', file=sys.stderr)
+    print(f'{len(data_files) - len(errors)} rendered, {len(errors)} failed')
+    if errors:
+        sys.exit(1)
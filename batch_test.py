@@ -0,0 +1,64 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import dumboParser as dp
+from batch import batch, data_jobs, find_data_files, output_path, run_batch
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = os.path.join(self.tmp.name, 'data')
+        os.mkdir(self.data_dir)
+        for i in range(5):
+            self.write(f'd{i}.dumbo', f"{{{{title := 'page {i}'; items := ('a', 'b');}}}}")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def write(self, name, content) -> str:
+        path = os.path.join(self.data_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_findDataFiles(self) -> None:
+        self.write('notes.txt', '')
+        self.assertEqual(len(find_data_files([self.data_dir])), 6)
+        self.assertEqual(len(find_data_files([os.path.join(self.data_dir, '*.dumbo')])), 5)
+
+    def test_dataJobs(self) -> None:
+        template = self.write('template.dumbo', "{{print title;}}")
+        self.write('d0.html', '')
+        jobs = data_jobs(template, [self.data_dir], '{name}.html')
+        self.assertEqual([os.path.basename(f) for f, _ in jobs], [f'd{i}.dumbo' for i in range(5)])
+        for _ in range(2):
+            with contextlib.redirect_stdout(io.StringIO()) as stdout:
+                batch(template, self.data_dir, jobs=1)
+            self.assertEqual(stdout.getvalue(), '5 rendered, 0 failed\n')
+
+    def test_outputPath(self) -> None:
+        self.assertEqual(output_path('{name}.html', 'data/page.dumbo'), 'data/page.html')
+        self.assertEqual(output_path('out/{stem}.txt', 'data/page.dumbo'), 'out/page.txt')
+        self.assertEqual(output_path('{dir}/{stem}.html', 'page.dumbo'), './page.html')
+
+    def test_runBatch(self) -> None:
+        bad = self.write('bad.dumbo', "{{title := 'oops';}}")
+        broken = self.write('broken.dumbo', "{{title := }}")
+        program = dp.parse("<h1>{{print title;}}</h1>{{for i in items do print i; endfor;}}")
+        files = find_data_files([os.path.join(self.data_dir, '*.dumbo')])
+        out = os.path.join(self.tmp.name, 'out', '{stem}.html')
+        errors = run_batch(program, [(f, output_path(out, f)) for f in files], processes=2)
+        self.assertEqual(sorted(errors), sorted([bad, broken]))
+        self.assertIn('BadReferenceError', errors[bad])
+        for i in range(5):
+            with open(output_path(out, f'd{i}.dumbo')) as f:
+                self.assertEqual(f.read(), f'<h1>page {i}</h1>ab')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Bytes per AST node and process RSS for a large generated template, with the slotted node classes
+against a copy of the tree made of plain __dict__ nodes like the previous ones.
+
+Run from the repository root: python -m benchmarks.ast_memory_bench
+"""
+import gc
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+import dumboParser as dp
+
+PAGE = """<div class="item">
+    <h2>{{ print title . ' #' . (index * 2 + 1); }}</h2>
+    {{ for tag in tags do if index > 0 and index < limit do print '<span>' . tag . '</span>'; endif; endfor; }}
+    {{ count := count + 1; }}
+</div>
+"""
+
+_dict_classes = {}
+
+
+def as_dict_nodes(element):
+    """Copies a tree into equivalent nodes keeping their attributes in a __dict__"""
+    if type(element) is list:
+        return [as_dict_nodes(e) for e in element]
+    if not isinstance(element, dp.DumboElement):
+        return element
+    cls = type(element)
+    if cls not in _dict_classes:
+        _dict_classes[cls] = type(cls.__name__, (), {})
+    node = _dict_classes[cls]()
+    for name in cls.__slots__:
+        setattr(node, name, as_dict_nodes(getattr(element, name)))
+    return node
+
+
+def count_nodes(element) -> int:
+    if type(element) is list:
+        return sum(count_nodes(e) for e in element)
+    if isinstance(element, dp.DumboElement):
+        return 1 + sum(count_nodes(getattr(element, name)) for name in type(element).__slots__)
+    return 0
+
+
+def rss() -> float:
+    """Current resident set size in MB, the peak one where /proc isn't available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(variant, blocks):
+    src = PAGE * blocks
+    gc.collect()
+    tracemalloc.start()
+    tree = dp.parse(src, 'descent')
+    nodes = count_nodes(tree)
+    if variant == 'dict':
+        tree = as_dict_nodes(tree)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    gc.collect()
+    print(f'{variant:>6} {nodes:>8} {size / nodes:>11.1f} {rss():>7.1f}')
+    return tree
+
+
+def main(blocks=5000):
+    print(f"{'nodes':>6} {'count':>8} {'bytes/node':>11} {'RSS MB':>7}")
+    for variant in ('dict', 'slots'):
+        # one process per variant so the RSS of one doesn't hide the other
+        subprocess.run([sys.executable, '-m', 'benchmarks.ast_memory_bench', variant, str(blocks)], check=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        measure(sys.argv[1], int(sys.argv[2]))
+    else:
+        main()
@@ -0,0 +1,40 @@
+"""Builtin functions against the loops they replace: counting a list with len and building a string with join.
+
+Run from the repository root: python -m benchmarks.builtins_bench
+"""
+import timeit
+
+from dumboParser import dumbo_parser
+from dumbo import Interpreter
+from compiler import compile_program
+
+CASES = [
+    ('count loop', "{{n := 0; for x in items do n := n + 1; endfor; print n;}}"),
+    ('len', "{{print len(items);}}"),
+    ('concat loop', "{{s := ''; for x in items do s := s . x . ', '; endfor; print s;}}"),
+    ('join', "{{print join(items, ', ') . ', ';}}"),
+]
+
+
+def interpret(program, scope):
+    interpreter = Interpreter(scope)
+    program.accept(interpreter)
+    return interpreter.result
+
+
+def main(sizes=(10, 100, 1000)):
+    print(f"{'items':>6} {'template':<12} {'interpreter us':>15} {'compiled us':>12}")
+    for n in sizes:
+        scope = {'items': [f'item {i}' for i in range(n)]}
+        number = max(1, 20000 // (n + 10))
+        for name, src in CASES:
+            program = dumbo_parser.parse(src)
+            compiled = compile_program(program)
+            assert interpret(program, scope) == compiled.render(scope)
+            t_interpreter = min(timeit.repeat(lambda: interpret(program, scope), number=number, repeat=3))
+            t_compiled = min(timeit.repeat(lambda: compiled.render(scope), number=number, repeat=3))
+            print(f'{n:>6} {name:<12} {t_interpreter / number * 1e6:>15.1f} {t_compiled / number * 1e6:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Resident memory per template and loop-heavy render throughput of the bytecode VM,
+against the AST with Interpreter and the closure compiler.
+
+Run from the repository root: python -m benchmarks.bytecode_bench
+"""
+import gc
+import timeit
+import tracemalloc
+
+from dumboParser import parse
+from compiler import compile_program
+from bytecode import assemble
+from benchmarks.render_bench import TEMPLATE, make_scope, interpret
+
+
+def resident(build, count):
+    gc.collect()
+    tracemalloc.start()
+    objects = build(count)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objects, size / count
+
+
+def main(count=200):
+    sources = [TEMPLATE.replace('album', f'album {i}') for i in range(count)]
+    programs, ast_size = resident(lambda n: [parse(src) for src in sources[:n]], count)
+
+    def assembled(n):
+        return [assemble(parse(src)) for src in sources[:n]]
+    _, bytecode_size = resident(assembled, count)
+    print(f'resident bytes per template: AST {ast_size:.0f}, bytecode {bytecode_size:.0f} '
+          f'({ast_size / bytecode_size:.1f}x smaller)')
+
+    program = programs[0]
+    compiled = compile_program(program)
+    bytecode = assemble(program)
+    print(f"{'items':>6} {'interpreter/s':>14} {'bytecode/s':>11} {'closures/s':>11}")
+    for n in (10, 100, 1000):
+        scope = make_scope(n)
+        assert interpret(program, scope) == bytecode.render(scope) == compiled.render(scope)
+        number = max(1, 20000 // (n + 10))
+        rates = [number / min(timeit.repeat(render, number=number, repeat=3)) for render in
+                 (lambda: interpret(program, scope), lambda: bytecode.render(scope),
+                  lambda: compiled.render(scope))]
+        print(f'{n:>6} {rates[0]:>14.0f} {rates[1]:>11.0f} {rates[2]:>11.0f}')
+
+
+if __name__ == '__main__':
+    main()
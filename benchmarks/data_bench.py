@@ -0,0 +1,61 @@
+"""Data file loading time of the Lark data_parser against the DataLoader, on generated files of growing size.
+
+Run from the repository root: python -m benchmarks.data_bench
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+from dumboParser import LazyParser
+from data import DataTransformer, data_loader
+
+
+def generate(file_name, assignments, list_length=20):
+    with open(file_name, 'w') as f:
+        f.write('{{\n')
+        for i in range(assignments):
+            if i % 2:
+                items = ', '.join(f"'item {i} {j}'" for j in range(list_length))
+                f.write(f'list{i} := ({items});\n')
+            else:
+                f.write(f"name{i} := 'value {i}';\ncount{i} := {i};\n")
+        f.write('}}\n')
+
+
+def measure(load):
+    start = time.perf_counter()
+    scope = load()
+    elapsed = time.perf_counter() - start
+    del scope
+    tracemalloc.start()
+    scope = load()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return scope, elapsed, peak
+
+
+def main(sizes=(100, 1000, 10000, 50000)):
+    print(f"{'assigns':>8} {'MB':>6} {'lark s':>8} {'lark peak MB':>13} {'loader s':>9} {'loader peak MB':>15} "
+          f"{'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for n in sizes:
+            file_name = os.path.join(directory, f'data{n}.dumbo')
+            generate(file_name, n)
+            size = os.path.getsize(file_name) / 1e6
+
+            parser = LazyParser('dumbo_data.lark', DataTransformer(), 'program')
+            parser.get()
+
+            def lark():
+                with open(file_name) as f:
+                    return parser.parse(f.read())
+            expected, t_lark, m_lark = measure(lark)
+            scope, t_loader, m_loader = measure(lambda: data_loader.load(file_name))
+            assert scope == expected
+            print(f'{n:>8} {size:>6.1f} {t_lark:>8.3f} {m_lark / 1e6:>13.1f} {t_loader:>9.3f} '
+                  f'{m_loader / 1e6:>15.1f} {t_lark / t_loader:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
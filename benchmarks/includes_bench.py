@@ -0,0 +1,41 @@
+"""Time to compile many templates sharing a large partial: pasted into every template, so parsed once per template,
+against included from a file, so parsed once by the template registry.
+
+Run from the repository root: python -m benchmarks.includes_bench
+"""
+import os
+import tempfile
+import time
+
+import dumboParser as dp
+from compiler import compile_program
+from includes import registry
+
+PARTIAL = "<li>{{print title . ' ' . i; if i > 2 do print 'more'; endif;}}</li>\n"
+
+
+def main(sizes=((10, 200), (100, 200), (100, 1000))):
+    print(f"{'templates':>9} {'partial blocks':>14} {'pasted ms':>10} {'included ms':>12} {'parses':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        for templates, blocks in sizes:
+            partial = os.path.join(directory, f'partial-{blocks}.dumbo')
+            with open(partial, 'w') as f:
+                f.write(PARTIAL * blocks)
+            sources = [f"<h{n}>{{{{print title;}}}}</h{n}>" for n in range(templates)]
+            start = time.perf_counter()
+            for src in sources:
+                compile_program(dp.parse(src + PARTIAL * blocks))
+            pasted = time.perf_counter() - start
+            registry.clear()
+            parses = registry.parses
+            start = time.perf_counter()
+            for src in sources:
+                compile_program(dp.parse(src + "{{include '" + os.path.basename(partial) + "';}}"),
+                                os.path.join(directory, 'template.dumbo'))
+            included = time.perf_counter() - start
+            print(f'{templates:>9} {blocks:>14} {pasted * 1000:>10.1f} {included * 1000:>12.1f} '
+                  f'{registry.parses - parses:>7}')
+
+
+if __name__ == '__main__':
+    main()
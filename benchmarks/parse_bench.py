@@ -0,0 +1,30 @@
+"""Template parsing time of the Lark grammar against the hand-written descent parser.
+
+Run from the repository root: python -m benchmarks.parse_bench
+"""
+import timeit
+
+import dumboParser as dp
+
+PAGE = """<div class="item">
+    <h2>{{ print title; }}</h2>
+    <p>Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore.</p>
+    {{ for tag in tags do print '<span>' . tag . '</span>'; endfor; }}
+</div>
+"""
+
+
+def main(sizes=(1, 10, 100, 1000), static_lines=20):
+    static = '<p>' + 'static markup ' * 8 + '</p>\n'
+    dp.dumbo_parser.get()
+    print(f"{'blocks':>6} {'chars':>9} {'lark ms':>9} {'descent ms':>11} {'speedup':>8}")
+    for n in sizes:
+        src = (PAGE + static * static_lines) * n
+        number = max(1, 200 // n)
+        t_lark = min(timeit.repeat(lambda: dp.parse(src, 'lark'), number=number, repeat=3)) / number
+        t_descent = min(timeit.repeat(lambda: dp.parse(src, 'descent'), number=number, repeat=3)) / number
+        print(f'{2 * n:>6} {len(src):>9} {t_lark * 1000:>9.2f} {t_descent * 1000:>11.2f} {t_lark / t_descent:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Render throughput of the closure compiler against Interpreter.
+
+Run from the repository root: python -m benchmarks.render_bench
+"""
+import timeit
+
+from dumboParser import dumbo_parser
+from dumbo import Interpreter
+from compiler import compile_program
+
+TEMPLATE = """<html>
+<head><title>{{ print nom; }}</title></head>
+<body>
+    {{
+    i := 0;
+    for photo in photos do
+        if i > 0 do print ', '; endif;
+        print '<a href="' . photo . '">' . photo . '</a>';
+        i := i + 1;
+    endfor;
+    }}
+    <br/>
+    {{ print i * 2 + 1; }} photos in {{ print nom; }}.
+</body>
+</html>"""
+
+
+def make_scope(n):
+    return {'nom': 'album', 'photos': [f'photo{i}.png' for i in range(n)]}
+
+
+def interpret(program, scope):
+    interpreter = Interpreter(scope)
+    program.accept(interpreter)
+    return interpreter.result
+
+
+def main(sizes=(1, 10, 100, 1000)):
+    program = dumbo_parser.parse(TEMPLATE)
+    compiled = compile_program(program)
+    print(f"{'items':>6} {'interpreter/s':>14} {'compiled/s':>11} {'speedup':>8}")
+    for n in sizes:
+        scope = make_scope(n)
+        assert interpret(program, scope) == compiled.render(scope)
+        number = max(1, 20000 // (n + 10))
+        t_interpreter = min(timeit.repeat(lambda: interpret(program, scope), number=number, repeat=3))
+        t_compiled = min(timeit.repeat(lambda: compiled.render(scope), number=number, repeat=3))
+        print(f'{n:>6} {number / t_interpreter:>14.0f} {number / t_compiled:>11.0f} '
+              f'{t_interpreter / t_compiled:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Load test of the render server: concurrent clients send requests over the Unix socket, latency percentiles
+and throughput are reported, next to the latency of one process per render.
+
+Run from the repository root: python -m benchmarks.server_bench
+"""
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.render_bench import TEMPLATE, make_scope
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def client(path, request, count, latencies):
+    reader, writer = await asyncio.open_unix_connection(path, limit=2 ** 26)
+    line = json.dumps(request).encode() + b'\n'
+    for _ in range(count):
+        start = time.perf_counter()
+        writer.write(line)
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        assert 'output' in response, response
+    writer.close()
+
+
+async def load(path, request, clients, count):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[client(path, request, count, latencies) for _ in range(clients)])
+    return latencies, time.perf_counter() - start
+
+
+def wait_for(path, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError('server did not start')
+        time.sleep(0.05)
+
+
+def main(requests=2000, items=20):
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, 'page.dumbo')
+        with open(template, 'w') as f:
+            f.write(TEMPLATE)
+        data_file = os.path.join(tmp, 'data.dumbo')
+        scope = make_scope(items)
+        with open(data_file, 'w') as f:
+            photos = ', '.join(f"'{p}'" for p in scope['photos'])
+            f.write(f"{{{{nom := '{scope['nom']}'; photos := ({photos});}}}}")
+
+        times = []
+        for _ in range(5):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, 'dumbo.py', data_file, template], check=True, stdout=subprocess.DEVNULL)
+            times.append(time.perf_counter() - start)
+        print(f'process per render: {statistics.median(times) * 1000:.1f} ms')
+
+        path = os.path.join(tmp, 'dumbo.sock')
+        server = subprocess.Popen([sys.executable, 'dumbo.py', 'serve', template, '--socket', path],
+                                  stderr=subprocess.DEVNULL)
+        try:
+            wait_for(path, server)
+            print(f"{'request':<10} {'clients':>7} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+            for kind, request in [('scope', {'template': 'page', 'scope': scope}),
+                                  ('data_file', {'template': 'page', 'data_file': data_file})]:
+                for clients in (1, 8, 32):
+                    latencies, elapsed = asyncio.run(load(path, request, clients, requests // clients))
+                    print(f'{kind:<10} {clients:>7} {percentile(latencies, 50) * 1000:>8.2f} '
+                          f'{percentile(latencies, 99) * 1000:>8.2f} {len(latencies) / elapsed:>8.0f}')
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
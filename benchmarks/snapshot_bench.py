@@ -0,0 +1,47 @@
+"""Load time of a data file against its binary snapshot, and of rendering a template that reads a few of its
+variables, on generated files of growing size.
+
+Run from the repository root: python -m benchmarks.snapshot_bench
+"""
+import os
+import tempfile
+import time
+
+from dumboParser import dumbo_parser
+from data import data_loader
+from compiler import compile_program
+from snapshot import Snapshot, snapshot
+from benchmarks.data_bench import generate
+
+TEMPLATE = "{{print name0; for item in list1 do print item; endfor; print count2;}}"
+
+
+def best_time(function, repeat=5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes=(1000, 10000, 100000)):
+    program = compile_program(dumbo_parser.parse(TEMPLATE))
+    print(f"{'assigns':>8} {'MB':>6} {'parse ms':>9} {'open ms':>8} {'parse+render ms':>16} {'open+render ms':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        for n in sizes:
+            data_file = os.path.join(directory, f'{n}.dumbo')
+            snapshot_file = os.path.join(directory, f'{n}.snap')
+            generate(data_file, n)
+            snapshot(data_file, snapshot_file)
+            assert program.render(data_loader.load(data_file)) == program.render(Snapshot.open(snapshot_file))
+            parse = best_time(lambda: data_loader.load(data_file))
+            open_ = best_time(lambda: Snapshot.open(snapshot_file))
+            parse_render = best_time(lambda: program.render(data_loader.load(data_file)))
+            open_render = best_time(lambda: program.render(Snapshot.open(snapshot_file)))
+            print(f'{n:>8} {os.path.getsize(data_file) / 1e6:>6.1f} {parse * 1000:>9.2f} {open_ * 1000:>8.3f} '
+                  f'{parse_render * 1000:>16.2f} {open_render * 1000:>15.3f}')
+
+
+if __name__ == '__main__':
+    main()
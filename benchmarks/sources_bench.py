@@ -0,0 +1,47 @@
+"""Peak memory and time of a loop over the lines of a file, read into a list against a LineSource,
+both rendered to a streaming sink.
+
+Run from the repository root: python -m benchmarks.sources_bench
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+from dumboParser import dumbo_parser
+from dumbo import Interpreter
+from sources import LineSource
+
+TEMPLATE = "<ul>{{for line in lines do print '<li>' . line . '</li>'; endfor;}}</ul>"
+
+
+def render(program, scope) -> tuple[float, int]:
+    with open(os.devnull, 'w') as sink:
+        tracemalloc.start()
+        start = time.perf_counter()
+        if type(scope['lines']) is str:
+            with open(scope['lines']) as f:
+                scope = {'lines': f.read().splitlines()}
+        program.accept(Interpreter(scope, sink=sink))
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(sizes=(10000, 100000, 1000000)):
+    program = dumbo_parser.parse(TEMPLATE)
+    print(f"{'lines':>8} {'list s':>8} {'list peak MiB':>14} {'source s':>9} {'source peak MiB':>16}")
+    with tempfile.TemporaryDirectory() as directory:
+        for n in sizes:
+            path = os.path.join(directory, f'{n}.txt')
+            with open(path, 'w') as f:
+                f.writelines(f'entry number {i}\n' for i in range(n))
+            list_time, list_peak = render(program, {'lines': path})
+            source_time, source_peak = render(program, {'lines': LineSource(path)})
+            print(f'{n:>8} {list_time:>8.2f} {list_peak / 2 ** 20:>14.1f} '
+                  f'{source_time:>9.2f} {source_peak / 2 ** 20:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Cold start of the CLI: bare imports, and a full render with and without the serialized parsers.
+
+Run from the repository root: python -m benchmarks.startup_bench
+"""
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from dumboParser import PARSER_CACHE_DIR
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RENDER = [os.path.join(ROOT, 'dumbo.py'), os.path.join(ROOT, 'exemples', 'data_t2.dumbo'),
+          os.path.join(ROOT, 'exemples', 'template2.dumbo')]
+
+
+def run(args, repeat, setup=None):
+    best = float('inf')
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(repeat=10):
+    clear = lambda: shutil.rmtree(PARSER_CACHE_DIR, ignore_errors=True)
+    rows = [
+        ('python (baseline)', ['-c', 'pass'], None),
+        ('import dumbo', ['-c', 'import dumbo'], None),
+        ('import dumbo + lark', ['-c', 'import dumbo, lark'], None),
+        ('render, no serialized parser', RENDER, clear),
+        ('render, serialized parser', RENDER, None),
+    ]
+    for name, args, setup in rows:
+        print(f'{name:<30} {run(args, repeat, setup):8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
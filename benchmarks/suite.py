@@ -0,0 +1,143 @@
+"""Scaling benchmark suite: generated templates and data varied along one axis at a time, with parsing,
+data loading and rendering timed separately and the peak memory of the whole run.
+Results can be saved as JSON and compared with an earlier run, slowdowns above the threshold are flagged.
+Times are medians of several batches of calls, and differences under NOISE_FLOOR are ignored, so that two runs of
+the same code compare clean.
+
+Run from the repository root: python -m benchmarks.suite [--output new.json] [--compare old.json]
+"""
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import dumboParser as dp
+from data import data_loader
+from dumbo import Interpreter
+from compiler import compile_program
+
+BASE = dict(text=200, blocks=10, loop=10, nesting=1, expression=1, variables=5)
+
+AXES = {
+    'text': [100, 1000, 10000, 100000],
+    'blocks': [1, 10, 100, 1000],
+    'loop': [1, 10, 100, 1000],
+    'nesting': [1, 2, 3],
+    'expression': [1, 5, 25],
+    'variables': [1, 10, 100, 1000],
+}
+
+QUICK_AXES = {axis: values[:2] for axis, values in AXES.items()}
+
+METRICS = ['parse', 'data', 'render', 'render_compiled']
+
+NOISE_FLOOR = {'parse': 50e-6, 'data': 50e-6, 'render': 50e-6, 'render_compiled': 50e-6, 'peak_memory': 16384}
+
+
+def generate(text, blocks, loop, nesting, expression, variables):
+    """Returns a template and a data source, every block prints the variables and a computed value
+    inside `nesting` nested loops over a list of `loop` strings"""
+    data = [f"v{k} := 'value {k}';" for k in range(variables)]
+    data.append(f"items := ({', '.join(repr(f'item {j}') for j in range(loop))});")
+    data.append('n := 1;')
+    value = 'n'
+    for _ in range(expression):
+        value = f'({value} + 1)'
+    body = ' '.join(f'print v{k};' for k in range(variables)) + f' x := {value}; print x;'
+    for depth in range(nesting):
+        body = f'for i{depth} in items do print i{depth}; {body} endfor;'
+    literal = ('lorem ipsum ' * (text // 12 + 1))[:text]
+    template = ''.join(f'{literal}{{{{ {body} }}}}' for _ in range(blocks))
+    return template, '{{' + '\n'.join(data) + '}}'
+
+
+def median_time(function, budget=0.1, repeat=9) -> float:
+    """Median time of one call, calls are batched so that each measure lasts about budget seconds"""
+    function()  # warm up
+    start = time.perf_counter()
+    function()
+    number = max(1, int(budget / max(time.perf_counter() - start, 1e-9)))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+    return statistics.median(times)
+
+
+def interpret(program, scope) -> str:
+    interpreter = Interpreter(scope)
+    program.accept(interpreter)
+    return interpreter.result
+
+
+def measure(params) -> dict:
+    template, data = generate(**params)
+    program = dp.parse(template)
+    scope = data_loader.parse(data)
+    compiled = compile_program(program)
+    result = {
+        'parse': median_time(lambda: dp.parse(template)),
+        'data': median_time(lambda: data_loader.parse(data)),
+        'render': median_time(lambda: interpret(program, scope)),
+        'render_compiled': median_time(lambda: compiled.render(scope)),
+        'template_size': len(template),
+        'output_size': len(interpret(program, scope)),
+    }
+    tracemalloc.start()
+    interpret(dp.parse(template), data_loader.parse(data))
+    result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+def run(axes) -> dict:
+    dp.dumbo_parser.get()
+    results = {}
+    for axis, values in axes.items():
+        for value in values:
+            name = f'{axis}={value}'
+            results[name] = measure(dict(BASE, **{axis: value}))
+            row = results[name]
+            print(f'{name:<18} ' + ' '.join(f'{metric} {row[metric] * 1000:9.3f} ms' for metric in METRICS)
+                  + f" peak {row['peak_memory'] / 1024:9.0f} KiB", flush=True)
+    return results
+
+
+def compare(old: dict, new: dict, threshold: float) -> list[str]:
+    """Lists the measures of new more than threshold times slower or bigger than in old, and by more than
+    the noise floor of the metric"""
+    regressions = []
+    for name, row in new.items():
+        if name not in old:
+            continue
+        for metric in METRICS + ['peak_memory']:
+            before, after = old[name].get(metric), row[metric]
+            if before and after / before > threshold and after - before > NOISE_FLOOR[metric]:
+                regressions.append(f'{name} {metric}: {after / before:.2f}x ({before:.6g} -> {after:.6g})')
+    return regressions
+
+
+def main(output=None, compare_to=None, threshold=1.5, quick=False):
+    """Runs the suite, saves the results to output and compares them with the results file compare_to"""
+    results = run(QUICK_AXES if quick else AXES)
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'python': sys.version, 'platform': platform.platform(), 'time': time.time(),
+                       'base': BASE, 'results': results}, f, indent=1)
+    if compare_to:
+        with open(compare_to) as f:
+            regressions = compare(json.load(f)['results'], results, threshold)
+        for regression in regressions:
+            print(f'regression: {regression}')
+        print(f'{len(regressions)} regressions above {threshold}x')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    import argh
+    argh.dispatch_command(main)
@@ -0,0 +1,54 @@
+"""Build times of the watch Builder on a generated directory: cold build, one data file changed in a running
+watcher, template changed, and a restart with the manifest and nothing changed.
+
+Run from the repository root: python -m benchmarks.watch_bench
+"""
+import os
+import tempfile
+import time
+
+from watch import Builder
+from benchmarks.render_bench import TEMPLATE
+
+
+def write(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def timed(label, build, targets):
+    start = time.perf_counter()
+    built, errors = build(targets)
+    assert not errors, errors
+    print(f'{label:<28} {len(built):>6} {(time.perf_counter() - start) * 1000:>10.1f}')
+
+
+def data(i, items=50):
+    photos = ', '.join(f"'photo {i} {j}'" for j in range(items))
+    return f"{{{{nom := 'album {i}'; photos := ({photos});}}}}"
+
+
+def main(files=500):
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, 'page.dumbo')
+        write(template, TEMPLATE)
+        targets = []
+        for i in range(files):
+            data_file = os.path.join(tmp, f'data{i}.dumbo')
+            write(data_file, data(i))
+            targets.append((template, data_file, os.path.join(tmp, 'out', f'data{i}.html')))
+        manifest = os.path.join(tmp, 'manifest.json')
+
+        print(f"{'build':<28} {'outputs':>6} {'ms':>10}")
+        builder = Builder(manifest)
+        timed('cold', builder.build, targets)
+        timed('nothing changed', builder.build, targets)
+        write(targets[0][1], data(0, 60))
+        timed('one data file changed', builder.build, targets)
+        write(template, TEMPLATE + '\n')
+        timed('template changed', builder.build, targets)
+        timed('restart, nothing changed', Builder(manifest).build, targets)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Peak memory and time of parsing and rendering mostly static templates to a file: the descent parser and
+Interpreter against MappedTemplate, whose literal text stays in the memory mapped source.
+
+Run from the repository root: python -m benchmarks.zerocopy_bench
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+import dumboParser as dp
+from dumbo import Interpreter
+from zerocopy import MappedTemplate
+
+
+def generate(file_name, blocks, text_size):
+    text = ('<div class="static">lorem ipsum dolor sit amet</div>\n' * (text_size // 52 + 1))[:text_size]
+    with open(file_name, 'w') as f:
+        for i in range(blocks):
+            f.write(f"{text}{{{{print title . ' {i}';}}}}")
+
+
+def copying(src_file, output):
+    with open(src_file) as f:
+        program = dp.parse(f.read(), 'descent')
+    interpreter = Interpreter({'title': 'page'})
+    program.accept(interpreter)
+    output.write(interpreter.result)
+
+
+def zero_copy(src_file, output):
+    with MappedTemplate.open(src_file) as template:
+        template.render_to(output, {'title': 'page'})
+
+
+def measure(render, src_file) -> tuple[float, int]:
+    with open(os.devnull, 'w') as output:
+        tracemalloc.start()
+        start = time.perf_counter()
+        render(src_file, output)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(sizes=((100, 10000), (1000, 10000), (100, 1000000))):
+    print(f"{'blocks':>7} {'text/block':>10} {'MB':>6} {'copy ms':>8} {'copy peak MB':>13} {'mmap ms':>8} "
+          f"{'mmap peak MB':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        for blocks, text_size in sizes:
+            src_file = os.path.join(directory, f'{blocks}-{text_size}.dumbo')
+            generate(src_file, blocks, text_size)
+            copy_time, copy_peak = measure(copying, src_file)
+            mmap_time, mmap_peak = measure(zero_copy, src_file)
+            print(f'{blocks:>7} {text_size:>10} {os.path.getsize(src_file) / 1e6:>6.1f} {copy_time * 1000:>8.1f} '
+                  f'{copy_peak / 1e6:>13.1f} {mmap_time * 1000:>8.1f} {mmap_peak / 1e6:>13.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+from __future__ import annotations
+from typing import Callable, Optional, Union
+from array import array
+import dumboParser as dp
+from visitors import Visitor
+from dumbo import BadReferenceError, NotIterableError
+from functions import FUNCTIONS
+from sources import ListSource
+from includes import Signature
+from compiler import ARITHMETIC_OPERATIONS, BOOLEAN_OPERATIONS, UNSET, SlotProgram, SlotResolver, to_str
+
+# opcodes, each instruction is an opcode followed by one integer argument
+TEXT = 0           # write constants[arg]
+PRINT = 1          # pop a value and write it
+CONST = 2          # push constants[arg]
+LOAD_SLOT = 3      # push the variable in slot arg
+LOAD = 4           # push the first set slot of the candidates constants[arg]
+STORE_SLOT = 5     # pop a value into slot arg
+STORE = 6          # pop a value into the first set slot of the candidates constants[arg], else the first one
+BINARY = 7         # pop right and left, push OPERATIONS[arg](left, right)
+CONCAT = 8         # pop arg values, push their concatenation
+JUMP = 9           # continue at arg
+JUMP_IF_FALSE = 10  # pop a value, continue at arg when it is false
+GET_ITER = 11      # pop a value, push an iterator over it, constants[arg] names the variable if it isn't a list
+                   # or a ListSource
+FOR_ITER = 12      # push the next value of the iterator on top, when exhausted pop it and continue at arg
+UNSET_SLOTS = 13   # unset the slots constants[arg]
+CALL = 14          # constants[arg] is (name, count): pop count arguments, push FUNCTIONS[name](*arguments)
+
+OPCODE_NAMES = ['TEXT', 'PRINT', 'CONST', 'LOAD_SLOT', 'LOAD', 'STORE_SLOT', 'STORE', 'BINARY', 'CONCAT', 'JUMP',
+                'JUMP_IF_FALSE', 'GET_ITER', 'FOR_ITER', 'UNSET_SLOTS', 'CALL']
+OPERATORS = list(ARITHMETIC_OPERATIONS) + list(BOOLEAN_OPERATIONS)
+OPERATIONS = list(ARITHMETIC_OPERATIONS.values()) + list(BOOLEAN_OPERATIONS.values())
+
+
+class Bytecode(SlotProgram):
+    """Program lowered to a flat instruction array and a constant pool, run by a small stack machine"""
+
+    def __init__(self, code: array, constants: list, globals_: dict[str, int], slot_names: list[str],
+                 dependencies: Optional[dict[str, Signature]] = None):
+        super().__init__(globals_, len(slot_names), dependencies)
+        self.code = code
+        self.constants = constants
+        self.slot_names = slot_names
+
+    def run(self, slots: list, write: Callable[[str], None]) -> None:
+        code = self.code
+        constants = self.constants
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+        end = len(code)
+        while pc < end:
+            op = code[pc]
+            arg = code[pc + 1]
+            pc += 2
+            if op == LOAD_SLOT:
+                value = slots[arg]
+                if value is UNSET:
+                    raise BadReferenceError(self.slot_names[arg])
+                push(value)
+            elif op == PRINT:
+                value = pop()
+                write(value if type(value) is str else to_str(value))
+            elif op == TEXT:
+                write(constants[arg])
+            elif op == CONST:
+                push(constants[arg])
+            elif op == STORE_SLOT:
+                slots[arg] = pop()
+            elif op == BINARY:
+                right = pop()
+                stack[-1] = OPERATIONS[arg](stack[-1], right)
+            elif op == FOR_ITER:
+                try:
+                    push(next(stack[-1]))
+                except StopIteration:
+                    pop()
+                    pc = arg
+            elif op == JUMP:
+                pc = arg
+            elif op == LOAD:
+                for slot in constants[arg]:
+                    value = slots[slot]
+                    if value is not UNSET:
+                        push(value)
+                        break
+                else:
+                    raise BadReferenceError(self.slot_names[constants[arg][0]])
+            elif op == STORE:
+                value = pop()
+                candidates = constants[arg]
+                for slot in candidates:
+                    if slots[slot] is not UNSET:
+                        slots[slot] = value
+                        break
+                else:
+                    slots[candidates[0]] = value
+            elif op == UNSET_SLOTS:
+                for slot in constants[arg]:
+                    slots[slot] = UNSET
+            elif op == CONCAT:
+                values = stack[-arg:]
+                del stack[-arg:]
+                push(''.join([v if type(v) is str else to_str(v) for v in values]))
+            elif op == JUMP_IF_FALSE:
+                if not pop():
+                    pc = arg
+            elif op == GET_ITER:
+                value = pop()
+                if type(value) is not list and not isinstance(value, ListSource):
+                    raise NotIterableError(constants[arg])
+                push(iter(value))
+            elif op == CALL:
+                name, count = constants[arg]
+                values = stack[-count:]
+                del stack[-count:]
+                push(FUNCTIONS[name][0](*values))
+
+    def disassemble(self) -> list[str]:
+        lines = []
+        for pc in range(0, len(self.code), 2):
+            op, arg = self.code[pc], self.code[pc + 1]
+            if op in (TEXT, CONST, LOAD, STORE, GET_ITER, UNSET_SLOTS, CALL):
+                detail = repr(self.constants[arg])
+            elif op in (LOAD_SLOT, STORE_SLOT):
+                detail = self.slot_names[arg]
+            elif op == BINARY:
+                detail = OPERATORS[arg]
+            else:
+                detail = ''
+            lines.append(f'{pc:>5} {OPCODE_NAMES[op]:<14}{arg:>5} {detail}'.rstrip())
+        return lines
+
+
+class Assembler(SlotResolver, Visitor):
+    """Lowers an AST to Bytecode, constants are shared in a pool and slots resolved like Compiler does"""
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(path)
+        self.code = array('i')
+        self.constants = []
+        self._constant_index = {}
+
+    def constant(self, value) -> int:
+        key = (type(value), tuple(value) if type(value) is list else value)
+        if key not in self._constant_index:
+            self._constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return self._constant_index[key]
+
+    def emit(self, op: int, arg: int = 0) -> int:
+        self.code.append(op)
+        self.code.append(arg)
+        return len(self.code) - 1
+
+    def expression(self, value: Union[dp.DumboElement, int, str, bool, list]) -> None:
+        if type(value) in dp.primitives:
+            self.emit(CONST, self.constant(value))
+        else:
+            value.accept(self)
+
+    def store(self, name: str) -> None:
+        candidates = self.candidates(name)
+        if len(candidates) == 1:
+            self.emit(STORE_SLOT, candidates[0])
+        else:
+            self.emit(STORE, self.constant(candidates))
+
+    def body(self, element: dp.ExpressionsListElement) -> None:
+        body_slots = self.enter_scope(element)
+        element.accept(self)
+        self.exit_scope()
+        if body_slots:
+            self.emit(UNSET_SLOTS, self.constant(body_slots))
+
+    def visit_print_element(self, element: dp.PrintElement) -> None:
+        if type(element.str_expression) in dp.primitives:
+            self.emit(TEXT, self.constant(to_str(element.str_expression)))
+        else:
+            element.str_expression.accept(self)
+            self.emit(PRINT)
+
+    def visit_for_element(self, element: dp.ForElement) -> None:
+        self.expression(element.iterator)
+        name = element.iterator.name if type(element.iterator) is not list else ''
+        self.emit(GET_ITER, self.constant(name))
+        loop = len(self.code)
+        exit_jump = self.emit(FOR_ITER)
+        self.store(element.iterator_var.name)
+        self.body(element.expressions_list)
+        self.emit(JUMP, loop)
+        self.code[exit_jump] = len(self.code)
+
+    def visit_se_element(self, element: dp.SEElement) -> None:
+        for e in element.subExpressions:
+            self.expression(e)
+        self.emit(CONCAT, len(element.subExpressions))
+
+    def _binary(self, element: Union[dp.AEElement, dp.BEElement]) -> None:
+        self.expression(element.left)
+        self.expression(element.right)
+        self.emit(BINARY, OPERATORS.index(element.op))
+
+    def visit_ae_element(self, element: dp.AEElement) -> None:
+        self._binary(element)
+
+    def visit_be_element(self, element: dp.BEElement) -> None:
+        self._binary(element)
+
+    def visit_expressions_list_element(self, element: dp.ExpressionsListElement) -> None:
+        for exp in element.expressions_list:
+            exp.accept(self)
+
+    def visit_assign_element(self, element: dp.AssignElement) -> None:
+        self.expression(element.value)
+        self.store(element.variable.name)
+
+    def content(self, element: dp.ProgramElement) -> None:
+        for el in element.content:
+            if type(el) is str:
+                self.emit(TEXT, self.constant(el))
+            else:
+                el.accept(self)
+
+    def visit_program_element(self, element: dp.ProgramElement) -> Bytecode:
+        self.content(element)
+        return Bytecode(self.code, self.constants, self.globals, self.slot_names, self.dependencies)
+
+    def visit_include_element(self, element: dp.IncludeElement) -> None:
+        path, program = self.included(element)
+        self.including.append(path)
+        self.content(program)
+        self.including.pop()
+
+    def visit_variable_element(self, element: dp.VariableElement) -> None:
+        candidates = self.candidates(element.name)
+        if len(candidates) == 1:
+            self.emit(LOAD_SLOT, candidates[0])
+        else:
+            self.emit(LOAD, self.constant(candidates))
+
+    def visit_call_element(self, element: dp.CallElement) -> None:
+        for argument in element.arguments:
+            self.expression(argument)
+        self.emit(CALL, self.constant((element.name, len(element.arguments))))
+
+    def visit_if_element(self, element: dp.IfElement) -> None:
+        if element.boolean_expression is False:
+            return
+        if element.boolean_expression is not True:
+            element.boolean_expression.accept(self)
+            exit_jump = self.emit(JUMP_IF_FALSE)
+        self.body(element.expressions_list)
+        if element.boolean_expression is not True:
+            self.code[exit_jump] = len(self.code)
+
+
+def assemble(program: dp.ProgramElement, path: Optional[str] = None) -> Bytecode:
+    """Assembles program, path is its file, from which includes are resolved"""
+    return program.accept(Assembler(path))
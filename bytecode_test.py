@@ -0,0 +1,28 @@
+import unittest
+
+import compiler_test
+from dumboParser import parse
+from bytecode import assemble
+
+
+class BytecodeTest(compiler_test.CompilerTest):
+
+    def execute(self, src) -> str:
+        return assemble(parse(src, self.backend)).render({})
+
+    def compile(self, program):
+        return assemble(program)
+
+    def test_constantPool(self) -> None:
+        bytecode = assemble(parse("{{for i in ('a', 'b') do print i . 'a'; endfor; print 'a';}}"))
+        self.assertEqual(bytecode.constants.count('a'), 1)
+        self.assertEqual(len(bytecode.code) % 2, 0)
+
+    def test_disassemble(self) -> None:
+        lines = assemble(parse("{{if x < 2 do print x; endif;}}")).disassemble()
+        self.assertEqual([line.split()[1] for line in lines],
+                         ['LOAD_SLOT', 'CONST', 'BINARY', 'JUMP_IF_FALSE', 'LOAD_SLOT', 'PRINT'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+import contextlib
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Callable
+import dumboParser as dp
+import data
+
+CACHE_VERSION = 2
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+
+# modules whose code decides what a parse returns
+PARSER_MODULES = ['dumboParser.py', 'descentParser.py', 'functions.py', 'data.py']
+
+
+@functools.lru_cache(maxsize=None)
+def _code_version() -> str:
+    """Hash of the parser code, so that entries don't outlive a change of the classes they pickle"""
+    h = hashlib.sha256()
+    for name in PARSER_MODULES:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _grammar_version(grammar: str, backend: str = '') -> str:
+    return hashlib.sha256(f'{CACHE_VERSION}:{_code_version()}:{backend}:{grammar}'.encode()).hexdigest()
+
+
+class ParseCache:
+    """On-disk cache of parsed templates and data scopes, keyed by content, grammar, parser backend and parser code.
+    The directory can be shared by several processes.
+    Entries are pickles, the least recently used ones are evicted once the directory exceeds max_size bytes.
+    Only point it to a directory you trust."""
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE, backend: str = 'lark'):
+        self.directory = directory
+        self.max_size = max_size
+        self.backend = backend
+        os.makedirs(directory, exist_ok=True)
+
+    def load_program(self, src: str) -> dp.ProgramElement:
+        return self._load(self.key('program', dp.dumbo_parser.grammar, src, self.backend),
+                          lambda: dp.parse(src, self.backend))
+
+    def load_data(self, src: str) -> dict:
+        return self._load(self.key('data', data.data_parser.grammar, src), lambda: data.data_loader.parse(src))
+
+    @staticmethod
+    def key(kind: str, grammar: str, src: str, backend: str = '') -> str:
+        content = hashlib.sha256(src.encode()).hexdigest()
+        return f'{kind}-{_grammar_version(grammar, backend)[:16]}-{content}'
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.pickle')
+
+    def _load(self, key: str, parse: Callable):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # corrupted or written by an incompatible version, another process may have evicted it already
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+        else:
+            with contextlib.suppress(FileNotFoundError):
+                os.utime(path)
+            return value
+        value = parse()
+        self._store(path, value)
+        return value
+
+    def _store(self, path: str, value) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pickle'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            total -= size
@@ -0,0 +1,93 @@
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+import dumboParser as dp
+from cache import ParseCache
+
+
+class ParseCacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ParseCache(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def entries(self) -> list[str]:
+        return sorted(name for name in os.listdir(self.tmp.name) if name.endswith('.pickle'))
+
+    def test_program(self) -> None:
+        src = "<p>{{print 'Hello';}}</p>"
+        program = self.cache.load_program(src)
+        self.assertEqual(len(self.entries()), 1)
+        cached = ParseCache(self.tmp.name).load_program(src)
+        self.assertIs(type(cached), dp.ProgramElement)
+        self.assertEqual(cached.content[0], program.content[0])
+        self.assertEqual(cached.content[1].expressions_list[0].str_expression, 'Hello')
+        self.assertEqual(len(self.entries()), 1)
+
+    def test_data(self) -> None:
+        src = "{{a := 42; b := ('x', 'y');}}"
+        self.assertEqual(self.cache.load_data(src)['b'], ['x', 'y'])
+        self.assertEqual(ParseCache(self.tmp.name).load_data(src)['a'], 42)
+
+    def test_grammar_invalidation(self) -> None:
+        self.assertNotEqual(ParseCache.key('program', 'grammar', 'src'),
+                            ParseCache.key('program', 'grammar changed', 'src'))
+        self.assertNotEqual(ParseCache.key('program', 'grammar', 'src', 'lark'),
+                            ParseCache.key('program', 'grammar', 'src', 'descent'))
+
+    def test_backends(self) -> None:
+        src = "{{print 1;}}"
+        self.cache.load_program(src)
+        ParseCache(self.tmp.name, backend='descent').load_program(src)
+        self.assertEqual(len(self.entries()), 2)
+
+    def test_evicted_while_loading(self) -> None:
+        src = "{{print 1;}}"
+        self.cache.load_program(src)
+        path = os.path.join(self.tmp.name, self.entries()[0])
+        real_load = pickle.load
+
+        def load_then_evict(f):
+            value = real_load(f)
+            os.remove(path)
+            return value
+        with mock.patch('cache.pickle.load', load_then_evict):
+            self.assertIs(type(self.cache.load_program(src)), dp.ProgramElement)
+
+        def evict_then_fail(f):
+            os.remove(path)
+            raise EOFError
+        self.cache.load_program(src)
+        with mock.patch('cache.pickle.load', evict_then_fail):
+            self.assertIs(type(self.cache.load_program(src)), dp.ProgramElement)
+
+    def test_corrupted_entry(self) -> None:
+        src = "{{print 1;}}"
+        self.cache.load_program(src)
+        path = os.path.join(self.tmp.name, self.entries()[0])
+        with open(path, 'wb') as f:
+            f.write(b'garbage')
+        self.assertIs(type(self.cache.load_program(src)), dp.ProgramElement)
+
+    def test_lru_eviction(self) -> None:
+        for i in range(3):
+            self.cache.load_program(f"{{{{print {i};}}}}")
+        paths = [os.path.join(self.tmp.name, name) for name in self.entries()]
+        size = os.path.getsize(paths[0])
+        for i, path in enumerate(paths):
+            os.utime(path, (i, i))
+        self.cache.max_size = 2 * size
+        self.cache.load_program("{{print 3;}}")
+        self.assertEqual(len(self.entries()), 2)
+        self.assertNotIn(os.path.basename(paths[0]), self.entries())
+        self.assertNotIn(os.path.basename(paths[1]), self.entries())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,328 @@
+from __future__ import annotations
+from typing import Callable, Iterator, Optional, Union
+from abc import ABC, abstractmethod
+import dumboParser as dp
+from visitors import Visitor
+from dumbo import BadReferenceError, NotIterableError, ARITHMETIC_OPERATIONS, BOOLEAN_OPERATIONS, REPLACEMENTS
+from functions import FUNCTIONS
+from sources import ListSource
+from includes import registry, resolve, check_cycle, Signature
+
+Slots = list
+Expression = Callable[[Slots], Union[int, str, bool, list]]
+Statement = Callable[[Slots, Callable[[str], None]], None]
+
+
+class Unset:
+    """Marks a slot whose variable is not defined in the scope it stands for"""
+
+    def __repr__(self):
+        return 'UNSET'
+
+
+UNSET = Unset()
+
+
+def to_str(value) -> str:
+    return REPLACEMENTS[type(value)](value)
+
+
+def _noop(slots, write):
+    pass
+
+
+class SlotProgram(ABC):
+    """Program whose variables live in a flat list of slots, one per variable and scope, resolved when it was built.
+    Included templates are built inline, `dependencies` records their files to tell when to rebuild."""
+
+    def __init__(self, globals_: dict[str, int], slot_count: int, dependencies: Optional[dict[str, Signature]] = None):
+        self.globals = globals_
+        self.slot_count = slot_count
+        self.dependencies = dependencies or {}
+
+    def stale(self) -> bool:
+        """True if an included file changed since the program was built"""
+        return bool(self.dependencies) and not registry.is_current(self.dependencies)
+
+    def new_slots(self, scope: dict) -> Slots:
+        slots = [UNSET] * self.slot_count
+        for name, slot in self.globals.items():
+            if name in scope:
+                slots[slot] = scope[name]
+        return slots
+
+    @abstractmethod
+    def run(self, slots: Slots, write: Callable[[str], None]) -> None:
+        pass
+
+    def render(self, scope: dict) -> str:
+        """Renders with scope as global variables, scope itself is never modified"""
+        chunks = []
+        self.run(self.new_slots(scope), chunks.append)
+        return ''.join(chunks)
+
+
+class CompiledProgram(SlotProgram):
+    """Template lowered to pre-bound closures, renders like Interpreter"""
+
+    def __init__(self, blocks: list[Statement], globals_: dict[str, int], slot_count: int,
+                 dependencies: Optional[dict[str, Signature]] = None):
+        super().__init__(globals_, slot_count, dependencies)
+        self.blocks = blocks
+
+    def run(self, slots: Slots, write: Callable[[str], None]) -> None:
+        for block in self.blocks:
+            block(slots, write)
+
+
+class SlotResolver:
+    """Compile-time variable resolution shared by the compilers.
+
+    Each variable gets one slot in the global scope and one in every if or for body assigning it directly,
+    as the Scope maps of the interpreter. A read checks, innermost first, the slots of the enclosing scopes that
+    may hold the variable, a write goes to the first one set or else to the current scope. Leaving a body
+    unsets its slots like dropping the child map.
+    Included templates are inlined: their top-level assignments belong to the including scope and their variables
+    resolve to the slots of the including program, so a partial is compiled again wherever it is included, only its
+    parsed program is shared through the registry."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.slot_names = []
+        self.globals = {}
+        self.scopes = []
+        self.including = [resolve(path)] if path else []
+        self.dependencies = {}
+
+    @property
+    def slot_count(self) -> int:
+        return len(self.slot_names)
+
+    def new_slot(self, name: str) -> int:
+        self.slot_names.append(name)
+        return len(self.slot_names) - 1
+
+    def candidates(self, name: str) -> tuple[int, ...]:
+        if name not in self.globals:
+            self.globals[name] = self.new_slot(name)
+        return tuple(scope[name] for scope in reversed(self.scopes) if name in scope) + (self.globals[name],)
+
+    def enter_scope(self, element: dp.ExpressionsListElement) -> tuple[int, ...]:
+        """Opens the scope of an if or for body, returns the slots to unset when leaving it"""
+        scope = {}
+        for name in self._assigned(element):
+            if name not in scope:
+                scope[name] = self.new_slot(name)
+        self.scopes.append(scope)
+        return tuple(scope.values())
+
+    def _assigned(self, element: dp.ExpressionsListElement) -> Iterator[str]:
+        """Names assigned directly in element, included templates included"""
+        for exp in element.expressions_list:
+            if isinstance(exp, dp.AssignElement):
+                yield exp.variable.name
+            elif isinstance(exp, dp.ForElement):
+                yield exp.iterator_var.name
+            elif type(exp) is dp.IncludeElement:
+                path, program = self.included(exp)
+                self.including.append(path)
+                for el in program.content:
+                    if type(el) is not str:
+                        yield from self._assigned(el)
+                self.including.pop()
+
+    def exit_scope(self) -> None:
+        self.scopes.pop()
+
+    def included(self, element: dp.IncludeElement) -> tuple[str, dp.ProgramElement]:
+        """Path and program of an included template, recorded as a dependency"""
+        path = resolve(element.path, self.including[-1] if self.including else None)
+        check_cycle(path, self.including)
+        self.dependencies[path], program = registry.get_with_signature(path)
+        return path, program
+
+
+class Compiler(SlotResolver, Visitor):
+    """Turns an AST into closures: operators, literal checks and dispatch are resolved at compile time"""
+
+    def body(self, element: dp.ExpressionsListElement) -> tuple[Statement, tuple[int, ...]]:
+        """Compiles an if or for body, returns it with the slots to unset when leaving it"""
+        body_slots = self.enter_scope(element)
+        body = element.accept(self)
+        self.exit_scope()
+        return body, body_slots
+
+    def store(self, name: str) -> Callable[[Slots, object], None]:
+        candidates = self.candidates(name)
+        if len(candidates) == 1:
+            slot = candidates[0]
+
+            def set_global(slots, value):
+                slots[slot] = value
+            return set_global
+        current = candidates[0]
+
+        def set_variable(slots, value):
+            for slot in candidates:
+                if slots[slot] is not UNSET:
+                    slots[slot] = value
+                    return
+            slots[current] = value
+        return set_variable
+
+    def expression(self, value) -> tuple[bool, Union[Expression, int, str, bool, list]]:
+        if type(value) in dp.primitives:
+            return True, value
+        return False, value.accept(self)
+
+    def statements(self, statements: list[Statement]) -> Statement:
+        statements = tuple(s for s in statements if s is not _noop)
+        if not statements:
+            return _noop
+        if len(statements) == 1:
+            return statements[0]
+
+        def run(slots, write):
+            for statement in statements:
+                statement(slots, write)
+        return run
+
+    def visit_print_element(self, element: dp.PrintElement) -> Statement:
+        const, expression = self.expression(element.str_expression)
+        if const:
+            text = to_str(expression)
+            return lambda slots, write: write(text)
+        return lambda slots, write: write(to_str(expression(slots)))
+
+    def visit_for_element(self, element: dp.ForElement) -> Statement:
+        store = self.store(element.iterator_var.name)
+        if type(element.iterator) is not list:
+            iterator_name = element.iterator.name
+            get_iterator = element.iterator.accept(self)
+        else:
+            iterator_name = None
+            constant = element.iterator
+            get_iterator = lambda slots: constant
+        body, body_slots = self.body(element.expressions_list)
+
+        def run(slots, write):
+            iterator = get_iterator(slots)
+            if type(iterator) is not list and not isinstance(iterator, ListSource):
+                raise NotIterableError(iterator_name)
+            for string in iterator:
+                store(slots, string)
+                body(slots, write)
+                for slot in body_slots:
+                    slots[slot] = UNSET
+        return run
+
+    def visit_se_element(self, element: dp.SEElement) -> Expression:
+        parts = []
+        for e in element.subExpressions:
+            const, e = self.expression(e)
+            if const:
+                text = to_str(e)
+                parts.append(lambda slots, text=text: text)
+            else:
+                parts.append(lambda slots, e=e: to_str(e(slots)))
+        parts = tuple(parts)
+        return lambda slots: ''.join([part(slots) for part in parts])
+
+    def _binary(self, operation, element: Union[dp.AEElement, dp.BEElement]) -> Expression:
+        left_const, left = self.expression(element.left)
+        right_const, right = self.expression(element.right)
+        if left_const and right_const:
+            return lambda slots: operation(left, right)
+        if left_const:
+            return lambda slots: operation(left, right(slots))
+        if right_const:
+            return lambda slots: operation(left(slots), right)
+        return lambda slots: operation(left(slots), right(slots))
+
+    def visit_ae_element(self, element: dp.AEElement) -> Expression:
+        return self._binary(ARITHMETIC_OPERATIONS[element.op], element)
+
+    def visit_be_element(self, element: dp.BEElement) -> Expression:
+        return self._binary(BOOLEAN_OPERATIONS[element.op], element)
+
+    def visit_expressions_list_element(self, element: dp.ExpressionsListElement) -> Statement:
+        return self.statements([exp.accept(self) for exp in element.expressions_list])
+
+    def visit_assign_element(self, element: dp.AssignElement) -> Statement:
+        const, value = self.expression(element.value)
+        store = self.store(element.variable.name)
+        if const:
+            return lambda slots, write: store(slots, value)
+        return lambda slots, write: store(slots, value(slots))
+
+    def content(self, element: dp.ProgramElement) -> list[Statement]:
+        blocks = []
+        for el in element.content:
+            if type(el) is str:
+                blocks.append(lambda slots, write, text=el: write(text))
+            else:
+                blocks.append(el.accept(self))
+        return [b for b in blocks if b is not _noop]
+
+    def visit_program_element(self, element: dp.ProgramElement) -> CompiledProgram:
+        return CompiledProgram(self.content(element), self.globals, self.slot_count, self.dependencies)
+
+    def visit_include_element(self, element: dp.IncludeElement) -> Statement:
+        path, program = self.included(element)
+        self.including.append(path)
+        statement = self.statements(self.content(program))
+        self.including.pop()
+        return statement
+
+    def visit_variable_element(self, element: dp.VariableElement) -> Expression:
+        name = element.name
+        candidates = self.candidates(name)
+        if len(candidates) == 1:
+            slot = candidates[0]
+
+            def get_global(slots):
+                value = slots[slot]
+                if value is UNSET:
+                    raise BadReferenceError(name)
+                return value
+            return get_global
+
+        def get_variable(slots):
+            for slot in candidates:
+                value = slots[slot]
+                if value is not UNSET:
+                    return value
+            raise BadReferenceError(name)
+        return get_variable
+
+    def visit_call_element(self, element: dp.CallElement) -> Expression:
+        function = FUNCTIONS[element.name][0]
+        arguments = []
+        for argument in element.arguments:
+            const, argument = self.expression(argument)
+            arguments.append((lambda slots, value=argument: value) if const else argument)
+        if len(arguments) == 1:
+            argument = arguments[0]
+            return lambda slots: function(argument(slots))
+        arguments = tuple(arguments)
+        return lambda slots: function(*[argument(slots) for argument in arguments])
+
+    def visit_if_element(self, element: dp.IfElement) -> Statement:
+        body, body_slots = self.body(element.expressions_list)
+        if type(element.boolean_expression) is bool:
+            if not element.boolean_expression:
+                return _noop
+            condition = lambda slots: True
+        else:
+            condition = element.boolean_expression.accept(self)
+
+        def run(slots, write):
+            if condition(slots):
+                body(slots, write)
+                for slot in body_slots:
+                    slots[slot] = UNSET
+        return run
+
+
+def compile_program(program: dp.ProgramElement, path: Optional[str] = None) -> CompiledProgram:
+    """Compiles program, path is its file, from which includes are resolved"""
+    return program.accept(Compiler(path))
@@ -0,0 +1,62 @@
+import unittest
+
+from dumboParser import parse
+from dumbo import Interpreter, BadReferenceError
+import dumbo_test
+from compiler import compile_program
+
+
+class CompilerTest(dumbo_test.InterpreterTest):
+
+    def execute(self, src) -> str:
+        return self.compile(parse(src, self.backend)).render({})
+
+    def compile(self, program):
+        return compile_program(program)
+
+    def test_examples(self) -> None:
+        scope = {'label': 'realises par Tony Kaye', 'nom': 'Mes plus belles vacances',
+                 'liste_label': ['American History X', 'Snowblind', 'Lake of Fire'],
+                 'listephoto': ['Mon beau bateau.png', 'Belle maman.png', 'Apero.png']}
+        for i in range(1, 4):
+            with open(f'exemples/template{i}.dumbo') as src_file:
+                program = parse(src_file.read())
+            interpreter = Interpreter(dict(scope))
+            program.accept(interpreter)
+            self.assertEqual(self.compile(program).render(dict(scope)), interpreter.result)
+
+    def test_scopeParity(self) -> None:
+        src_list = ["{{for i in l do x := i; for j in l do x := x . j; print x; endfor; print x; endfor;}}",
+                    "{{x := 'g'; for i in l do x := i; y := i; endfor; print x;}}",
+                    "{{for i in l do if i = i do y := i; endif; y := 'b'; print y; endfor;}}",
+                    "{{for i in l do print y; y := i; endfor;}}",
+                    "{{for i in l do y := i; if true do print y; y := 'in'; z := y; endif; print y; endfor;}}",
+                    "{{if true do for i in l do print i; endfor; print i; endif; print i;}}",
+                    "{{for i in l do n := 0; for j in l do n := n + 1; endfor; print n; endfor;}}"]
+        for src in src_list:
+            program = parse(src, self.backend)
+            compiled = self.compile(program)
+            for scope in [{'l': ['1', '2']}, {'l': ['1', '2'], 'y': 'data'}, {'l': []}]:
+                interpreter = Interpreter(dict(scope))
+                try:
+                    program.accept(interpreter)
+                    expected = interpreter.result
+                except BadReferenceError as e:
+                    expected = str(e)
+                try:
+                    result = compiled.render(scope)
+                except BadReferenceError as e:
+                    result = str(e)
+                self.assertEqual(result, expected, src)
+
+    def test_reusable(self) -> None:
+        compiled = self.compile(parse("{{for i in l do print i; endfor;}}"))
+        self.assertEqual(compiled.render({'l': ['a', 'b']}), 'ab')
+        self.assertEqual(compiled.render({'l': ['c']}), 'c')
+        scope = {'l': ['a'], 'x': 'data'}
+        self.compile(parse("{{x := 'changed';}}")).render(scope)
+        self.assertEqual(scope['x'], 'data')
+
+
+if __name__ == '__main__':
+    unittest.main()
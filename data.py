@@ -1,18 +1,21 @@
-from lark import Transformer, Lark
+from __future__ import annotations
+from typing import Union
+import mmap
+import re
+from dumboParser import LazyParser
 
 
-class DataTransformer(Transformer):
-
-    def __init__(self):
-        self.scope = {}
-        super().__init__()
+class DataTransformer:
+    """Stateless, so that one data_parser can be used repeatedly and from several threads"""
 
     def program(self, items):
-        return self.scope
+        return items[0]
+
+    def expressions_list(self, items):
+        return dict(items)
 
     def assign(self, items):
-        self.scope[items[0]] = items[1]
-        return items
+        return items[0], items[1]
 
     def variable(self, items):
         return str(items[0])
@@ -32,8 +35,108 @@ class DataTransformer(Transformer):
     def string_list(self, items):
         return items
 
+    def string_expression(self, items):
+        return ''.join(_to_str(item) for item in items)
+
+
+def _to_str(value: Union[str, int, bool]) -> str:
+    if type(value) is bool:
+        return 'true' if value else 'false'
+    return str(value)
+
+
+data_parser = LazyParser('dumbo_data.lark', DataTransformer(), 'program')
+
+
+_WS = rb'[ \t\f\r\n]*'
+_STRING = rb"'(?:[^'\\\n]|\\.)*'"  # ESCAPED_STRING, written so that backtracking can't extend it
+_ASSIGN = re.compile(_WS + rb'([_A-Za-z][_A-Za-z0-9]*)' + _WS + rb':=' + _WS +
+                     rb'(?:(' + _STRING + rb')|([0-9]+)|(true|false)|\(((?:' + _WS + _STRING + _WS + rb',)*' +
+                     _WS + _STRING + _WS + rb')\))' + _WS + rb';')
+_STRINGS = re.compile(_STRING)
+_TOKEN = re.compile(_WS + rb'(?:(' + _STRING + rb')|([0-9]+)|(true|false)(?![_A-Za-z0-9])|([_A-Za-z][_A-Za-z0-9]*)'
+                            rb'|(:=|[.;]))')
+_NAME = 4  # group of the names in _TOKEN
+_OPEN = re.compile(_WS + rb'{{')
+_CLOSE = re.compile(_WS + rb'}}' + _WS + rb'$')
+
+
+class DataSyntaxError(SyntaxError):
+
+    def __init__(self, src: bytes, pos: int):
+        line = bytes(src[:pos]).count(b'\n') + 1
+        self.line = line
+        super().__init__(f"Invalid data at line {line}: {bytes(src[pos:pos + 30])!r}")
+
+
+class DataLoader:
+    """Loader for the dumbo_data.lark format returning the same scope as data_parser.
+    Assignments are matched one at a time straight from the buffer, so a memory mapped file is never copied whole."""
+
+    def parse(self, src: Union[str, bytes]) -> dict:
+        if type(src) is str:
+            src = src.encode()
+        m = _OPEN.match(src)
+        if m is None:
+            raise DataSyntaxError(src, 0)
+        pos = m.end()
+        scope = {}
+        match = _ASSIGN.match
+        while True:
+            m = match(src, pos)
+            if m is not None:
+                string, integer, boolean, string_list = m.group(2, 3, 4, 5)
+                if string is not None:
+                    scope[m.group(1).decode()] = string[1:-1].decode()
+                elif integer is not None:
+                    scope[m.group(1).decode()] = int(integer)
+                elif boolean is not None:
+                    scope[m.group(1).decode()] = boolean == b'true'
+                else:
+                    scope[m.group(1).decode()] = [s[1:-1].decode() for s in _STRINGS.findall(string_list)]
+                pos = m.end()
+            elif _CLOSE.match(src, pos):
+                return scope
+            else:
+                pos = self._concatenation(src, pos, scope)
+
+    @staticmethod
+    def _concatenation(src: bytes, pos: int, scope: dict) -> int:
+        """Slow path for the assignments of string expressions: name := value . value ...;"""
+        start = pos
+        tokens = []
+        m = _TOKEN.match(src, pos)
+        if m is None or m.lastindex != _NAME:
+            raise DataSyntaxError(src, start)
+        while not tokens or tokens[-1] != b';':
+            m = _TOKEN.match(src, pos)
+            if m is None:
+                raise DataSyntaxError(src, start)
+            tokens.append(m.group(m.lastindex))
+            pos = m.end()
+        if len(tokens) < 6 or len(tokens) % 2 or tokens[1] != b':=' or any(t != b'.' for t in tokens[3:-1:2]):
+            raise DataSyntaxError(src, start)
+        values = []
+        for token in tokens[2:-1:2]:
+            if token[:1] == b"'":
+                values.append(token[1:-1].decode())
+            elif token in (b'true', b'false'):
+                values.append(token.decode())
+            elif token.isdigit():
+                values.append(str(int(token)))
+            else:
+                raise DataSyntaxError(src, start)
+        scope[tokens[0].decode()] = ''.join(values)
+        return pos
+
+    def load(self, file_name: str) -> dict:
+        with open(file_name, 'rb') as f:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return self.parse(b'')
+            with buffer:
+                return self.parse(buffer)
 
-with open('grammar/dumbo_data.lark', 'r') as f:
-    grammar = f.read()
 
-data_parser = Lark(grammar, parser='lalr', transformer=DataTransformer(), start='program')
+data_loader = DataLoader()
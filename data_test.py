@@ -1,6 +1,9 @@
+import os
+import tempfile
 import unittest
 
-from data import data_parser
+from dumboParser import LazyParser
+from data import data_parser, data_loader, DataTransformer, DataSyntaxError
 
 
 class DataTest(unittest.TestCase):
@@ -17,6 +20,63 @@ class DataTest(unittest.TestCase):
         scope = data_parser.parse(src)
         self.assertEqual(scope, expected)
 
+    def test_independentScopes(self):
+        first = data_parser.parse("{{a := 1;}}")
+        second = data_parser.parse("{{b := 2;}}")
+        self.assertEqual(first, {'a': 1})
+        self.assertEqual(second, {'b': 2})
+
+
+class DataLoaderTest(unittest.TestCase):
+
+    def assertParity(self, src):
+        parser = LazyParser('dumbo_data.lark', DataTransformer(), 'program')
+        self.assertEqual(data_loader.parse(src), parser.parse(src))
+
+    def test_data(self):
+        self.assertParity("""{{
+             a := 42;
+             b := 'Hello World!';
+             c := true;
+             d := false;
+             e := ('Hello', 'World!');
+        }}""")
+
+    def test_empty(self):
+        self.assertParity("{{\n}}")
+
+    def test_strings(self):
+        self.assertParity("{{a := 'it\\'s'; b := 'a\\\\'; c := ('x\\'', 'y', '');}}")
+
+    def test_concatenation(self):
+        self.assertParity("{{a := 'a' . 1 . true . 'b'; b := 'c';}}")
+        self.assertEqual(data_loader.parse("{{a := 'a' . 1 . true . 'b';}}"), {'a': 'a1trueb'})
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'data.dumbo')
+            with open(file_name, 'w') as f:
+                f.write("{{" + "".join(f"v{i} := ('a', 'b'); n{i} := {i};" for i in range(1000)) + "}}")
+            scope = data_loader.load(file_name)
+        self.assertEqual(len(scope), 2000)
+        self.assertEqual(scope['v999'], ['a', 'b'])
+        self.assertEqual(scope['n999'], 999)
+
+    def test_syntaxError(self):
+        for src in ["", "a := 1;", "{{a := 1}}", "{{a := ('a', 1);}}", "{{a = 1;}}", "{{a := 1;", "{{a := 'a' . ;}}",
+                    "{{'x' := 'a' . 'b';}}", "{{1 := 'a' . 'b';}}", "{{true := 'a' . 'b';}}"]:
+            with self.assertRaises(DataSyntaxError):
+                data_loader.parse(src)
+
+    def test_loadSyntaxError(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'data.dumbo')
+            with open(file_name, 'w') as f:
+                f.write("{{\na := 1;\nb := 1}}")
+            with self.assertRaises(DataSyntaxError) as cm:
+                data_loader.load(file_name)
+        self.assertIn('line 2', str(cm.exception))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,266 @@
+from __future__ import annotations
+from typing import Union
+import re
+import dumboParser as dp
+from functions import check_call, FunctionCallError
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<WS>[ \t\f\r\n]+)
+  | (?P<STRING>'.*?(?<!\\)(\\\\)*?')
+  | (?P<INT>[0-9]+)
+  | (?P<NAME>[_A-Za-z][_A-Za-z0-9]*)
+  | (?P<OP>}}|:=|!=|[-+*/<>=.;,()])
+""", re.VERBOSE)
+
+KEYWORDS = {'print', 'for', 'in', 'do', 'endfor', 'if', 'endif', 'true', 'false', 'and', 'or', 'include'}
+STATEMENT_KEYWORDS = {'print', 'for', 'if', 'include'}
+ADD_OPS = {'+', '-'}
+MULL_OPS = {'*', '/'}
+LOG_OPS = {'and', 'or'}
+COMP_OPS = {'<', '>', '=', '!='}
+
+
+class DumboSyntaxError(SyntaxError):
+
+    def __init__(self, src: str, pos: int, message: str):
+        line = src.count('\n', 0, pos) + 1
+        column = pos - src.rfind('\n', 0, pos)
+        super().__init__(f'{message} at line {line}, column {column}')
+        self.line = line
+        self.column = column
+
+
+class DescentParser:
+    """Hand-written parser for the dumbo.lark language producing the same elements as dumbo_parser.
+    Literal text is sliced out up to the next '{{', only code blocks are tokenized."""
+
+    def parse(self, src: str) -> dp.ProgramElement:
+        content = []
+        pos = 0
+        end = len(src)
+        while pos < end:
+            start = src.find('{{', pos)
+            if start == -1:
+                content.append(src[pos:])
+                break
+            if start > pos:
+                content.append(src[pos:start])
+            block, pos = _BlockParser(src, start + 2).parse()
+            content.append(block)
+        if not content:
+            raise DumboSyntaxError(src, 0, 'Empty program')
+        return dp.ProgramElement(content)
+
+
+class _BlockParser:
+    """Recursive descent over the tokens of one '{{ ... }}' block"""
+
+    def __init__(self, src: str, pos: int):
+        self.src = src
+        self.tokens = []
+        self.positions = []
+        self._tokenize(pos)
+        self.i = 0
+
+    def _tokenize(self, pos: int) -> None:
+        src = self.src
+        match = TOKEN_PATTERN.match
+        while True:
+            m = match(src, pos)
+            if m is None:
+                raise DumboSyntaxError(src, pos, 'Unexpected character' if pos < len(src) else 'Unclosed block')
+            kind = m.lastgroup
+            if kind != 'WS':
+                value = m.group()
+                if kind == 'NAME' and value in KEYWORDS:
+                    kind = 'OP'
+                self.tokens.append((kind, value))
+                self.positions.append(pos)
+                if value == '}}' and kind == 'OP':
+                    self.end = m.end()
+                    return
+            pos = m.end()
+
+    def error(self, message: str):
+        return DumboSyntaxError(self.src, self.positions[self.i], message)
+
+    def peek(self) -> str:
+        return self.tokens[self.i][1]
+
+    def next(self) -> tuple[str, str]:
+        token = self.tokens[self.i]
+        self.i += 1
+        return token
+
+    def expect(self, value: str) -> None:
+        kind, token = self.tokens[self.i]
+        if kind != 'OP' or token != value:
+            raise self.error(f"Expected '{value}', got '{token}'")
+        self.i += 1
+
+    def is_name(self) -> bool:
+        """Like Lark's contextual lexer, keywords are names wherever the keyword itself can't appear"""
+        kind, token = self.tokens[self.i]
+        return kind == 'NAME' or kind == 'OP' and token in KEYWORDS
+
+    def parse(self) -> tuple[dp.ExpressionsListElement, int]:
+        expressions = self.expressions_list('}}')
+        self.expect('}}')
+        return expressions, self.end
+
+    def expressions_list(self, end: str) -> dp.ExpressionsListElement:
+        expressions = []
+        while True:
+            expressions.append(self.expression())
+            self.expect(';')
+            if self.tokens[self.i] == ('OP', end):
+                return dp.ExpressionsListElement(expressions)
+
+    def expression(self) -> dp.ExpressionElement:
+        kind, token = self.tokens[self.i]
+        if kind == 'NAME' or kind == 'OP' and token in KEYWORDS and token not in STATEMENT_KEYWORDS:
+            variable = self.variable()
+            self.expect(':=')
+            value = self.string_list() if self.is_string_list() else self.string_expression()
+            return dp.AssignElement(variable, value)
+        self.i += 1
+        if token == 'print':
+            return dp.PrintElement(self.string_expression())
+        if token == 'for':
+            variable = self.variable()
+            self.expect('in')
+            if self.is_string_list():
+                iterator = self.string_list()
+            else:
+                iterator = self.call() if self.is_call() else self.variable()
+            self.expect('do')
+            expressions = self.expressions_list('endfor')
+            self.expect('endfor')
+            return dp.ForElement(variable, iterator, expressions)
+        if token == 'include':
+            return dp.IncludeElement(self.string())
+        if token == 'if':
+            condition = self.boolean_expression()
+            self.expect('do')
+            expressions = self.expressions_list('endif')
+            self.expect('endif')
+            return dp.IfElement(condition, expressions)
+        self.i -= 1
+        raise self.error(f"Unexpected '{token}'")
+
+    def is_string_list(self) -> bool:
+        return self.peek() == '(' and self.tokens[self.i + 1][0] == 'STRING'
+
+    def string_list(self) -> list[str]:
+        self.expect('(')
+        strings = [self.string()]
+        while self.peek() == ',':
+            self.i += 1
+            strings.append(self.string())
+        self.expect(')')
+        return strings
+
+    def string(self) -> str:
+        kind, token = self.next()
+        if kind != 'STRING':
+            self.i -= 1
+            raise self.error(f"Expected a string, got '{token}'")
+        return token[1:-1].replace('\\n', '\n').replace('\\t', '\t')
+
+    def variable(self) -> dp.VariableElement:
+        if not self.is_name():
+            raise self.error(f"Expected a variable, got '{self.peek()}'")
+        return dp.VariableElement(self.next()[1])
+
+    def string_expression(self) -> Union[dp.SEElement, dp.AEElement, dp.BEElement, dp.VariableElement,
+                                         str, int, bool]:
+        if self.tokens[self.i][0] == 'STRING':
+            left = self.string()
+        else:
+            left = self.boolean_or_arithmetic_expression()
+        if self.peek() == '.':
+            self.i += 1
+            return dp.SEElement([left, self.string_expression()])
+        return left
+
+    def boolean_or_arithmetic_expression(self):
+        if self.peek() in ('true', 'false'):
+            return self.boolean_expression()
+        left = self.arithmetic_expression()
+        if self.peek() in COMP_OPS:
+            return self.logical(self.comparison(left))
+        return left
+
+    def boolean_expression(self) -> Union[dp.BEElement, bool]:
+        token = self.peek()
+        if token == 'true' or token == 'false':
+            self.i += 1
+            left = token == 'true'
+        else:
+            left = self.comparison(self.arithmetic_expression())
+        return self.logical(left)
+
+    def comparison(self, left) -> dp.BEElement:
+        kind, op = self.next()
+        if op not in COMP_OPS or kind != 'OP':
+            self.i -= 1
+            raise self.error(f"Expected a comparison, got '{op}'")
+        return dp.BEElement(left, op, self.arithmetic_expression())
+
+    def logical(self, left) -> Union[dp.BEElement, bool]:
+        if self.peek() in LOG_OPS:
+            op = self.next()[1]
+            return dp.BEElement(left, op, self.boolean_expression())
+        return left
+
+    def arithmetic_expression(self) -> Union[dp.AEElement, dp.VariableElement, int]:
+        left = self.product()
+        if self.peek() in ADD_OPS:
+            op = self.next()[1]
+            return dp.AEElement(left, op, self.product())
+        return left
+
+    def product(self) -> Union[dp.AEElement, dp.VariableElement, int]:
+        left = self.factor()
+        if self.peek() in MULL_OPS:
+            op = self.next()[1]
+            return dp.AEElement(left, op, self.factor())
+        return left
+
+    def is_call(self) -> bool:
+        return self.is_name() and self.tokens[self.i + 1] == ('OP', '(')
+
+    def call(self) -> dp.CallElement:
+        position = self.i
+        name = self.next()[1]
+        self.expect('(')
+        arguments = [self.argument()]
+        while self.peek() == ',':
+            self.i += 1
+            arguments.append(self.argument())
+        self.expect(')')
+        try:
+            check_call(name, len(arguments))
+        except FunctionCallError as e:
+            self.i = position
+            raise self.error(str(e))
+        return dp.CallElement(name, arguments)
+
+    def argument(self):
+        return self.string_list() if self.is_string_list() else self.string_expression()
+
+    def factor(self) -> Union[dp.AEElement, dp.VariableElement, dp.CallElement, int]:
+        if self.is_name():
+            return self.call() if self.is_call() else self.variable()
+        kind, token = self.next()
+        if kind == 'INT':
+            return int(token)
+        if token == '(' and kind == 'OP':
+            expression = self.arithmetic_expression()
+            self.expect(')')
+            return expression
+        self.i -= 1
+        raise self.error(f"Unexpected '{token}'")
+
+
+descent_parser = DescentParser()
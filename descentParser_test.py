@@ -0,0 +1,50 @@
+import unittest
+
+import dumboParser as dp
+import dumboParser_test
+import dumbo_test
+from descentParser import DumboSyntaxError
+
+
+class DescentParserTest(dumboParser_test.DumboParserTest):
+    backend = 'descent'
+
+    def test_lark_parity(self) -> None:
+        src_list = ["{{print true and false or 1 < 2 and 2 > 1 and 42 = 42;}}",
+                    "{{print 'a' . true and false . (1 + 2) * 3 . x != 4;}}",
+                    "{{print ((42 + 8)/a - 2) * 2;}}", "a}}b{{print '}}';}}c", "{{print 'it\\'s';}}",
+                    "{{x := (1); y := ('a'); print (true);}}", "{{for in in in do print in; endfor;}}",
+                    "{{print join(l, ', ') . len(l) + 1; for i in range(1, len(l)) do print i; endfor; len := 2;}}",
+                    "{{include 'head.dumbo'; for i in l do include 'dir/row.dumbo'; endfor;}}"]
+        for name in ['exemples/template1.dumbo', 'exemples/template2.dumbo', 'test.dumbo']:
+            with open(name) as src_file:
+                src_list.append(src_file.read())
+        for src in src_list:
+            self.assertEqual(dump(self.parse(src)), dump(dp.parse(src, 'lark')))
+
+    def test_syntaxError(self) -> None:
+        for src in ["", "{{}}", "{{print 1 + 2 + 3;}}", "{{print 1 < 2 < 3;}}", "{{if x do print 1; endif;}}",
+                    "{{print 1", "{{print 1 and true;}}", "{{x := ('a', 1);}}", "{{print 'a'}}"]:
+            with self.assertRaises(DumboSyntaxError):
+                self.parse(src)
+
+    def test_errorPosition(self) -> None:
+        with self.assertRaises(DumboSyntaxError) as cm:
+            self.parse("line\n{{print ;}}")
+        self.assertEqual((cm.exception.line, cm.exception.column), (2, 9))
+
+
+class DescentInterpreterTest(dumbo_test.InterpreterTest):
+    backend = 'descent'
+
+
+def dump(element):
+    if type(element) is list:
+        return [dump(e) for e in element]
+    if isinstance(element, dp.DumboElement):
+        return type(element).__name__, {k: dump(getattr(element, k)) for k in type(element).__slots__}
+    return type(element).__name__, element
+
+
+if __name__ == '__main__':
+    unittest.main()
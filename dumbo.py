@@ -1,19 +1,27 @@
 from __future__ import annotations
-from typing import Union
+from typing import Union, Iterator, AsyncIterator, TextIO, Optional, Mapping
+from types import MappingProxyType
+import sys
 import dumboParser as dp
+from functions import FUNCTIONS
+from sources import ListSource, RangeSource
+from includes import registry, resolve, check_cycle
 from visitors import Visitor
-from data import data_parser
 from collections import ChainMap
-import argh
 
 
 class Scope(ChainMap):
     """Variant of ChainMap that allows direct updates to inner scopes
-    source : https://docs.python.org/3/library/collections.html#collections.ChainMap"""
+    source : https://docs.python.org/3/library/collections.html#collections.ChainMap
+
+    Read-only maps (MappingProxyType) are never written: an update of one of their keys is stored in the map
+    above, which shadows it."""
 
     def __setitem__(self, key, value):
-        for mapping in self.maps:
+        for i, mapping in enumerate(self.maps):
             if key in mapping:
+                if type(mapping) is MappingProxyType:
+                    mapping = self.maps[max(i - 1, 0)]
                 mapping[key] = value
                 return
         self.maps[0][key] = value
@@ -26,6 +34,11 @@ class Scope(ChainMap):
         raise KeyError(key)
 
 
+def freeze(data: Mapping) -> MappingProxyType:
+    """Immutable snapshot of data, to be loaded once and shared by any number of renders, threads included"""
+    return data if type(data) is MappingProxyType else MappingProxyType(dict(data))
+
+
 class BadReferenceError(Exception):
     def __init__(self, variable_name=''):
         super().__init__(f"Variable '{variable_name}' used before assignment")
@@ -36,41 +49,199 @@ class NotIterableError(Exception):
         super().__init__(f"Variable '{variable_name}' is not iterable")
 
 
+ARITHMETIC_OPERATIONS = {
+    '+': lambda x, y: x + y,
+    '-': lambda x, y: x - y,
+    '*': lambda x, y: x * y,
+    '/': lambda x, y: x // y
+}
+
+BOOLEAN_OPERATIONS = {
+    'and': lambda x, y: x and y,
+    'or': lambda x, y: x or y,
+    '<': lambda x, y: x < y,
+    '>': lambda x, y: x > y,
+    '=': lambda x, y: x == y,
+    '!=': lambda x, y: x != y
+}
+
+# printed form of each value type, shared by every engine
+REPLACEMENTS = {
+    bool: lambda x: 'true' if x else 'false',
+    list: lambda x: str(x).replace('[', '(').replace(']', ')'),
+    RangeSource: lambda x: str(list(x.range)).replace('[', '(').replace(']', ')'),
+    int: lambda x: str(x),
+    str: lambda x: x
+}
+
+DEFAULT_BUFFER_SIZE = 8192
+DEFAULT_YIELD_EVERY = 1000
+
+
 class Interpreter(Visitor):
+    """Renders a program into `result`, or streams it to `sink` (any object with a `write(str)` method)
+    in chunks of about `buffer_size` characters. Output streamed to a given sink isn't kept, `verbose` alone
+    prints to stdout and still keeps the whole output in `result`.
+    The given scope is only read, assignments go to a copy-on-write layer owned by the interpreter.
+    Includes are resolved from `path`, the file of the program, and taken from the shared template registry, which
+    checks their file once per interpreter."""
 
-    def __init__(self, scope, verbose=False):
-        self.scope = Scope(scope)
-        self.result = ''
+    def __init__(self, scope: Mapping, verbose=False, sink: Optional[TextIO] = None,
+                 buffer_size=DEFAULT_BUFFER_SIZE, path: Optional[str] = None):
+        self.scope = Scope({}, scope if type(scope) is MappingProxyType else MappingProxyType(scope))
+        self.including = [resolve(path)] if path else []
+        self._includes = {}
         self.verbose = verbose
-        self.replacements = {
-            bool: lambda x: 'true' if x else 'false',
-            list: lambda x: str(x).replace('[', '(').replace(']', ')'),
-            int: lambda x: str(x),
-            str: lambda x: x
-        }
+        self.sink = sys.stdout if verbose and sink is None else sink
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._flushed = [] if verbose and sink is None else None
+        self._buffered = 0
+        self.replacements = REPLACEMENTS
 
     def visit_print_element(self, element: dp.PrintElement) -> None:
         tmp = element.str_expression
         if type(element.str_expression) not in dp.primitives:
             tmp = element.str_expression.accept(self)
-        result = self.replacements[type(tmp)](tmp)
-        self.result += result
-        if self.verbose:
-            print(result, end='')
+        self.write(self.replacements[type(tmp)](tmp))
 
-    def visit_for_element(self, element: dp.ForElement) -> None:
-        if type(element.iterator) is dp.VariableElement:
-            iterator = element.iterator.accept(self)
-        else:
+    @property
+    def result(self) -> str:
+        """Whole output, or only the output not yet flushed when a sink was given"""
+        if self._flushed:
+            return ''.join(self._flushed) + ''.join(self._buffer)
+        return ''.join(self._buffer)
+
+    @property
+    def pending(self) -> str:
+        """Output not yet flushed to the sink"""
+        return ''.join(self._buffer)
+
+    def write(self, text: str) -> None:
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self.sink is not None and self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.sink is not None and self._buffer:
+            chunk = self._take()
+            if self._flushed is not None:
+                self._flushed.append(chunk)
+            self.sink.write(chunk)
+
+    def _take(self) -> str:
+        chunk = ''.join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        return chunk
+
+    def _iterator(self, element: dp.ForElement) -> Union[list[str], ListSource]:
+        if type(element.iterator) is list:
             iterator = element.iterator
-        if type(iterator) is not list:
+        else:
+            iterator = element.iterator.accept(self)
+        if type(iterator) is not list and not isinstance(iterator, ListSource):
             raise NotIterableError(element.iterator.name)
+        return iterator
+
+    def _condition(self, element: dp.IfElement) -> bool:
+        return element.boolean_expression if type(element.boolean_expression) is bool \
+            else element.boolean_expression.accept(self)
+
+    def iter_render(self, program: dp.ProgramElement) -> Iterator[str]:
+        """Renders program lazily, yielding chunks of about `buffer_size` characters, to be used without sink"""
+        for _ in self._walk(program):
+            if self._buffered >= self.buffer_size:
+                yield self._take()
+        if self._buffer:
+            yield self._take()
+
+    async def aiter_render(self, program: dp.ProgramElement, yield_every=DEFAULT_YIELD_EVERY) -> AsyncIterator[str]:
+        """Asynchronous iter_render, gives control back to the event loop after every chunk and every
+        `yield_every` statements or loop iterations. Cancelling the consuming task stops the render there."""
+        import asyncio
+        steps = 0
+        for _ in self._walk(program):
+            steps += 1
+            if self._buffered >= self.buffer_size:
+                yield self._take()
+            elif steps < yield_every:
+                continue
+            steps = 0
+            await asyncio.sleep(0)
+        if self._buffer:
+            yield self._take()
+
+    def _walk(self, element: dp.DumboElement) -> Iterator[None]:
+        """Executes statements like accept() but gives control back after each output and loop iteration"""
+        if type(element) is dp.ProgramElement:
+            for el in element.content:
+                if type(el) is str:
+                    self.write(el)
+                    yield
+                else:
+                    yield from self._walk(el)
+        elif type(element) is dp.ExpressionsListElement:
+            for exp in element.expressions_list:
+                yield from self._walk(exp)
+        elif isinstance(element, dp.ForElement):
+            for string in self._iterator(element):
+                self.scope[element.iterator_var.name] = string
+                self.scope = self.scope.new_child()
+                yield from self._walk(element.expressions_list)
+                self.scope = self.scope.parents
+                yield
+        elif type(element) is dp.IfElement:
+            if self._condition(element):
+                self.scope = self.scope.new_child()
+                yield from self._walk(element.expressions_list)
+                self.scope = self.scope.parents
+        elif type(element) is dp.IncludeElement:
+            path, program = self._included(element)
+            self.including.append(path)
+            yield from self._walk(program)
+            self.including.pop()
+        else:
+            element.accept(self)
+            yield
+
+    def visit_for_element(self, element: dp.ForElement) -> None:
+        for string in self._iterator(element):
+            self.scope[element.iterator_var.name] = string
+            self.scope = self.scope.new_child()
+            element.expressions_list.accept(self)
+            self.scope = self.scope.parents
+
+    def visit_list_for_element(self, element: dp.ListForElement) -> None:
+        iterator = element.iterator if type(element.iterator) is list else element.iterator.accept(self)
         for string in iterator:
             self.scope[element.iterator_var.name] = string
             self.scope = self.scope.new_child()
             element.expressions_list.accept(self)
             self.scope = self.scope.parents
 
+    def visit_str_print_element(self, element: dp.StrPrintElement) -> None:
+        self.write(element.str_expression.accept(self))
+
+    def visit_str_se_element(self, element: dp.StrSEElement) -> str:
+        return ''.join([e if type(e) is str else e.accept(self) for e in element.subExpressions])
+
+    def visit_int_ae_element(self, element: dp.IntAEElement) -> int:
+        left = element.left if type(element.left) is int else element.left.accept(self)
+        right = element.right if type(element.right) is int else element.right.accept(self)
+        return ARITHMETIC_OPERATIONS[element.op](left, right)
+
+    def visit_int_be_element(self, element: dp.IntBEElement) -> bool:
+        left = element.left if type(element.left) is int else element.left.accept(self)
+        right = element.right if type(element.right) is int else element.right.accept(self)
+        return BOOLEAN_OPERATIONS[element.op](left, right)
+
+    def visit_bool_be_element(self, element: dp.BoolBEElement) -> bool:
+        left = element.left if type(element.left) is bool else element.left.accept(self)
+        right = element.right if type(element.right) is bool else element.right.accept(self)
+        return BOOLEAN_OPERATIONS[element.op](left, right)
+
     def visit_se_element(self, element: dp.SEElement) -> str:
         res = ''
         for e in element.subExpressions:
@@ -80,36 +251,22 @@ class Interpreter(Visitor):
         return res
 
     def visit_ae_element(self, element: dp.AEElement) -> int:
-        operations = {
-            '+': lambda x, y: x + y,
-            '-': lambda x, y: x - y,
-            '*': lambda x, y: x * y,
-            '/': lambda x, y: x // y
-        }
         left = element.left
         right = element.right
         if type(left) is not int:
             left = left.accept(self)
         if type(right) is not int:
             right = right.accept(self)
-        return operations[element.op](left, right)
+        return ARITHMETIC_OPERATIONS[element.op](left, right)
 
     def visit_be_element(self, element: dp.BEElement) -> bool:
-        operations = {
-            'and': lambda x, y: x and y,
-            'or': lambda x, y: x or y,
-            '<': lambda x, y: x < y,
-            '>': lambda x, y: x > y,
-            '=': lambda x, y: x == y,
-            '!=': lambda x, y: x != y
-        }
         left = element.left
         right = element.right
-        if type(left) not in [bool, int]:
+        if type(left) not in (bool, int):
             left = left.accept(self)
-        if type(right) not in [bool, int]:
+        if type(right) not in (bool, int):
             right = right.accept(self)
-        return operations[element.op](left, right)
+        return BOOLEAN_OPERATIONS[element.op](left, right)
 
     def visit_expressions_list_element(self, element: dp.ExpressionsListElement) -> None:
         for exp in element.expressions_list:
@@ -124,11 +281,10 @@ class Interpreter(Visitor):
     def visit_program_element(self, element: dp.ProgramElement) -> None:
         for el in element.content:
             if type(el) is str:
-                self.result += el
-                if self.verbose:
-                    print(el, end='')
+                self.write(el)
             else:
                 el.accept(self)
+        self.flush()
         if self.verbose:
             print()
 
@@ -138,25 +294,97 @@ class Interpreter(Visitor):
         raise BadReferenceError(element.name)
 
     def visit_if_element(self, element: dp.IfElement) -> None:
-        condition = element.boolean_expression if type(element.boolean_expression) is bool \
-            else element.boolean_expression.accept(self)
-
-        if condition:
+        if self._condition(element):
             self.scope = self.scope.new_child()
             element.expressions_list.accept(self)
             self.scope = self.scope.parents
 
+    def visit_call_element(self, element: dp.CallElement) -> Union[int, str, list]:
+        arguments = [a if type(a) in dp.primitives else a.accept(self) for a in element.arguments]
+        return FUNCTIONS[element.name][0](*arguments)
+
+    def _included(self, element: dp.IncludeElement) -> tuple[str, dp.ProgramElement]:
+        # the registry checks the file once per interpreter, not at every iteration of a loop
+        key = (self.including[-1] if self.including else None, element.path)
+        included = self._includes.get(key)
+        if included is None:
+            path = resolve(element.path, key[0])
+            included = self._includes[key] = path, registry.get(path)
+        check_cycle(included[0], self.including)
+        return included
+
+    def visit_include_element(self, element: dp.IncludeElement) -> None:
+        path, program = self._included(element)
+        self.including.append(path)
+        for el in program.content:
+            if type(el) is str:
+                self.write(el)
+            else:
+                el.accept(self)
+        self.including.pop()
+
 
-def main(data_file_name, src_file_name):
-    with open(data_file_name) as data_file:
-        data = data_file.read()
-    scope = data_parser.parse(data)
+def main(data_file_name, src_file_name, cache_dir=None, parser='lark', optimize=False, typecheck=False,
+         profile=False, profile_json=None, lines='', zero_copy=False):
+    """Renders the template with the data file, or a binary snapshot of it, to stdout. --typecheck reports type
+    errors before rendering and specializes the program for the data types. --profile prints where the render
+    spent its time to stderr, --profile-json saves these measures as JSON. --lines name=path,... binds each name
+    to the lines of a text file, read lazily by the for loops. --zero-copy memory maps the template and writes its
+    literal text straight from the mapping, the template is then parsed by the descent parser and neither
+    optimized nor type checked."""
+    from sources import parse_bindings
+    sources = parse_bindings(lines.split(',') if lines else [])
+    if profile or profile_json:
+        from profiler import profile_render
+        result = profile_render(data_file_name, src_file_name, optimize, sources, verbose=True, sink=sys.stdout)
+        print(result.report(), file=sys.stderr)
+        if profile_json:
+            result.dump(profile_json)
+        return
+    from snapshot import is_snapshot, load_data
+    if zero_copy:
+        from zerocopy import MappedTemplate
+        scope = load_data(data_file_name)
+        with MappedTemplate.open(src_file_name) as template:
+            template.render_to(sys.stdout, dict(scope, **sources) if sources else scope)
+        print()
+        return
     with open(src_file_name) as src_file:
         src = src_file.read()
-    program = dp.dumbo_parser.parse(src)
-    interpreter = Interpreter(scope, verbose=True)
+    if cache_dir is None:
+        scope = load_data(data_file_name)
+        program = dp.parse(src, parser)
+    else:
+        from cache import ParseCache
+        cache = ParseCache(cache_dir, backend=parser)
+        if is_snapshot(data_file_name):
+            scope = load_data(data_file_name)
+        else:
+            with open(data_file_name) as data_file:
+                scope = cache.load_data(data_file.read())
+        program = cache.load_program(src)
+    if sources:
+        scope = dict(scope, **sources)
+    if optimize:
+        from optimizer import optimize as optimize_program
+        program, removed = optimize_program(program)
+        print(f'optimizer removed {removed} nodes', file=sys.stderr)
+    if typecheck:
+        from typecheck import typecheck as typecheck_program
+        program = typecheck_program(program, scope, src_file_name)
+    interpreter = Interpreter(scope, verbose=True, sink=sys.stdout, path=src_file_name)
     program.accept(interpreter)
 
 
+# command: module defining it, imported only when the command is used
+SUBCOMMANDS = {'batch': 'batch', 'watch': 'watch', 'serve': 'server', 'snapshot': 'snapshot', 'restore': 'snapshot'}
+
+
 if __name__ == '__main__':
-    argh.dispatch_command(main)
+    import argh
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        import importlib
+        command = getattr(importlib.import_module(SUBCOMMANDS[sys.argv[1]]), sys.argv[1])
+        argh.dispatch_command(command, argv=sys.argv[2:])
+    else:
+        argh.dispatch_command(main)
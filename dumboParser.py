@@ -1,62 +1,87 @@
 from __future__ import annotations
-from typing import Union
-from abc import ABC, abstractmethod
-from lark import Lark, Transformer
+from typing import Callable, Union
+import os
+import sys
+import tempfile
+import threading
 from visitors import Visitor
+from functions import check_call
 
+GRAMMAR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'grammar')
+PARSER_CACHE_DIR = os.path.join(GRAMMAR_DIR, '__larkcache__')
 
-class DumboElement(ABC):
 
-    @abstractmethod
-    def accept(self, visitor: Visitor) -> Union[str, bool, int, None]:
-        pass
+class DumboElement:
+    """Base of the AST nodes. Nodes declare __slots__ instead of carrying a __dict__ to keep resident
+    templates small, operators and names are interned so equal ones share a single string.
+    DumboElement and ExpressionElement are never instantiated, each concrete node defines accept. It is only
+    declared here, an abstract method would need ABCMeta and slow down every isinstance check on nodes."""
+    __slots__ = ()
 
+    accept: Callable[[Visitor], Union[str, bool, int, None]]
 
-class ExpressionElement(DumboElement, ABC):
-    pass
+
+class ExpressionElement(DumboElement):
+    __slots__ = ()
 
 
 class IfElement(ExpressionElement):
+    __slots__ = ('boolean_expression', 'expressions_list')
 
     def __init__(self, boolean_expression: Union[BEElement, bool], expressions_list: ExpressionsListElement):
         self.boolean_expression = boolean_expression
         self.expressions_list = expressions_list
 
     def accept(self, visitor: Visitor) -> None:
-        visitor.visit_if_element(self)
+        return visitor.visit_if_element(self)
 
 
 class ExpressionsListElement(ExpressionElement):
+    __slots__ = ('expressions_list',)
 
     def __init__(self, expressions_list: list[ExpressionElement]):
         self.expressions_list = expressions_list
 
     def accept(self, visitor: Visitor) -> None:
-        visitor.visit_expressions_list_element(self)
+        return visitor.visit_expressions_list_element(self)
 
 
 class PrintElement(ExpressionElement):
+    __slots__ = ('str_expression',)
 
     def __init__(self, str_expression: Union[SEElement, AEElement, BEElement, bool, int, str]):
         self.str_expression = str_expression
 
     def accept(self, visitor: Visitor) -> None:
-        visitor.visit_print_element(self)
+        return visitor.visit_print_element(self)
 
 
 class ForElement(ExpressionElement):
+    __slots__ = ('iterator_var', 'iterator', 'expressions_list')
 
-    def __init__(self, iterator_var: VariableElement, iterator: Union[VariableElement, list[str]],
+    def __init__(self, iterator_var: VariableElement, iterator: Union[VariableElement, CallElement, list[str]],
                  expressions_list: ExpressionsListElement):
         self.iterator_var = iterator_var
         self.iterator = iterator
         self.expressions_list = expressions_list
 
     def accept(self, visitor: Visitor) -> None:
-        visitor.visit_for_element(self)
+        return visitor.visit_for_element(self)
+
+
+class IncludeElement(ExpressionElement):
+    """Renders the template at path, relative to the including template, in the current scope"""
+    __slots__ = ('path',)
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def accept(self, visitor: Visitor) -> None:
+        return visitor.visit_include_element(self)
 
 
 class SEElement(DumboElement):
+    __slots__ = ('subExpressions',)
 
     def __init__(self, sub_expressions: list[Union[str, AEElement, BEElement, SEElement]]):
         self.subExpressions = sub_expressions
@@ -66,58 +91,124 @@ class SEElement(DumboElement):
 
 
 class AEElement(DumboElement):
+    __slots__ = ('left', 'right', 'op')
 
     def __init__(self, left: Union[int, VariableElement, AEElement], op: str,
                  right: Union[int, VariableElement, AEElement]):
         self.left = left
         self.right = right
-        self.op = op
+        self.op = sys.intern(op)
 
     def accept(self, visitor: Visitor) -> int:
         return visitor.visit_ae_element(self)
 
 
 class BEElement(DumboElement):
+    __slots__ = ('left', 'right', 'op')
 
     def __init__(self, left: Union[BEElement, AEElement, bool], op: str,
                  right: Union[BEElement, AEElement, bool]):
         self.left = left
         self.right = right
-        self.op = op
+        self.op = sys.intern(op)
 
     def accept(self, visitor: Visitor) -> bool:
         return visitor.visit_be_element(self)
 
 
 class AssignElement(ExpressionElement):
+    __slots__ = ('variable', 'value')
 
     def __init__(self, variable: VariableElement, value: Union[SEElement, AEElement, BEElement, list[str], int, str]):
         self.variable = variable
         self.value = value
 
     def accept(self, visitor: Visitor) -> None:
-        visitor.visit_assign_element(self)
+        return visitor.visit_assign_element(self)
 
 
 class VariableElement(DumboElement):
+    __slots__ = ('name',)
 
     def __init__(self, name: str):
-        self.name = name
+        self.name = sys.intern(name)
 
     def accept(self, visitor: Visitor) -> Union[int, str, bool, list[str]]:
         return visitor.visit_variable_element(self)
 
 
+class CallElement(DumboElement):
+    __slots__ = ('name', 'arguments')
+
+    def __init__(self, name: str, arguments: list[Union[SEElement, AEElement, BEElement, VariableElement, CallElement,
+                                                        list[str], int, str, bool]]):
+        self.name = sys.intern(name)
+        self.arguments = arguments
+
+    def accept(self, visitor: Visitor) -> Union[int, str, list]:
+        return visitor.visit_call_element(self)
+
+
 class ProgramElement(DumboElement):
+    __slots__ = ('content',)
 
     def __init__(self, content: list[Union[str, ExpressionsListElement]]):
         self.content = content
 
     def accept(self, visitor: Visitor) -> None:
-        visitor.visit_program_element(self)
+        return visitor.visit_program_element(self)
+
+
+class IntAEElement(AEElement):
+    """Arithmetic expression whose operands are known to be integers"""
+    __slots__ = ()
+
+    def accept(self, visitor: Visitor) -> int:
+        return visitor.visit_int_ae_element(self)
+
+
+class IntBEElement(BEElement):
+    """Comparison whose operands are known to be integers"""
+    __slots__ = ()
+
+    def accept(self, visitor: Visitor) -> bool:
+        return visitor.visit_int_be_element(self)
+
+
+class BoolBEElement(BEElement):
+    """'and' or 'or' whose operands are known to be booleans"""
+    __slots__ = ()
+
+    def accept(self, visitor: Visitor) -> bool:
+        return visitor.visit_bool_be_element(self)
+
+
+class StrSEElement(SEElement):
+    """Concatenation whose parts are known to be strings"""
+    __slots__ = ()
+
+    def accept(self, visitor: Visitor) -> str:
+        return visitor.visit_str_se_element(self)
+
+
+class StrPrintElement(PrintElement):
+    """Print of an expression known to be a string"""
+    __slots__ = ()
+
+    def accept(self, visitor: Visitor) -> None:
+        return visitor.visit_str_print_element(self)
 
 
-class DumboTransformer(Transformer):
+class ListForElement(ForElement):
+    """Loop over an iterator known to be a list"""
+    __slots__ = ()
+
+    def accept(self, visitor: Visitor) -> None:
+        return visitor.visit_list_for_element(self)
+
+
+class DumboTransformer:
+    """Lark callbacks building the AST, applied inline while parsing"""
 
     def program(self, items):
         return ProgramElement(items)
@@ -151,6 +242,9 @@ class DumboTransformer(Transformer):
     def assign(self, pair):
         return AssignElement(*pair)
 
+    def include_statement(self, path):
+        return IncludeElement(path[0])
+
     def string_list(self, string_list):
         return string_list
 
@@ -164,6 +258,11 @@ class DumboTransformer(Transformer):
         name = str(name[0])
         return VariableElement(name)
 
+    def call(self, items):
+        name = str(items[0])
+        check_call(name, len(items) - 1)
+        return CallElement(name, items[1:])
+
     def true(self, item):
         return True
 
@@ -176,7 +275,79 @@ class DumboTransformer(Transformer):
 
 primitives = [int, list, bool, str]
 
-with open('grammar/dumbo.lark', 'r') as f:
-    grammar = f.read()
 
-dumbo_parser = Lark(grammar, parser='lalr', transformer=DumboTransformer(), start='program')
+def read_grammar(file_name: str) -> str:
+    with open(os.path.join(GRAMMAR_DIR, file_name), 'r') as f:
+        return f.read()
+
+
+class LazyParser:
+    """Builds its LALR parser on first use, from a serialized parser in PARSER_CACHE_DIR when available.
+    Extra options are passed to Lark. The parser, transformer included, is written with Lark.save to a temporary
+    file moved into place, read back with Lark.load, and rebuilt when it can't be loaded."""
+
+    def __init__(self, grammar_file: str, transformer, start: str, **options):
+        self.grammar_file = grammar_file
+        self.transformer = transformer
+        self.start = start
+        self.options = options
+        self._parser = None
+        self._lock = threading.Lock()
+
+    @property
+    def grammar(self) -> str:
+        return read_grammar(self.grammar_file)
+
+    def cache_path(self, grammar: str) -> str:
+        import hashlib
+        from lark import __version__
+        options = sorted(self.options.items())
+        digest = hashlib.sha256(f'{__version__}:{self.start}:{options}:{grammar}'.encode()).hexdigest()[:16]
+        return os.path.join(PARSER_CACHE_DIR, f'{self.grammar_file}.{digest}.pickle')
+
+    def get(self):
+        if self._parser is None:
+            with self._lock:
+                if self._parser is None:
+                    self._parser = self._build()
+        return self._parser
+
+    def _build(self):
+        from lark import Lark
+        grammar = self.grammar
+        cache_path = self.cache_path(grammar)
+        try:
+            with open(cache_path, 'rb') as f:
+                return Lark.load(f)
+        except Exception:
+            pass  # missing, or truncated by an interrupted write: rebuilt and saved again
+        parser = Lark(grammar, parser='lalr', transformer=self.transformer, start=self.start, **self.options)
+        try:
+            os.makedirs(PARSER_CACHE_DIR, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=PARSER_CACHE_DIR, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    parser.save(f)
+                os.replace(tmp, cache_path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError:
+            pass
+        return parser
+
+    def parse(self, src: str):
+        return self.get().parse(src)
+
+
+dumbo_parser = LazyParser('dumbo.lark', DumboTransformer(), 'program')
+
+
+def parse(src: str, backend: str = 'lark') -> ProgramElement:
+    """Parses a template with the Lark grammar, or with the hand-written parser when backend is 'descent'"""
+    if backend == 'lark':
+        return dumbo_parser.parse(src)
+    if backend == 'descent':
+        from descentParser import descent_parser
+        return descent_parser.parse(src)
+    raise ValueError(f"Unknown parser backend '{backend}'")
@@ -1,24 +1,31 @@
+import os
+import tempfile
 import unittest
+from lark import Lark
 import dumboParser as dp
 
 
 class DumboParserTest(unittest.TestCase):
+    backend = 'lark'
+
+    def parse(self, src) -> dp.ProgramElement:
+        return dp.parse(src, self.backend)
 
     def test_program(self) -> None:
         src = "<test>{{ print 'Hello World!'; }}</test>"
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         self.assertIs(type(program), dp.ProgramElement)
         self.assertIs(type(program.content), list)
         self.assertEqual(len(program.content), 3)
 
     def test_txt(self) -> None:
         src = "<test>Hello World!</test>"
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         self.assertIs(type(program.content[0]), str)
 
     def test_expressionList(self) -> None:
         src = "{{print 'Hello World!';}}"
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         expr_list = program.content[0]
         self.assertIs(type(expr_list), dp.ExpressionsListElement)
         self.assertIs(type(expr_list.expressions_list), list)
@@ -28,7 +35,7 @@ class DumboParserTest(unittest.TestCase):
         src_list = ["{{print 'Hello World!';}}", "{{print 4;}}", "{{print true;}}", "{{print var;}}",
                     "{{print 12 + 5;}}", "{{print true or false;}}", "{{print 'Hello' . 'World';}}"]
         for src in src_list:
-            program = dp.dumbo_parser.parse(src)
+            program = self.parse(src)
             print_element = program.content[0].expressions_list[0]
             self.assertIs(type(print_element), dp.PrintElement)
             self.assertIn(type(print_element.str_expression), dp.primitives + [dp.SEElement, dp.AEElement,
@@ -36,7 +43,7 @@ class DumboParserTest(unittest.TestCase):
 
     def test_variableElement(self) -> None:
         src = "{{print var;}}"
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         var_element = program.content[0].expressions_list[0].str_expression
         self.assertIs(type(var_element), dp.VariableElement)
         self.assertEqual(var_element.name, "var")
@@ -47,7 +54,7 @@ class DumboParserTest(unittest.TestCase):
                     "{{var := ('Hello', 'World');}}"]
 
         for src in src_list:
-            program = dp.dumbo_parser.parse(src)
+            program = self.parse(src)
             assign = program.content[0].expressions_list[0]
             self.assertIs(type(assign), dp.AssignElement)
             self.assertIs(type(assign.variable), dp.VariableElement)
@@ -58,7 +65,7 @@ class DumboParserTest(unittest.TestCase):
         src_list = ["{{if true do print i; endif;}}",
                     "{{if true and true  do print i; endif;}}"]
         for src in src_list:
-            program = dp.dumbo_parser.parse(src)
+            program = self.parse(src)
             if_element = program.content[0].expressions_list[0]
             self.assertIs(type(if_element), dp.IfElement)
             self.assertIn(type(if_element.boolean_expression), [dp.VariableElement, dp.BEElement, bool])
@@ -66,7 +73,7 @@ class DumboParserTest(unittest.TestCase):
 
     def test_forElement(self) -> None:
         src = "{{for i in list do print i; endfor;}}"
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         for_element = program.content[0].expressions_list[0]
         self.assertIs(type(for_element), dp.ForElement)
         self.assertIs(type(for_element.iterator_var), dp.VariableElement)
@@ -74,49 +81,74 @@ class DumboParserTest(unittest.TestCase):
         self.assertIs(type(for_element.expressions_list), dp.ExpressionsListElement)
 
         src = "{{for i in ('Hello', 'World!') do print i; endfor;}}"
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         for_element = program.content[0].expressions_list[0]
         self.assertIs(type(for_element.iterator), list)
 
+    def test_callElement(self) -> None:
+        src = "{{print len(list) + 1; for i in range(1, 3) do print join(('a', 'b'), i . ', '); endfor;}}"
+        program = self.parse(src)
+        add, for_element = program.content[0].expressions_list
+        self.assertIs(type(add.str_expression.left), dp.CallElement)
+        self.assertEqual(add.str_expression.left.name, 'len')
+        self.assertIs(type(add.str_expression.left.arguments[0]), dp.VariableElement)
+        self.assertIs(type(for_element.iterator), dp.CallElement)
+        self.assertEqual(for_element.iterator.arguments, [1, 3])
+        join = for_element.expressions_list.expressions_list[0].str_expression
+        self.assertEqual(join.arguments[0], ['a', 'b'])
+        self.assertIs(type(join.arguments[1]), dp.SEElement)
+
+    def test_includeElement(self) -> None:
+        program = self.parse("{{include 'head.dumbo'; for i in l do include 'partials/row.dumbo'; endfor;}}")
+        include, for_element = program.content[0].expressions_list
+        self.assertIs(type(include), dp.IncludeElement)
+        self.assertEqual(include.path, 'head.dumbo')
+        self.assertEqual(for_element.expressions_list.expressions_list[0].path, 'partials/row.dumbo')
+
+    def test_callError(self) -> None:
+        for src in ["{{print foo(1);}}", "{{print len(1, 2);}}", "{{print slice(list);}}"]:
+            with self.assertRaises(SyntaxError):
+                self.parse(src)
+
     def test_booleanExpressionElement(self) -> None:
         src = "{{print true or false and 42 < 42 or 42 > 42 and 42 = 42 and 42 != 42;}}"
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         bool_exp_element = program.content[0].expressions_list[0].str_expression
         self.assertIs(type(bool_exp_element), dp.BEElement)
 
     def test_arithmeticExpressionElement(self) -> None:
         src = "{{print 45 - 16 * (7 / 23);}}"
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         arithmetic_exp_element = program.content[0].expressions_list[0].str_expression
         self.assertIs(type(arithmetic_exp_element), dp.AEElement)
 
     def test_stringExpressionElement(self) -> None:
         src = "{{print 'hello'.'world'.true.42;}}"
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         string_exp_element = program.content[0].expressions_list[0].str_expression
         self.assertIs(type(string_exp_element), dp.SEElement)
 
     def test_intElement(self) -> None:
         src = "{{print 42;}}"
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         int_element = program.content[0].expressions_list[0].str_expression
         self.assertIs(type(int_element), int)
 
     def test_strElement(self) -> None:
         src = "{{print 'Hello World!';}}"
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         str_element = program.content[0].expressions_list[0].str_expression
         self.assertIs(type(str_element), str)
 
     def test_boolElement(self) -> None:
         src = "{{print true;}}"
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         bool_element = program.content[0].expressions_list[0].str_expression
         self.assertIs(type(bool_element), bool)
 
     def test_listElement(self) -> None:
         src = "{{var := ('Hello', 'World!');}}"
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         list_element = program.content[0].expressions_list[0].value
         self.assertIs(type(list_element), list)
 
@@ -124,7 +156,7 @@ class DumboParserTest(unittest.TestCase):
         with open('test.dumbo') as src_file:
             src = src_file.read()
 
-        program = dp.dumbo_parser.parse(src)
+        program = self.parse(src)
         self.assertIs(type(program), dp.ProgramElement)
         self.assertEqual(len(program.content), 11)
         for element in program.content[0:11:2]:
@@ -153,6 +185,47 @@ class DumboParserTest(unittest.TestCase):
         self.assertIs(type(for_instructions[1]), dp.PrintElement)
         self.assertIs(type(for_instructions[2]), dp.AssignElement)
 
+    def test_compactNodes(self) -> None:
+        program = self.parse("{{x := 1 + 2; y := 3 + x; if x < y do print x; endif;}}")
+        first, second, if_element = program.content[0].expressions_list
+        self.assertFalse(hasattr(first, '__dict__'))
+        self.assertIs(first.value.op, second.value.op)
+        self.assertIs(first.variable.name, if_element.boolean_expression.left.name)
+
+    def test_accept(self) -> None:
+        classes = dp.DumboElement.__subclasses__()
+        for cls in classes:
+            classes.extend(cls.__subclasses__())
+            if cls is not dp.ExpressionElement:
+                self.assertTrue(callable(getattr(cls, 'accept', None)), cls.__name__)
+        self.assertFalse(hasattr(dp.DumboElement, 'accept'))
+
+    def test_lazyParser(self) -> None:
+        parser = dp.LazyParser('dumbo.lark', dp.DumboTransformer(), 'program')
+        self.assertIsNone(parser._parser)
+        self.assertIs(type(parser.parse('text')), dp.ProgramElement)
+        self.assertIsNotNone(parser._parser)
+        self.assertTrue(parser.cache_path(parser.grammar).startswith(dp.PARSER_CACHE_DIR))
+
+    def test_lazyParserCache(self) -> None:
+        cache_dir = dp.PARSER_CACHE_DIR
+        with tempfile.TemporaryDirectory() as dp.PARSER_CACHE_DIR:
+            try:
+                parser = dp.LazyParser('dumbo.lark', dp.DumboTransformer(), 'program')
+                self.assertIs(type(parser.parse('text')), dp.ProgramElement)
+                cache_path = parser.cache_path(parser.grammar)
+                with open(cache_path, 'rb') as f:
+                    content = f.read()
+                with open(cache_path, 'wb') as f:
+                    f.write(content[:len(content) // 2])
+                parser = dp.LazyParser('dumbo.lark', dp.DumboTransformer(), 'program')
+                self.assertIs(type(parser.parse('{{print 1;}}')), dp.ProgramElement)
+                with open(cache_path, 'rb') as f:
+                    self.assertIsInstance(Lark.load(f), Lark)
+                self.assertEqual(os.listdir(dp.PARSER_CACHE_DIR), [os.path.basename(cache_path)])
+            finally:
+                dp.PARSER_CACHE_DIR = cache_dir
+
 
 if __name__ == '__main__':
     unittest.main()
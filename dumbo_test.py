@@ -1,18 +1,26 @@
+import asyncio
+import contextlib
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
 
-from dumboParser import dumbo_parser
-from dumbo import Interpreter, BadReferenceError, NotIterableError
+from dumboParser import parse
+from dumbo import Interpreter, BadReferenceError, NotIterableError, freeze
 
 
 class InterpreterTest(unittest.TestCase):
+    backend = 'lark'
 
     def setUp(self) -> None:
         self.interpreter = Interpreter({}, verbose=False)
 
-    def assertExecutionResult(self, src, expected):
-        program = dumbo_parser.parse(src)
+    def execute(self, src) -> str:
+        program = parse(src, self.backend)
         program.accept(self.interpreter)
-        self.assertEqual(self.interpreter.result, expected)
+        return self.interpreter.result
+
+    def assertExecutionResult(self, src, expected):
+        self.assertEqual(self.execute(src), expected)
 
     def test_textBlock(self) -> None:
         src = "text block"
@@ -85,15 +93,13 @@ class InterpreterTest(unittest.TestCase):
 
     def test_ifScope(self) -> None:
         src = "{{if true do a := 42; endif; print a;}}"
-        program = dumbo_parser.parse(src)
         with self.assertRaises(BadReferenceError):
-            program.accept(self.interpreter)
+            self.execute(src)
 
     def test_forScope(self) -> None:
         src = "{{for i in ('Hello', 'World!') do a := 42; endfor; print a;}}"
-        program = dumbo_parser.parse(src)
         with self.assertRaises(BadReferenceError):
-            program.accept(self.interpreter)
+            self.execute(src)
 
     def test_forVarScope(self) -> None:
         src = "{{for i in ('Hello', 'World!') do a := 42; endfor; print i;}}"
@@ -107,15 +113,143 @@ class InterpreterTest(unittest.TestCase):
 
     def test_badRefError(self) -> None:
         src = "{{print a;}}"
-        program = dumbo_parser.parse(src)
         with self.assertRaises(BadReferenceError):
-            program.accept(self.interpreter)
+            self.execute(src)
 
     def test_notIterError(self) -> None:
         src = "{{list := 42; for i in list do print 'ok'; endfor;}}"
-        program = dumbo_parser.parse(src)
         with self.assertRaises(NotIterableError):
-            program.accept(self.interpreter)
+            self.execute(src)
+
+    def test_len(self) -> None:
+        src = "{{list := ('a', 'b', 'c'); print len(list); print len('abcd') * 2;}}"
+        expected = '38'
+        self.assertExecutionResult(src, expected)
+
+    def test_join(self) -> None:
+        src = "{{list := ('a', 'b'); print join(list); print join(list, ', ') . '!'; print join(('x', 'y'), '-');}}"
+        expected = 'aba, b!x-y'
+        self.assertExecutionResult(src, expected)
+
+    def test_range(self) -> None:
+        src = "{{for i in range(3) do print i * 2; endfor; r := range(1, 4); print join(r, ' ');}}"
+        expected = '0241 2 3'
+        self.assertExecutionResult(src, expected)
+
+    def test_lazyRange(self) -> None:
+        src = ("{{n := 1000000000; print range(3) . len(range(5, n)) . slice(range(n), 2, 4);"
+               " for i in slice(range(n), n - 2) do print ' ' . i; endfor;}}")
+        expected = '(0, 1, 2)999999995(2, 3) 999999998 999999999'
+        self.assertExecutionResult(src, expected)
+
+    def test_slice(self) -> None:
+        src = ("{{list := ('a', 'b', 'c'); for i in slice(list, 1) do print i; endfor;"
+               " print slice('abcd', 1, len(list));}}")
+        expected = 'bcbc'
+        self.assertExecutionResult(src, expected)
+
+
+class IterRenderTest(InterpreterTest):
+
+    def execute(self, src) -> str:
+        return ''.join(self.interpreter.iter_render(parse(src, self.backend)))
+
+
+class AsyncRenderTest(InterpreterTest):
+
+    def execute(self, src) -> str:
+        async def collect():
+            return ''.join([chunk async for chunk in self.interpreter.aiter_render(parse(src, self.backend), 2)])
+        return asyncio.run(collect())
+
+
+class StreamingTest(unittest.TestCase):
+    src = "<ul>{{for i in l do print '<li>' . i . '</li>'; endfor;}}</ul>"
+    expected = '<ul>' + ''.join(f'<li>{i}</li>' for i in range(100)) + '</ul>'
+
+    def setUp(self) -> None:
+        self.scope = {'l': [str(i) for i in range(100)]}
+
+    def test_sink(self) -> None:
+        sink = StringIO()
+        interpreter = Interpreter(self.scope, sink=sink, buffer_size=64)
+        parse(self.src).accept(interpreter)
+        self.assertEqual(sink.getvalue(), self.expected)
+        self.assertEqual(interpreter.result, '')
+        self.assertEqual(interpreter.pending, '')
+
+    def test_verbose(self) -> None:
+        with contextlib.redirect_stdout(StringIO()) as stdout:
+            interpreter = Interpreter(self.scope, verbose=True, buffer_size=64)
+            parse(self.src).accept(interpreter)
+        self.assertEqual(stdout.getvalue(), self.expected + '\n')
+        self.assertEqual(interpreter.result, self.expected)
+
+    def test_iter_render(self) -> None:
+        interpreter = Interpreter(self.scope, buffer_size=64)
+        chunks = list(interpreter.iter_render(parse(self.src)))
+        self.assertEqual(''.join(chunks), self.expected)
+        self.assertGreater(len(chunks), 10)
+        self.assertTrue(all(len(chunk) < 64 + 20 for chunk in chunks))
+
+    def test_aiter_render(self) -> None:
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        async def render():
+            task = asyncio.create_task(ticker())
+            interpreter = Interpreter(self.scope, buffer_size=10 ** 6)
+            chunks = [chunk async for chunk in interpreter.aiter_render(parse(self.src), yield_every=10)]
+            task.cancel()
+            return chunks
+
+        self.assertEqual(asyncio.run(render()), [self.expected])
+        self.assertGreaterEqual(len(ticks), 10)
+
+    def test_cancel(self) -> None:
+        chunks = []
+
+        async def consume():
+            async for chunk in Interpreter(self.scope, buffer_size=64).aiter_render(parse(self.src), 1):
+                chunks.append(chunk)
+
+        async def render():
+            task = asyncio.create_task(consume())
+            while not chunks:
+                await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(render())
+        self.assertLess(len(''.join(chunks)), len(self.expected))
+
+
+class SharedDataTest(unittest.TestCase):
+    src = "{{for i in l do total := total + 1; endfor; l := ('x'); print total;}}"
+
+    def render(self, scope) -> str:
+        interpreter = Interpreter(scope)
+        parse(self.src).accept(interpreter)
+        return interpreter.result
+
+    def test_dataUnchanged(self) -> None:
+        scope = {'l': ['a', 'b'], 'total': 0}
+        self.assertEqual(self.render(scope), '2')
+        self.assertEqual(self.render(scope), '2')
+        self.assertEqual(scope, {'l': ['a', 'b'], 'total': 0})
+
+    def test_frozenData(self) -> None:
+        data = freeze({'l': [str(i) for i in range(50)], 'total': 0})
+        self.assertIs(freeze(data), data)
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(self.render, [data] * 200))
+        self.assertEqual(results, ['50'] * 200)
+        self.assertEqual(data['total'], 0)
 
 
 if __name__ == '__main__':
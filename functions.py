@@ -0,0 +1,56 @@
+from __future__ import annotations
+from typing import Optional, Union
+from itertools import islice
+from sources import ListSource, RangeSource
+
+
+class FunctionCallError(SyntaxError):
+    pass
+
+
+def dumbo_len(value: Union[list, str, ListSource]) -> int:
+    if type(value) is RangeSource:
+        return len(value.range)
+    if isinstance(value, ListSource):
+        # counted while iterating, a source isn't held in memory
+        return sum(1 for _ in value)
+    return len(value)
+
+
+def dumbo_join(values: Union[list, str, ListSource], separator: str = '') -> str:
+    return separator.join([value if type(value) is str else str(value) for value in values])
+
+
+def dumbo_range(start: int, stop: Optional[int] = None) -> RangeSource:
+    return RangeSource(range(start) if stop is None else range(start, stop))
+
+
+def dumbo_slice(values: Union[list, str, ListSource], start: int,
+                stop: Optional[int] = None) -> Union[list, str, RangeSource]:
+    if type(values) is RangeSource:
+        return RangeSource(values.range[start:stop])
+    if isinstance(values, ListSource):
+        if start < 0 or stop is not None and stop < 0:
+            # counted from the end, the whole source is needed
+            return list(values)[start:stop]
+        return list(islice(values, start, stop))
+    return values[start:stop]
+
+
+# name: (function, types of the parameters, number of required parameters, type of the result)
+FUNCTIONS = {
+    'len': (dumbo_len, [(list, str)], 1, int),
+    'join': (dumbo_join, [(list, str), str], 1, str),
+    'range': (dumbo_range, [int, int], 1, list),
+    'slice': (dumbo_slice, [(list, str), int, int], 2, None),
+}
+
+
+def check_call(name: str, argument_count: int) -> None:
+    """Raises FunctionCallError if name isn't a builtin function or doesn't take argument_count arguments"""
+    if name not in FUNCTIONS:
+        raise FunctionCallError(f"Unknown function '{name}'")
+    _, parameters, required, _ = FUNCTIONS[name]
+    if not required <= argument_count <= len(parameters):
+        expected = required if required == len(parameters) else f'{required} to {len(parameters)}'
+        raise FunctionCallError(f"'{name}' takes {expected} arguments, {argument_count} given")
@@ -0,0 +1,70 @@
+from __future__ import annotations
+from typing import Optional
+import os
+import threading
+import dumboParser as dp
+
+Signature = tuple[int, int]
+
+
+class IncludeCycleError(Exception):
+    def __init__(self, chain: list[str]):
+        super().__init__('Include cycle: ' + ' -> '.join(chain))
+        self.chain = chain
+
+
+def resolve(path: str, including: Optional[str] = None) -> str:
+    """Absolute path of an included file, a relative path starts from the directory of the including template,
+    or from the working directory when its file isn't known"""
+    return os.path.abspath(os.path.join(os.path.dirname(including) if including else '', path))
+
+
+def check_cycle(path: str, including: list[str]) -> None:
+    """Raises IncludeCycleError if path is already being included"""
+    if path in including:
+        raise IncludeCycleError(including[including.index(path):] + [path])
+
+
+def signature(path: str) -> Signature:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class TemplateRegistry:
+    """Parsed partials by absolute path. Each partial is parsed once and its program shared by every including
+    template, in every thread. A partial whose modification time or size changed is parsed again on its next use."""
+
+    def __init__(self, parser: str = 'lark'):
+        self.parser = parser
+        self.parses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> dp.ProgramElement:
+        return self.get_with_signature(path)[1]
+
+    def get_with_signature(self, path: str) -> tuple[Signature, dp.ProgramElement]:
+        current = signature(path)
+        entry = self._entries.get(path)
+        if entry is None or entry[0] != current:
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is None or entry[0] != current:
+                    with open(path) as src_file:
+                        entry = self._entries[path] = (current, dp.parse(src_file.read(), self.parser))
+                    self.parses += 1
+        return entry
+
+    def is_current(self, dependencies: dict[str, Signature]) -> bool:
+        """True if none of the files, recorded with their signature when they were included, changed since"""
+        try:
+            return all(signature(path) == recorded for path, recorded in dependencies.items())
+        except OSError:
+            return False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+registry = TemplateRegistry()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import dumboParser as dp
+from dumbo import Interpreter
+from compiler import compile_program
+from bytecode import assemble
+from optimizer import optimize
+from rendercache import RenderCache
+from typecheck import typecheck
+from zerocopy import MappedTemplate
+from includes import IncludeCycleError, TemplateRegistry, registry, resolve
+
+FILES = {'main.dumbo': "<ul>{{include 'parts/head.dumbo'; for i in items do include 'parts/row.dumbo'; endfor;"
+                       " print n;}}</ul>",
+         'parts/head.dumbo': "{{print title; n := 0;}}",
+         'parts/row.dumbo': "<li>{{print i; n := n + 1;}}</li>{{include 'sep.dumbo';}}",
+         'parts/sep.dumbo': ","}
+SCOPE = {'title': 'T', 'items': ['a', 'b']}
+EXPECTED = '<ul>T<li>a</li>,<li>b</li>,2</ul>'
+
+
+class IncludesTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        for name, content in FILES.items():
+            self.write(name, content)
+        self.main = self.path('main.dumbo')
+        with open(self.main) as f:
+            self.program = dp.parse(f.read())
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.dir.name, name)
+
+    def write(self, name: str, content: str) -> None:
+        os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+        with open(self.path(name), 'w') as f:
+            f.write(content)
+
+    def interpret(self, program: dp.ProgramElement, path: str) -> str:
+        interpreter = Interpreter(SCOPE, path=path)
+        program.accept(interpreter)
+        return interpreter.result
+
+    def test_engines(self) -> None:
+        self.assertEqual(self.interpret(self.program, self.main), EXPECTED)
+        self.assertEqual(''.join(Interpreter(SCOPE, path=self.main).iter_render(self.program)), EXPECTED)
+        self.assertEqual(self.interpret(optimize(self.program)[0], self.main), EXPECTED)
+        self.assertEqual(self.interpret(typecheck(self.program, SCOPE, self.main), self.main), EXPECTED)
+        self.assertEqual(compile_program(self.program, self.main).render(SCOPE), EXPECTED)
+        self.assertEqual(assemble(self.program, self.main).render(SCOPE), EXPECTED)
+        cache = RenderCache(self.program, path=self.main)
+        self.assertEqual(cache.render(SCOPE), EXPECTED)
+        self.assertEqual(cache.render(SCOPE), EXPECTED)
+        with open(self.path('output'), 'wb') as f, MappedTemplate.open(self.main) as template:
+            template.render_to(f, SCOPE)
+        with open(self.path('output')) as f:
+            self.assertEqual(f.read(), EXPECTED)
+
+    def test_sharedParse(self) -> None:
+        compile_program(self.program, self.main)
+        parses = registry.parses
+        for _ in range(3):
+            self.interpret(self.program, self.main)
+            compile_program(self.program, self.main)
+            assemble(self.program, self.main)
+        self.assertEqual(registry.parses, parses)
+        self.assertIs(registry.get(self.path('parts/row.dumbo')), registry.get(self.path('parts/row.dumbo')))
+
+    def test_checkedOncePerRender(self) -> None:
+        scope = dict(SCOPE, items=[str(i) for i in range(50)])
+        with mock.patch.object(registry, 'get', wraps=registry.get) as get:
+            self.program.accept(Interpreter(scope, path=self.main))
+        self.assertEqual(get.call_count, 3)
+
+    def test_invalidation(self) -> None:
+        compiled = compile_program(self.program, self.main)
+        assembled = assemble(self.program, self.main)
+        partials = {self.path(f'parts/{name}.dumbo') for name in ['head', 'row', 'sep']}
+        self.assertEqual(set(compiled.dependencies), partials)
+        self.assertFalse(compiled.stale() or assembled.stale())
+        self.write('parts/sep.dumbo', ';\n')
+        self.assertTrue(compiled.stale() and assembled.stale())
+        expected = EXPECTED.replace(',', ';\n')
+        self.assertEqual(self.interpret(self.program, self.main), expected)
+        self.assertEqual(compile_program(self.program, self.main).render(SCOPE), expected)
+        self.assertFalse(compile_program(dp.parse('text')).stale())
+
+    def test_resolve(self) -> None:
+        self.assertEqual(resolve('b.dumbo', '/t/a.dumbo'), '/t/b.dumbo')
+        self.assertEqual(resolve('../b.dumbo', '/t/p/a.dumbo'), '/t/b.dumbo')
+        self.assertEqual(resolve('b.dumbo'), os.path.abspath('b.dumbo'))
+        cwd = os.getcwd()
+        os.chdir(self.dir.name)
+        try:
+            self.assertEqual(self.interpret(dp.parse("{{include 'parts/sep.dumbo';}}"), None), ',')
+        finally:
+            os.chdir(cwd)
+
+    def test_cycle(self) -> None:
+        self.write('a.dumbo', "{{include 'parts/b.dumbo';}}")
+        self.write('parts/b.dumbo', "{{if true do include '../a.dumbo'; endif;}}")
+        path = self.path('a.dumbo')
+        program = registry.get(path)
+        engines = [lambda: self.interpret(program, path), lambda: compile_program(program, path),
+                   lambda: assemble(program, path), lambda: typecheck(program, SCOPE, path)]
+        for engine in engines:
+            with self.assertRaises(IncludeCycleError) as cm:
+                engine()
+            self.assertEqual(cm.exception.chain, [path, self.path('parts/b.dumbo'), path])
+
+    def test_registry(self) -> None:
+        templates = TemplateRegistry('descent')
+        path = self.path('parts/head.dumbo')
+        program = templates.get(path)
+        self.assertIs(templates.get(path), program)
+        self.write('parts/head.dumbo', "{{print title . '!';}}")
+        self.assertIsNot(templates.get(path), program)
+        self.assertEqual(templates.parses, 2)
+        templates.clear()
+        templates.get(path)
+        self.assertEqual(templates.parses, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+from typing import Union, Optional
+import dumboParser as dp
+from visitors import Visitor
+from compiler import ARITHMETIC_OPERATIONS, BOOLEAN_OPERATIONS, to_str
+from functions import FUNCTIONS
+
+LITERALS = (int, bool, str)
+
+
+def is_literal(value) -> bool:
+    return type(value) in LITERALS
+
+
+def count_nodes(element) -> int:
+    """Number of elements and literals in a tree, text blocks and string lists count as one"""
+    if isinstance(element, dp.ProgramElement):
+        return 1 + sum(count_nodes(el) for el in element.content)
+    if isinstance(element, dp.ExpressionsListElement):
+        return 1 + sum(count_nodes(exp) for exp in element.expressions_list)
+    if isinstance(element, dp.SEElement):
+        return 1 + sum(count_nodes(e) for e in element.subExpressions)
+    if isinstance(element, (dp.AEElement, dp.BEElement)):
+        return 1 + count_nodes(element.left) + count_nodes(element.right)
+    if isinstance(element, dp.PrintElement):
+        return 1 + count_nodes(element.str_expression)
+    if isinstance(element, dp.AssignElement):
+        return 1 + count_nodes(element.variable) + count_nodes(element.value)
+    if isinstance(element, dp.IfElement):
+        return 1 + count_nodes(element.boolean_expression) + count_nodes(element.expressions_list)
+    if isinstance(element, dp.ForElement):
+        return 1 + count_nodes(element.iterator_var) + count_nodes(element.iterator) \
+               + count_nodes(element.expressions_list)
+    if isinstance(element, dp.CallElement):
+        return 1 + sum(count_nodes(argument) for argument in element.arguments)
+    return 1
+
+
+class Optimizer(Visitor):
+    """Builds an equivalent tree with constant subexpressions folded, dead if blocks dropped
+    and adjacent literal text merged. Folding never hides an error the interpreter would raise."""
+
+    def optimize(self, value):
+        return value if type(value) in dp.primitives else value.accept(self)
+
+    def visit_print_element(self, element: dp.PrintElement) -> dp.PrintElement:
+        return dp.PrintElement(self.optimize(element.str_expression))
+
+    def visit_for_element(self, element: dp.ForElement) -> dp.ForElement:
+        return dp.ForElement(element.iterator_var, self.optimize(element.iterator),
+                             element.expressions_list.accept(self))
+
+    def visit_se_element(self, element: dp.SEElement) -> Union[dp.SEElement, str]:
+        parts = []
+        for e in element.subExpressions:
+            e = self.optimize(e)
+            for part in e.subExpressions if type(e) is dp.SEElement else [e]:
+                if is_literal(part) and parts and type(parts[-1]) is str:
+                    parts[-1] += to_str(part)
+                elif is_literal(part):
+                    parts.append(to_str(part))
+                else:
+                    parts.append(part)
+        if len(parts) == 1 and type(parts[0]) is str:
+            return parts[0]
+        return dp.SEElement(parts)
+
+    def visit_ae_element(self, element: dp.AEElement) -> Union[dp.AEElement, int]:
+        left = self.optimize(element.left)
+        right = self.optimize(element.right)
+        if type(left) is int and type(right) is int and not (element.op == '/' and right == 0):
+            return ARITHMETIC_OPERATIONS[element.op](left, right)
+        return dp.AEElement(left, element.op, right)
+
+    def visit_be_element(self, element: dp.BEElement) -> Union[dp.BEElement, bool]:
+        left = self.optimize(element.left)
+        right = self.optimize(element.right)
+        if is_literal(left) and is_literal(right):
+            return BOOLEAN_OPERATIONS[element.op](left, right)
+        # both sides are always evaluated, so only the identities 'true and x' and 'false or x' can be applied
+        if element.op in ('and', 'or'):
+            neutral = element.op == 'and'
+            if type(left) is bool and left is neutral:
+                return right
+            if type(right) is bool and right is neutral:
+                return left
+        return dp.BEElement(left, element.op, right)
+
+    def visit_expressions_list_element(self, element: dp.ExpressionsListElement) -> dp.ExpressionsListElement:
+        expressions = [exp.accept(self) for exp in element.expressions_list]
+        return dp.ExpressionsListElement([exp for exp in expressions if exp is not None])
+
+    def visit_assign_element(self, element: dp.AssignElement) -> dp.AssignElement:
+        return dp.AssignElement(element.variable, self.optimize(element.value))
+
+    def visit_program_element(self, element: dp.ProgramElement) -> dp.ProgramElement:
+        content = []
+        for el in element.content:
+            if type(el) is not str:
+                el = el.accept(self)
+                if not el.expressions_list:
+                    continue
+                if all(type(exp) is dp.PrintElement and is_literal(exp.str_expression)
+                       for exp in el.expressions_list):
+                    el = ''.join(to_str(exp.str_expression) for exp in el.expressions_list)
+            if type(el) is str and content and type(content[-1]) is str:
+                content[-1] += el
+            elif el != '':
+                content.append(el)
+        return dp.ProgramElement(content or [''])
+
+    def visit_variable_element(self, element: dp.VariableElement) -> dp.VariableElement:
+        return element
+
+    def visit_call_element(self, element: dp.CallElement) -> Union[dp.CallElement, int, str]:
+        arguments = [self.optimize(argument) for argument in element.arguments]
+        # lists are never folded, a range could be much bigger than the call
+        if all(is_literal(argument) for argument in arguments):
+            try:
+                value = FUNCTIONS[element.name][0](*arguments)
+            except Exception:
+                value = None
+            if is_literal(value):
+                return value
+        return dp.CallElement(element.name, arguments)
+
+    def visit_include_element(self, element: dp.IncludeElement) -> dp.IncludeElement:
+        return element
+
+    def visit_if_element(self, element: dp.IfElement) -> Optional[dp.IfElement]:
+        condition = self.optimize(element.boolean_expression)
+        if is_literal(condition) and not condition:
+            return None
+        expressions_list = element.expressions_list.accept(self)
+        if is_literal(condition) and not expressions_list.expressions_list:
+            return None
+        return dp.IfElement(condition, expressions_list)
+
+
+def optimize(program: dp.ProgramElement) -> tuple[dp.ProgramElement, int]:
+    """Returns the optimized program and the number of nodes removed"""
+    optimized = program.accept(Optimizer())
+    return optimized, count_nodes(program) - count_nodes(optimized)
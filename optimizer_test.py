@@ -0,0 +1,65 @@
+import unittest
+
+import dumboParser as dp
+import dumbo_test
+from optimizer import optimize
+
+
+class OptimizedInterpreterTest(dumbo_test.InterpreterTest):
+
+    def execute(self, src) -> str:
+        program, _ = optimize(dp.parse(src, self.backend))
+        program.accept(self.interpreter)
+        return self.interpreter.result
+
+
+class OptimizerTest(unittest.TestCase):
+
+    def optimize(self, src):
+        return optimize(dp.parse(src))
+
+    def expression(self, expression):
+        return self.optimize(f"{{{{x := {expression};}}}}")[0].content[0].expressions_list[0].value
+
+    def test_arithmetic(self) -> None:
+        self.assertEqual(self.expression("((42 + 8) / 5 - 2) * 2"), 16)
+        self.assertIs(type(self.expression("(1 + 2) * a")), dp.AEElement)
+        self.assertEqual(self.expression("(1 + 2) * a").left, 3)
+        self.assertIs(type(self.expression("1 / 0")), dp.AEElement)
+
+    def test_boolean(self) -> None:
+        self.assertIs(self.expression("true and false or 1 < 2 and 2 > 1 and 42 = 42"), True)
+        self.assertIs(type(self.expression("true and a < 1")), dp.BEElement)
+        self.assertEqual(self.expression("true and a < 1").op, '<')
+        self.assertEqual(self.expression("true or a < 1").op, 'or')
+
+    def test_string(self) -> None:
+        self.assertEqual(self.expression("'a' . 1 + 1 . true . 'b'"), 'a2trueb')
+        expression = self.expression("'a' . 'b' . x . 'c' . 1")
+        self.assertEqual(expression.subExpressions[0], 'ab')
+        self.assertEqual(expression.subExpressions[2], 'c1')
+
+    def test_call(self) -> None:
+        self.assertEqual(self.expression("len('abc') * 2"), 6)
+        self.assertEqual(self.expression("slice('abcd', 1 + 1)"), 'cd')
+        self.assertIs(type(self.expression("range(3)")), dp.CallElement)
+        self.assertEqual(self.expression("len(slice(a, 1 + 1))").arguments[0].arguments[1], 2)
+        self.assertIs(type(self.expression("len(1)")), dp.CallElement)
+
+    def test_literalPrints(self) -> None:
+        program, _ = self.optimize("{{print 'a' . 1; print 2 * 3;}}")
+        self.assertEqual(program.content, ['a16'])
+
+    def test_deadIf(self) -> None:
+        program, removed = self.optimize("a{{x := 1; if 1 > 2 do print 'ko'; endif;}}b")
+        self.assertEqual(len(program.content[1].expressions_list), 1)
+        self.assertEqual(removed, 7)
+
+    def test_mergeText(self) -> None:
+        program, removed = self.optimize("<p>{{print 'Hello ' . 'World';}}</p>{{if false do x := 1; endif;}}!")
+        self.assertEqual(program.content, ['<p>Hello World</p>!'])
+        self.assertEqual(removed, 14)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+from __future__ import annotations
+from typing import Mapping, Optional
+from time import perf_counter
+import json
+from lark import Transformer
+import dumboParser as dp
+from dumbo import Interpreter
+from optimizer import Optimizer
+
+positioned_parser = dp.LazyParser('dumbo.lark', None, 'program', propagate_positions=True)
+
+Position = tuple[int, int]
+
+
+class PositionTransformer(Transformer):
+    """Builds the AST with DumboTransformer and records where each element starts in the source"""
+
+    def __init__(self, positions: dict[dp.DumboElement, Position]):
+        super().__init__()
+        self.build = dp.DumboTransformer()
+        self.positions = positions
+
+    def __default__(self, data, children, meta):
+        callback = getattr(self.build, data, None)
+        if callback is None:
+            return super().__default__(data, children, meta)
+        element = callback(children)
+        if isinstance(element, dp.DumboElement) and not meta.empty:
+            self.positions[element] = (meta.line, meta.column)
+        return element
+
+
+def parse_with_positions(src: str) -> tuple[dp.ProgramElement, dict[dp.DumboElement, Position]]:
+    """Parses src with the Lark grammar, also returns the line and column of every element.
+    Slower than parse(), only meant for profiling."""
+    positions = {}
+    program = PositionTransformer(positions).transform(positioned_parser.parse(src))
+    return program, positions
+
+
+class NodeStats:
+    __slots__ = ('element', 'count', 'total', 'self', 'bytes')
+
+    def __init__(self, element: dp.DumboElement):
+        self.element = element
+        self.count = 0
+        self.total = 0.0
+        self.self = 0.0
+        self.bytes = 0
+
+
+def _profiled(method):
+    def visit(self, element):
+        stats = self.stats.get(element)
+        if stats is None:
+            stats = self.stats[element] = NodeStats(element)
+        written = self.written
+        children = self._children_time
+        self._children_time = 0.0
+        start = perf_counter()
+        try:
+            return method(self, element)
+        finally:
+            elapsed = perf_counter() - start
+            stats.count += 1
+            stats.total += elapsed
+            stats.self += elapsed - self._children_time
+            stats.bytes += self.written - written
+            self._children_time = children + elapsed
+    return visit
+
+
+class ProfilingInterpreter(Interpreter):
+    """Interpreter recording, for every element, how many times it ran, its cumulative and own time and the bytes
+    it emitted. Interpreter itself is not instrumented, profiling costs nothing unless this class is used."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = {}
+        self.written = 0
+        self._children_time = 0.0
+
+    def write(self, text: str) -> None:
+        self.written += len(text.encode())
+        super().write(text)
+
+    visit_print_element = _profiled(Interpreter.visit_print_element)
+    visit_for_element = _profiled(Interpreter.visit_for_element)
+    visit_se_element = _profiled(Interpreter.visit_se_element)
+    visit_ae_element = _profiled(Interpreter.visit_ae_element)
+    visit_be_element = _profiled(Interpreter.visit_be_element)
+    visit_expressions_list_element = _profiled(Interpreter.visit_expressions_list_element)
+    visit_assign_element = _profiled(Interpreter.visit_assign_element)
+    visit_program_element = _profiled(Interpreter.visit_program_element)
+    visit_variable_element = _profiled(Interpreter.visit_variable_element)
+    visit_if_element = _profiled(Interpreter.visit_if_element)
+    visit_call_element = _profiled(Interpreter.visit_call_element)
+    visit_include_element = _profiled(Interpreter.visit_include_element)
+
+
+def _positioned(method):
+    def visit(self, element):
+        result = method(self, element)
+        if isinstance(result, dp.DumboElement) and element in self.positions:
+            self.positions.setdefault(result, self.positions[element])
+        return result
+    return visit
+
+
+class PositionedOptimizer(Optimizer):
+    """Optimizer giving the elements it rebuilds the position of the element they replace"""
+
+    def __init__(self, positions: dict[dp.DumboElement, Position]):
+        self.positions = positions
+
+    visit_print_element = _positioned(Optimizer.visit_print_element)
+    visit_for_element = _positioned(Optimizer.visit_for_element)
+    visit_se_element = _positioned(Optimizer.visit_se_element)
+    visit_ae_element = _positioned(Optimizer.visit_ae_element)
+    visit_be_element = _positioned(Optimizer.visit_be_element)
+    visit_expressions_list_element = _positioned(Optimizer.visit_expressions_list_element)
+    visit_assign_element = _positioned(Optimizer.visit_assign_element)
+    visit_program_element = _positioned(Optimizer.visit_program_element)
+    visit_call_element = _positioned(Optimizer.visit_call_element)
+    visit_if_element = _positioned(Optimizer.visit_if_element)
+
+
+KINDS = {
+    dp.IfElement: 'if', dp.ExpressionsListElement: 'block', dp.PrintElement: 'print', dp.ForElement: 'for',
+    dp.SEElement: 'string', dp.AEElement: 'arithmetic', dp.BEElement: 'boolean', dp.AssignElement: 'assign',
+    dp.VariableElement: 'variable', dp.CallElement: 'call', dp.IncludeElement: 'include',
+    dp.ProgramElement: 'program'
+}
+
+
+class Profile:
+    """Parse and render timings of one template, with the statistics of its elements"""
+
+    def __init__(self, timings: dict[str, float], stats: dict[dp.DumboElement, NodeStats],
+                 positions: Optional[dict[dp.DumboElement, Position]] = None):
+        self.timings = timings
+        self.stats = stats
+        self.positions = positions or {}
+
+    def nodes(self) -> list[dict]:
+        """Element statistics, hottest first by own time"""
+        nodes = []
+        for element, stats in self.stats.items():
+            line, column = self.positions.get(element, (None, None))
+            name = getattr(element, 'name', None) or getattr(element, 'op', None)
+            kind = next(KINDS[cls] for cls in type(element).__mro__ if cls in KINDS)
+            nodes.append({'kind': kind + (f' {name}' if name else ''), 'line': line,
+                          'column': column, 'count': stats.count, 'total': stats.total, 'self': stats.self,
+                          'bytes': stats.bytes})
+        return sorted(nodes, key=lambda node: node['self'], reverse=True)
+
+    def to_json(self) -> dict:
+        return {'timings': self.timings, 'nodes': self.nodes()}
+
+    def dump(self, file_name: str) -> None:
+        with open(file_name, 'w') as f:
+            json.dump(self.to_json(), f, indent=1)
+
+    def report(self, limit: int = 20) -> str:
+        lines = [' '.join(f'{phase} {seconds * 1000:.2f} ms' for phase, seconds in self.timings.items()),
+                 f"{'line:col':>9}  {'element':<20} {'count':>8} {'self ms':>9} {'total ms':>9} {'bytes':>9}"]
+        for node in self.nodes()[:limit]:
+            position = f"{node['line']}:{node['column']}" if node['line'] is not None else '?'
+            lines.append(f"{position:>9}  {node['kind']:<20} {node['count']:>8} {node['self'] * 1000:>9.2f} "
+                         f"{node['total'] * 1000:>9.2f} {node['bytes']:>9}")
+        return '\n'.join(lines)
+
+
+def profile_render(data_file_name: str, src_file_name: str, optimize: bool = False,
+                   sources: Optional[Mapping] = None, **options) -> Profile:
+    """Renders like dumbo.main, sources are added to the data and options passed to the ProfilingInterpreter"""
+    from snapshot import load_data
+    timings = {}
+    start = perf_counter()
+    with open(src_file_name) as src_file:
+        program, positions = parse_with_positions(src_file.read())
+    timings['parse'] = perf_counter() - start
+    start = perf_counter()
+    scope = load_data(data_file_name)
+    if sources:
+        scope = dict(scope, **sources)
+    timings['data'] = perf_counter() - start
+    if optimize:
+        start = perf_counter()
+        program = program.accept(PositionedOptimizer(positions))
+        timings['optimize'] = perf_counter() - start
+    interpreter = ProfilingInterpreter(scope, path=src_file_name, **options)
+    start = perf_counter()
+    program.accept(interpreter)
+    timings['render'] = perf_counter() - start
+    return Profile(timings, interpreter.stats, positions)
@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import unittest
+
+import dumbo_test
+from profiler import parse_with_positions, ProfilingInterpreter, Profile, profile_render
+
+SRC = """<ul>
+{{ for i in items do
+    print '<li>' . i . '</li>';
+endfor; }}
+</ul>"""
+
+
+class ProfilingInterpreterTest(dumbo_test.InterpreterTest):
+
+    def setUp(self) -> None:
+        self.interpreter = ProfilingInterpreter({})
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def test_positions(self) -> None:
+        program, positions = parse_with_positions(SRC)
+        for_element = program.content[1].expressions_list[0]
+        print_element = for_element.expressions_list.expressions_list[0]
+        self.assertEqual(positions[for_element], (2, 4))
+        self.assertEqual(positions[print_element], (3, 5))
+        self.assertEqual(positions[print_element.str_expression.subExpressions[1]], (3, 20))
+
+    def test_profile(self) -> None:
+        program, positions = parse_with_positions(SRC)
+        interpreter = ProfilingInterpreter({'items': ['a', 'b', 'c']})
+        program.accept(interpreter)
+        nodes = Profile({'render': 0.0}, interpreter.stats, positions).nodes()
+        by_kind = {node['kind']: node for node in nodes}
+        self.assertEqual(by_kind['for']['count'], 1)
+        self.assertEqual(by_kind['print']['count'], 3)
+        self.assertEqual(by_kind['print']['bytes'], len('<li>a</li>') * 3)
+        self.assertEqual(by_kind['program']['bytes'], len(interpreter.result.encode()))
+        self.assertEqual((by_kind['variable i']['line'], by_kind['variable i']['count']), (3, 3))
+        self.assertGreaterEqual(by_kind['for']['total'], by_kind['print']['total'])
+        self.assertEqual(nodes, sorted(nodes, key=lambda node: node['self'], reverse=True))
+
+    def test_profileRender(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            src, data = os.path.join(tmp, 'page.dumbo'), os.path.join(tmp, 'data.dumbo')
+            with open(src, 'w') as f:
+                f.write(SRC)
+            with open(data, 'w') as f:
+                f.write("{{items := ('x', 'y');}}")
+            profile = profile_render(data, src)
+            self.assertEqual(set(profile.timings), {'parse', 'data', 'render'})
+            optimized = profile_render(data, src, optimize=True)
+            self.assertEqual(set(optimized.timings), {'parse', 'data', 'optimize', 'render'})
+            # the optimizer merges nested concatenations, every node it keeps has the position of the original
+            positions = {(node['kind'], node['line'], node['column']) for node in profile.nodes()}
+            optimized_positions = {(node['kind'], node['line'], node['column']) for node in optimized.nodes()}
+            self.assertLessEqual(optimized_positions, positions)
+            self.assertEqual({kind for kind, _, _ in optimized_positions}, {kind for kind, _, _ in positions})
+            self.assertIn('for', profile.report())
+            profile.dump(os.path.join(tmp, 'profile.json'))
+            with open(os.path.join(tmp, 'profile.json')) as f:
+                self.assertEqual(len(json.load(f)['nodes']), len(profile.stats))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+from typing import Union, Iterable, Optional, Mapping, AsyncIterator
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import os
+import dumboParser as dp
+from dumbo import Interpreter, DEFAULT_BUFFER_SIZE, DEFAULT_YIELD_EVERY
+from compiler import compile_program, CompiledProgram
+
+Template = Union[str, dp.ProgramElement, CompiledProgram]
+
+
+def compile_template(template: Template, path: Optional[str] = None) -> CompiledProgram:
+    if type(template) is str:
+        template = dp.parse(template)
+    if type(template) is dp.ProgramElement:
+        template = compile_program(template, path)
+    return template
+
+
+def render(template: Template, scope: Mapping, path: Optional[str] = None) -> str:
+    """Renders template, a source, a parsed or a compiled program, without modifying scope.
+    path is the file of the template, from which includes are resolved.
+    Safe to call from several threads at once."""
+    return compile_template(template, path).render(scope)
+
+
+def stream_async(template: Union[str, dp.ProgramElement], scope: Mapping, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 yield_every: int = DEFAULT_YIELD_EVERY, path: Optional[str] = None) -> AsyncIterator[str]:
+    """Renders template in chunks of about buffer_size characters without blocking the event loop for more than
+    yield_every statements or loop iterations, for use in asyncio services"""
+    if type(template) is str:
+        template = dp.parse(template)
+    return Interpreter(scope, buffer_size=buffer_size, path=path).aiter_render(template, yield_every)
+
+
+_worker_program: Optional[CompiledProgram] = None
+
+
+def _init_worker(program: dp.ProgramElement, path: Optional[str] = None) -> None:
+    global _worker_program
+    _worker_program = compile_program(program, path)
+
+
+def _render_in_worker(scope: dict) -> str:
+    return _worker_program.render(scope)
+
+
+def render_many(template: Union[str, dp.ProgramElement], datasets: Iterable[Mapping], processes: bool = False,
+                max_workers: Optional[int] = None, path: Optional[str] = None) -> list[str]:
+    """Renders template against every scope of datasets, in the same order.
+    Threads share one compiled program but are bound by the GIL, processes receive the parsed program once
+    and scale across cores. path is the file of the template, from which includes are resolved."""
+    if type(template) is str:
+        template = dp.parse(template)
+    if not processes:
+        compiled = compile_program(template, path)
+        with ThreadPoolExecutor(max_workers) as executor:
+            return list(executor.map(compiled.render, datasets))
+    datasets = [dict(scope) for scope in datasets]  # frozen scopes can't be pickled
+    max_workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(datasets) // (4 * max_workers))
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(template, path)) as executor:
+        return list(executor.map(_render_in_worker, datasets, chunksize=chunksize))
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import dumboParser as dp
+from data import data_parser
+from render import render, render_many, stream_async
+
+TEMPLATE = "<h1>{{print title;}}</h1>{{i := 0; for p in photos do print p; i := i + 1; endfor; print i;}}"
+
+
+def dataset(n):
+    return {'title': f'album {n}', 'photos': [f'{n}.{j}' for j in range(n % 5)]}
+
+
+def expected(n):
+    return f'<h1>album {n}</h1>' + ''.join(f'{n}.{j}' for j in range(n % 5)) + str(n % 5)
+
+
+class RenderTest(unittest.TestCase):
+
+    def test_render(self) -> None:
+        scope = dataset(3)
+        self.assertEqual(render(TEMPLATE, scope), expected(3))
+        self.assertEqual(render(dp.parse(TEMPLATE), scope), expected(3))
+        self.assertEqual(scope, dataset(3))
+
+    def test_streamAsync(self) -> None:
+        async def collect(n):
+            return ''.join([chunk async for chunk in stream_async(TEMPLATE, dataset(n), buffer_size=4)])
+
+        async def collect_all():
+            return await asyncio.gather(*[collect(n) for n in range(10)])
+        self.assertEqual(asyncio.run(collect_all()), [expected(n) for n in range(10)])
+
+    def test_renderManyThreads(self) -> None:
+        datasets = [dataset(n) for n in range(50)]
+        self.assertEqual(render_many(TEMPLATE, datasets, max_workers=4), [expected(n) for n in range(50)])
+        self.assertEqual(datasets, [dataset(n) for n in range(50)])
+
+    def test_renderManyProcesses(self) -> None:
+        results = render_many(dp.parse(TEMPLATE), [dataset(n) for n in range(20)], processes=True, max_workers=2)
+        self.assertEqual(results, [expected(n) for n in range(20)])
+
+    def test_concurrentDataParsing(self) -> None:
+        sources = [f"{{{{v{n} := {n}; s := '{n}';}}}}" for n in range(100)]
+        with ThreadPoolExecutor(8) as executor:
+            scopes = list(executor.map(data_parser.parse, sources))
+        self.assertEqual(scopes, [{f'v{n}': n, 's': str(n)} for n in range(100)])
+
+    def test_includePath(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'title.dumbo'), 'w') as f:
+                f.write('<h1>{{print title;}}</h1>')
+            path = os.path.join(directory, 'page.dumbo')
+            template, scope = "{{include 'title.dumbo';}}", dataset(1)
+            self.assertEqual(render(template, scope, path), '<h1>album 1</h1>')
+            self.assertEqual(render_many(template, [scope], path=path), ['<h1>album 1</h1>'])
+            self.assertEqual(render_many(template, [scope], processes=True, max_workers=1, path=path),
+                             ['<h1>album 1</h1>'])
+            chunks = stream_async(template, scope, path=path)
+            self.assertEqual(asyncio.run(self.collect(chunks)), '<h1>album 1</h1>')
+
+    @staticmethod
+    async def collect(chunks) -> str:
+        return ''.join([chunk async for chunk in chunks])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+from __future__ import annotations
+from collections import OrderedDict, namedtuple
+from typing import Callable, Iterable, Mapping, Optional
+import hashlib
+import threading
+import dumboParser as dp
+from visitors import Visitor
+from dumbo import Interpreter
+from sources import ListSource, RangeSource
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+DEFAULT_MAX_SIZE = 1024
+MISSING = object()
+
+
+class ReadSetAnalyzer(Visitor):
+    """Finds the variables a top-level block depends on: the ones it reads before assigning them at its top
+    level, and the ones it assigns in an if or for body, whose existence decides which scope they go to.
+    Also collects every variable the block may assign, and whether it includes another template."""
+
+    def __init__(self):
+        self.reads = set()
+        self.writes = set()
+        self.assigned = set()
+        self.depth = 0
+        self.includes = False
+
+    def expression(self, value) -> None:
+        if type(value) not in dp.primitives:
+            value.accept(self)
+
+    def body(self, element: dp.ExpressionsListElement) -> None:
+        self.depth += 1
+        element.accept(self)
+        self.depth -= 1
+
+    def assign(self, name: str) -> None:
+        self.writes.add(name)
+        if self.depth == 0:
+            self.assigned.add(name)
+        elif name not in self.assigned:
+            self.reads.add(name)
+
+    def visit_if_element(self, element: dp.IfElement) -> None:
+        self.expression(element.boolean_expression)
+        self.body(element.expressions_list)
+
+    def visit_print_element(self, element: dp.PrintElement) -> None:
+        self.expression(element.str_expression)
+
+    def visit_for_element(self, element: dp.ForElement) -> None:
+        self.expression(element.iterator)
+        # the loop may not run, the variable is only possibly assigned
+        self.depth += 1
+        self.assign(element.iterator_var.name)
+        self.depth -= 1
+        self.body(element.expressions_list)
+
+    def visit_se_element(self, element: dp.SEElement) -> None:
+        for e in element.subExpressions:
+            self.expression(e)
+
+    def visit_ae_element(self, element: dp.AEElement) -> None:
+        self.expression(element.left)
+        self.expression(element.right)
+
+    def visit_be_element(self, element: dp.BEElement) -> None:
+        self.expression(element.left)
+        self.expression(element.right)
+
+    def visit_expressions_list_element(self, element: dp.ExpressionsListElement) -> None:
+        for exp in element.expressions_list:
+            exp.accept(self)
+
+    def visit_call_element(self, element: dp.CallElement) -> None:
+        for argument in element.arguments:
+            self.expression(argument)
+
+    def visit_assign_element(self, element: dp.AssignElement) -> None:
+        self.expression(element.value)
+        self.assign(element.variable.name)
+
+    def visit_program_element(self, element: dp.ProgramElement) -> None:
+        for el in element.content:
+            if type(el) is not str:
+                el.accept(self)
+
+    def visit_variable_element(self, element: dp.VariableElement) -> None:
+        if element.name not in self.assigned:
+            self.reads.add(element.name)
+
+    def visit_include_element(self, element: dp.IncludeElement) -> None:
+        self.includes = True
+
+
+def includes(block: dp.ExpressionsListElement) -> bool:
+    """True if the block includes another template"""
+    analyzer = ReadSetAnalyzer()
+    block.accept(analyzer)
+    return analyzer.includes
+
+
+def analyze(block: dp.ExpressionsListElement) -> tuple[frozenset[str], frozenset[str]]:
+    """Returns the variables read and the variables possibly assigned by a top-level block"""
+    analyzer = ReadSetAnalyzer()
+    block.accept(analyzer)
+    return frozenset(analyzer.reads), frozenset(analyzer.writes)
+
+
+def _encode(value, update: Callable[[bytes], None]) -> None:
+    """Feeds update a stable and unambiguous encoding of value: a type tag, then a length or the value itself"""
+    if type(value) is str:
+        data = value.encode('utf-8', 'surrogatepass')
+        update(b's%d:' % len(data))
+        update(data)
+    elif type(value) is bool:
+        update(b'T' if value else b'F')
+    elif type(value) is int:
+        update(b'i%d;' % value)
+    elif type(value) is list:
+        update(b'l%d:' % len(value))
+        for item in value:
+            _encode(item, update)
+    elif type(value) is RangeSource:
+        update(b'g%d:%d;' % (value.range.start, value.range.stop))
+    elif value is MISSING:
+        update(b'm')
+    else:
+        data = f'{type(value).__qualname__}:{value!r}'.encode('utf-8', 'surrogatepass')
+        update(b'r%d:' % len(data))
+        update(data)
+
+
+def digest(values: Iterable) -> bytes:
+    """SHA-1 of the encoding of values, keys the cache without keeping copies of the lists"""
+    h = hashlib.sha1()
+    for value in values:
+        _encode(value, h.update)
+    return h.digest()
+
+
+class RenderCache:
+    """Renders a program block by block, reusing the output of a top-level block when the variables it reads
+    hold the same values as in an earlier render. Each entry also keeps the global variables the block assigned,
+    which are replayed on a hit. At most maxsize entries are kept, the least recently used are evicted.
+    Blocks including a template are always rendered, the included file may change between renders."""
+
+    def __init__(self, program: dp.ProgramElement, maxsize: int = DEFAULT_MAX_SIZE, path: Optional[str] = None):
+        self.program = program
+        self.maxsize = maxsize
+        self.path = path
+        self.blocks = [(el, None if type(el) is str else tuple(sorted(names) for names in analyze(el)))
+                       for el in program.content]
+        self.uncached = {index for index, el in enumerate(program.content) if type(el) is not str and includes(el)}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def render(self, scope: Mapping) -> str:
+        """Renders like Interpreter, scope is not modified"""
+        interpreter = Interpreter(scope, path=self.path)
+        chunks = []
+        globals_ = interpreter.scope.maps[0]
+        for index, (block, names) in enumerate(self.blocks):
+            if names is None:
+                chunks.append(block)
+                continue
+            reads, writes = names
+            values = [interpreter.scope.get(name, MISSING) for name in reads]
+            # the content of a source can't be compared, blocks reading one are always rendered, but a range is
+            # known by its bounds
+            cached = index not in self.uncached and not any(
+                isinstance(value, ListSource) and type(value) is not RangeSource for value in values)
+            key = (index, digest(values))
+            entry = self._get(key) if cached else None
+            if entry is None:
+                block.accept(interpreter)
+                # a variable assigned in a body that didn't run keeps its previous value, a read one
+                entry = interpreter._take(), {name: globals_[name] for name in writes if name in globals_}
+                if cached:
+                    self._put(key, entry)
+            output, assigned = entry
+            globals_.update(assigned)
+            chunks.append(output)
+        return ''.join(chunks)
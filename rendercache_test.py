@@ -0,0 +1,60 @@
+import unittest
+
+import dumboParser as dp
+from dumbo import Interpreter
+from rendercache import RenderCache, analyze, digest
+
+TEMPLATE = """<h1>{{print title;}}</h1>{{n := 0; for p in photos do n := n + 1; print p; endfor;}}
+<p>{{print n . ' photos by ' . author;}}</p>{{if n > 2 do author := 'many'; endif;}}{{print author;}}"""
+
+
+def interpret(program, scope) -> str:
+    interpreter = Interpreter(scope)
+    program.accept(interpreter)
+    return interpreter.result
+
+
+class RenderCacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.program = dp.parse(TEMPLATE)
+        self.cache = RenderCache(self.program)
+
+    def test_analyze(self) -> None:
+        reads, writes = analyze(self.program.content[3])
+        self.assertEqual(reads, {'photos', 'p'})
+        self.assertEqual(writes, {'n', 'p'})
+        reads, writes = analyze(self.program.content[7])
+        self.assertEqual(reads, {'n', 'author'})
+
+    def test_render(self) -> None:
+        scopes = [{'title': 'a', 'photos': ['1', '2', '3'], 'author': 'me'},
+                  {'title': 'b', 'photos': ['1', '2', '3'], 'author': 'me'},
+                  {'title': 'b', 'photos': ['1'], 'author': 'me'},
+                  {'title': 'a', 'photos': ['1', '2', '3'], 'author': 'you'}]
+        for scope in scopes * 2:
+            self.assertEqual(self.cache.render(scope), interpret(self.program, scope))
+        info = self.cache.cache_info()
+        self.assertEqual(info.hits + info.misses, 8 * 5)
+        self.assertEqual(info.misses, 5 + 1 + 4 + 2)
+
+    def test_digest(self) -> None:
+        values = [['a', 'b'], ['ab'], ['a', 'b', ''], 'ab', 1, '1', True, 'true', [], '']
+        digests = [digest([value]) for value in values]
+        self.assertEqual(len(set(digests)), len(values))
+        self.assertNotEqual(digest(['a', 'b']), digest(['ab']))
+        self.assertEqual(digest([['x'] * 1000]), digest([['x'] * 1000]))
+        self.assertEqual(len(digests[0]), 20)
+
+    def test_eviction(self) -> None:
+        cache = RenderCache(self.program, maxsize=4)
+        for i in range(10):
+            self.assertEqual(cache.render({'title': str(i), 'photos': [], 'author': 'me'}),
+                             interpret(self.program, {'title': str(i), 'photos': [], 'author': 'me'}))
+        self.assertEqual(cache.cache_info().currsize, 4)
+        cache.clear()
+        self.assertEqual(cache.cache_info(), (0, 0, 4, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+import dumboParser as dp
+from compiler import compile_program
+from data import data_loader, DataSyntaxError
+from snapshot import load_data
+
+DEFAULT_SOCKET = 'dumbo.sock'
+DEFAULT_LIMIT = 2 ** 26  # longest request line, in bytes
+
+_worker_programs = {}
+_worker_templates = {}
+_worker_data_dir = None
+
+
+def _init_worker(programs: dict[str, dp.ProgramElement], paths: Optional[dict[str, str]] = None,
+                 data_dir: Optional[str] = None) -> None:
+    global _worker_programs, _worker_templates, _worker_data_dir
+    paths = paths or {}
+    _worker_data_dir = data_dir
+    _worker_templates = {name: (program, paths.get(name)) for name, program in programs.items()}
+    _worker_programs = {name: compile_program(program, path) for name, (program, path) in _worker_templates.items()}
+
+
+def _data_file(name: str) -> str:
+    """Path of a requested data file, which must be in the data directory of the server"""
+    if _worker_data_dir is None:
+        raise PermissionError('data_file requests are disabled, the server has no data directory')
+    path = os.path.realpath(os.path.join(_worker_data_dir, name))
+    if os.path.commonpath([path, _worker_data_dir]) != _worker_data_dir:
+        raise PermissionError(f"'{name}' is outside of the data directory")
+    return path
+
+
+def render_request(request: dict) -> dict:
+    """Answers one request: the name of a template and its data, given inline as a data source ('data'),
+    as a JSON object ('scope') or as the path of a data file relative to the data directory ('data_file')"""
+    try:
+        program = _worker_programs.get(request.get('template'))
+        if program is None:
+            raise KeyError(f"Unknown template '{request.get('template')}'")
+        if program.stale():
+            # an included template changed
+            program = _worker_programs[request['template']] = compile_program(*_worker_templates[request['template']])
+        if 'data' in request:
+            scope = data_loader.parse(request['data'])
+        elif 'data_file' in request:
+            scope = load_data(_data_file(request['data_file']))
+        else:
+            scope = request.get('scope', {})
+        return {'output': program.render(scope)}
+    except DataSyntaxError as e:
+        # the message quotes the data, which may come from a file the client can't read
+        return {'error': f'{type(e).__name__}: Invalid data at line {e.line}'}
+    except Exception as e:
+        return {'error': f'{type(e).__name__}: {e}'}
+
+
+class RenderServer:
+    """Renders preloaded templates for clients of a Unix socket.
+    Requests and responses are JSON objects, one per line. Rendering runs on a process pool where every worker
+    holds the compiled templates, so the event loop only moves bytes. A worker compiles a template again when one
+    of the templates it includes changed. Data files can only be requested from data_dir, when it is given."""
+
+    def __init__(self, templates: dict[str, str], path: str = DEFAULT_SOCKET, workers: Optional[int] = None,
+                 parser: str = 'lark', data_dir: Optional[str] = None, limit: int = DEFAULT_LIMIT):
+        self.path = path
+        self.data_dir = os.path.realpath(data_dir) if data_dir else None
+        self.limit = limit
+        self.workers = workers or os.cpu_count() or 1
+        self.programs = {}
+        self.paths = templates
+        for name, file_name in templates.items():
+            with open(file_name) as src_file:
+                self.programs[name] = dp.parse(src_file.read(), parser)
+        self.executor = None
+        self.server = None
+
+    async def start(self) -> None:
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                            initargs=(self.programs, self.paths, self.data_dir))
+        # start every worker now rather than on the first requests
+        await asyncio.gather(*[asyncio.get_running_loop().run_in_executor(self.executor, render_request, {})
+                               for _ in range(self.workers)])
+        _remove_stale_socket(self.path)
+        self.server = await asyncio.start_unix_server(self.handle, self.path, limit=self.limit)
+
+    async def close(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+        self.executor.shutdown()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    async def serve_forever(self) -> None:
+        """Serves until cancelled or terminated by SIGTERM, to be run from the main thread"""
+        await self.start()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        try:
+            await self.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self.close()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    # longer than the limit, the rest of the connection can't be split into requests
+                    writer.write(json.dumps({'error': f'Request longer than {self.limit} bytes'}).encode() + b'\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    response = {'error': f'{type(e).__name__}: {e}'}
+                else:
+                    response = await loop.run_in_executor(self.executor, render_request, request)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Removes the socket left at path by a server that stopped, raises FileExistsError if path is anything else"""
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"'{path}' exists and isn't a socket")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+            return
+    raise FileExistsError(f"A server is already listening on '{path}'")
+
+
+class RenderClient:
+    """Blocking client of a RenderServer, keeps its connection open between requests"""
+
+    def __init__(self, path: str = DEFAULT_SOCKET):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(path)
+        self.file = self.socket.makefile('rwb')
+
+    def request(self, request: dict) -> dict:
+        self.file.write(json.dumps(request).encode() + b'\n')
+        self.file.flush()
+        return json.loads(self.file.readline())
+
+    def render(self, template: str, **data) -> str:
+        """Renders template with data, scope=, data= or data_file=, raises RuntimeError if the server failed"""
+        response = self.request({'template': template, **data})
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response['output']
+
+    def close(self) -> None:
+        self.file.close()
+        self.socket.close()
+
+
+def serve(*templates, socket=DEFAULT_SOCKET, workers=0, parser='lark', data_dir=None):
+    """Serves the templates, named after their file name without extension, on a Unix socket.
+    Clients may request data files only from --data-dir."""
+    names = {os.path.splitext(os.path.basename(t))[0]: t for t in templates}
+    server = RenderServer(names, socket, workers or None, parser, data_dir)
+    print(f"serving {', '.join(names)} on {socket}", file=sys.stderr)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from server import RenderServer, RenderClient, _remove_stale_socket
+
+
+class RenderServerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        template = os.path.join(cls.tmp.name, 'page.dumbo')
+        with open(template, 'w') as f:
+            f.write("<h1>{{print title;}}</h1>{{for i in items do print i; endfor;}}")
+        cls.data_file = os.path.join(cls.tmp.name, 'data.dumbo')
+        with open(cls.data_file, 'w') as f:
+            f.write("{{title := 'file'; items := ('a', 'b');}}")
+        cls.path = os.path.join(cls.tmp.name, 'dumbo.sock')
+        with open(os.path.join(cls.tmp.name, 'bad.dumbo'), 'w') as f:
+            f.write("{{secret := 'hidden' }}")
+        cls.server = RenderServer({'page': template}, cls.path, workers=2, data_dir=cls.tmp.name, limit=4096)
+        cls.loop = asyncio.new_event_loop()
+        cls.loop.run_until_complete(cls.server.start())
+        cls.thread = threading.Thread(target=cls.loop.run_forever)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        asyncio.run_coroutine_threadsafe(cls.server.close(), cls.loop).result()
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join()
+        cls.loop.close()
+        cls.tmp.cleanup()
+
+    def setUp(self) -> None:
+        self.client = RenderClient(self.path)
+
+    def tearDown(self) -> None:
+        self.client.close()
+
+    def test_render(self) -> None:
+        self.assertEqual(self.client.render('page', data="{{title := 'inline'; items := ('x');}}"), '<h1>inline</h1>x')
+        self.assertEqual(self.client.render('page', scope={'title': 'json', 'items': []}), '<h1>json</h1>')
+        self.assertEqual(self.client.render('page', data_file=self.data_file), '<h1>file</h1>ab')
+        self.assertEqual(self.client.render('page', data_file='data.dumbo'), '<h1>file</h1>ab')
+
+    def test_errors(self) -> None:
+        with self.assertRaisesRegex(RuntimeError, 'Unknown template'):
+            self.client.render('missing')
+        with self.assertRaisesRegex(RuntimeError, 'BadReferenceError'):
+            self.client.render('page', scope={})
+        self.assertIn('error', self.client.request(['not', 'an', 'object']))
+        self.assertEqual(self.client.render('page', scope={'title': 'ok', 'items': []}), '<h1>ok</h1>')
+
+    def test_dataFile(self) -> None:
+        for name in ['../data.dumbo', '/etc/passwd', os.path.join(self.tmp.name, '..', 'x')]:
+            with self.assertRaisesRegex(RuntimeError, 'PermissionError'):
+                self.client.render('page', data_file=name)
+        with self.assertRaises(RuntimeError) as cm:
+            self.client.render('page', data_file='bad.dumbo')
+        self.assertEqual(str(cm.exception), 'DataSyntaxError: Invalid data at line 1')
+
+    def test_longRequest(self) -> None:
+        response = self.client.request({'template': 'page', 'data': 'x' * 5000})
+        self.assertIn('longer than 4096 bytes', response['error'])
+
+    def test_staleSocket(self) -> None:
+        path = os.path.join(self.tmp.name, 'other.sock')
+        with open(path, 'w'):
+            pass
+        with self.assertRaises(FileExistsError):
+            _remove_stale_socket(path)
+        os.remove(path)
+        with self.assertRaises(FileExistsError):
+            _remove_stale_socket(self.path)
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        _remove_stale_socket(path)
+        self.assertFalse(os.path.exists(path))
+
+    def test_concurrentClients(self) -> None:
+        def render(n):
+            client = RenderClient(self.path)
+            try:
+                return [client.render('page', scope={'title': str(n), 'items': [str(i)]}) for i in range(5)]
+            finally:
+                client.close()
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(render, range(16)))
+        self.assertEqual(results, [[f'<h1>{n}</h1>{i}' for i in range(5)] for n in range(16)])
+
+
+if __name__ == '__main__':
+    unittest.main()
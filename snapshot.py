@@ -0,0 +1,221 @@
+"""Binary snapshots of data scopes, memory mapped and decoded lazily.
+
+Layout, little-endian:
+    header   MAGIC, version (u32), number of variables (u32)
+    entries  one ENTRY per variable sorted by encoded name: name offset (u64), name length (u32), kind (u8),
+             then two u64 whose meaning depends on the kind:
+                 STR    offset and length of the UTF-8 value
+                 INT    offset and length of its decimal digits
+                 BOOL   the value, unused
+                 LIST   offset and length of the list: its item count n (u64), n + 1 character offsets (u64)
+                        of the items in the text that follows, the UTF-8 text of the items joined
+    data     names and values
+"""
+from __future__ import annotations
+from collections.abc import Mapping
+from typing import Iterator, Union
+import mmap
+import os
+import re
+import struct
+import tempfile
+from data import data_loader, _STRING
+
+MAGIC = b'DUMBOSNP'
+VERSION = 1
+HEADER = struct.Struct('<8sII')
+ENTRY = struct.Struct('<QIB3xQQ')
+COUNT = struct.Struct('<Q')
+
+STR, INT, BOOL, LIST = range(4)
+
+_QUOTED = re.compile(_STRING)
+
+Value = Union[str, int, bool, list[str]]
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _encode_list(items: list[str]) -> bytes:
+    offsets = [0]
+    for item in items:
+        offsets.append(offsets[-1] + len(item))
+    return COUNT.pack(len(items)) + struct.pack(f'<{len(offsets)}Q', *offsets) + ''.join(items).encode()
+
+
+def dumps(scope: Mapping[str, Value]) -> bytes:
+    """Snapshot of a scope of strings, integers, booleans and lists of strings"""
+    names = sorted((name.encode(), name) for name in scope)
+    entries = []
+    data = bytearray()
+    start = HEADER.size + ENTRY.size * len(names)
+    for encoded, name in names:
+        value = scope[name]
+        name_offset = start + len(data)
+        data += encoded
+        if type(value) is bool:
+            entries.append(ENTRY.pack(name_offset, len(encoded), BOOL, value, 0))
+            continue
+        if type(value) is str:
+            kind, payload = STR, value.encode()
+        elif type(value) is int:
+            kind, payload = INT, str(value).encode()
+        elif type(value) is list and all(type(item) is str for item in value):
+            kind, payload = LIST, _encode_list(value)
+        else:
+            raise SnapshotError(f"Variable '{name}' of type {type(value).__name__} can't be stored")
+        entries.append(ENTRY.pack(name_offset, len(encoded), kind, start + len(data), len(payload)))
+        data += payload
+    return HEADER.pack(MAGIC, VERSION, len(names)) + b''.join(entries) + bytes(data)
+
+
+def write(scope: Mapping[str, Value], file_name: str) -> None:
+    """Writes the snapshot of scope, atomically replacing file_name"""
+    directory = os.path.dirname(os.path.abspath(file_name))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(dumps(scope))
+        os.replace(tmp, file_name)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+class Snapshot(Mapping):
+    """Read-only scope over a snapshot buffer. Only the index is read on opening, a variable is decoded on its
+    first access and kept. Usable as the scope of Interpreter and of the compiled programs."""
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap]):
+        if len(buffer) < HEADER.size:
+            raise SnapshotError('Truncated snapshot')
+        magic, version, count = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise SnapshotError('Not a dumbo snapshot')
+        if version != VERSION:
+            raise SnapshotError(f'Unsupported snapshot version {version}')
+        if len(buffer) < HEADER.size + ENTRY.size * count:
+            raise SnapshotError('Truncated snapshot')
+        self.buffer = buffer
+        self.count = count
+        self._values = {}
+
+    @classmethod
+    def open(cls, file_name: str) -> Snapshot:
+        with open(file_name, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def close(self) -> None:
+        self._values.clear()
+        if type(self.buffer) is mmap.mmap:
+            self.buffer.close()
+
+    def __enter__(self) -> Snapshot:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _entry(self, index: int) -> tuple[int, int, int, int, int]:
+        return ENTRY.unpack_from(self.buffer, HEADER.size + ENTRY.size * index)
+
+    def _name(self, entry) -> bytes:
+        return self.buffer[entry[0]:entry[0] + entry[1]]
+
+    def _find(self, name: str):
+        """Entry of name by binary search on the sorted names, None if absent"""
+        if type(name) is not str:
+            return None
+        key = name.encode()
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry = self._entry(middle)
+            found = self._name(entry)
+            if found == key:
+                return entry
+            if found < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _decode(self, entry) -> Value:
+        _, _, kind, a, b = entry
+        if kind == BOOL:
+            return bool(a)
+        payload = self.buffer[a:a + b]
+        if kind == STR:
+            return payload.decode()
+        if kind == INT:
+            return int(payload)
+        if kind == LIST:
+            count = COUNT.unpack_from(payload)[0]
+            offsets = struct.unpack_from(f'<{count + 1}Q', payload, COUNT.size)
+            text = payload[COUNT.size + 8 * (count + 1):].decode()
+            return [text[offsets[i]:offsets[i + 1]] for i in range(count)]
+        raise SnapshotError(f'Unknown value kind {kind}')
+
+    def __getitem__(self, name: str) -> Value:
+        value = self._values.get(name, self)
+        if value is self:
+            entry = self._find(name)
+            if entry is None:
+                raise KeyError(name)
+            value = self._values[name] = self._decode(entry)
+        return value
+
+    def __contains__(self, name) -> bool:
+        return name in self._values or self._find(name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self.count):
+            yield self._name(self._entry(index)).decode()
+
+    def __len__(self) -> int:
+        return self.count
+
+
+def is_snapshot(file_name: str) -> bool:
+    with open(file_name, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def load_data(file_name: str) -> Mapping[str, Value]:
+    """Scope of a data file, a Snapshot if it is one, else parsed from the data syntax"""
+    if is_snapshot(file_name):
+        return Snapshot.open(file_name)
+    return data_loader.load(file_name)
+
+
+def to_source(scope: Mapping[str, Value]) -> str:
+    """Scope written in the dumbo_data.lark syntax"""
+    def literal(name: str, value) -> str:
+        if type(value) is bool:
+            return 'true' if value else 'false'
+        if type(value) is int:
+            return str(value)
+        if type(value) is list:
+            if not value:
+                raise SnapshotError(f"Variable '{name}' holds an empty list the data syntax can't express")
+            return '(' + ', '.join(literal(name, item) for item in value) + ')'
+        # strings are loaded verbatim, without unescaping
+        if not _QUOTED.fullmatch(f"'{value}'".encode()):
+            raise SnapshotError(f"Variable '{name}' holds a string the data syntax can't express")
+        return f"'{value}'"
+    return '{{\n' + ''.join(f'{name} := {literal(name, scope[name])};\n' for name in scope) + '}}\n'
+
+
+def snapshot(data_file_name, snapshot_file_name):
+    """Converts a data file to a binary snapshot"""
+    write(data_loader.load(data_file_name), snapshot_file_name)
+
+
+def restore(snapshot_file_name, data_file_name):
+    """Converts a binary snapshot back to a data file"""
+    with Snapshot.open(snapshot_file_name) as scope:
+        src = to_source(scope)
+    with open(data_file_name, 'w') as f:
+        f.write(src)
@@ -0,0 +1,89 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import dumboParser as dp
+from data import data_loader
+from dumbo import Interpreter, main
+from compiler import compile_program
+from snapshot import Snapshot, SnapshotError, dumps, write, load_data, to_source, snapshot, restore
+
+SCOPE = {'title': 'Mes vacances dété', 'count': 3, 'big': 2 ** 80, 'visible': True, 'hidden': False,
+         'photos': ['a.png', 'été.png', '', 'c.png'], 'escaped': "it\\'s"}
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def path(self, name) -> str:
+        return os.path.join(self.dir.name, name)
+
+    def test_roundTrip(self) -> None:
+        scope = Snapshot(dumps(SCOPE))
+        self.assertEqual(dict(scope), SCOPE)
+        self.assertEqual(sorted(scope), sorted(SCOPE))
+        self.assertEqual(len(scope), len(SCOPE))
+        self.assertIs(scope['visible'], True)
+        self.assertNotIn('missing', scope)
+        self.assertIsNone(scope.get('missing'))
+        with self.assertRaises(KeyError):
+            scope['missing']
+
+    def test_lazy(self) -> None:
+        scope = Snapshot(dumps(SCOPE))
+        self.assertIn('photos', scope)
+        self.assertEqual(scope._values, {})
+        self.assertIs(scope['photos'], scope['photos'])
+        self.assertEqual(list(scope._values), ['photos'])
+
+    def test_errors(self) -> None:
+        with self.assertRaises(SnapshotError):
+            dumps({'x': [1, 2]})
+        with self.assertRaises(SnapshotError):
+            Snapshot(b'{{x := 1;}}')
+        with self.assertRaises(SnapshotError):
+            Snapshot(dumps(SCOPE)[:40])
+
+    def test_interpreter(self) -> None:
+        program = dp.parse("{{print title; for p in photos do print p . ','; endfor; print count * 2;}}")
+        expected = 'Mes vacances détéa.png,été.png,,c.png,6'
+        write(SCOPE, self.path('data.snap'))
+        with Snapshot.open(self.path('data.snap')) as scope:
+            interpreter = Interpreter(scope)
+            program.accept(interpreter)
+            self.assertEqual(interpreter.result, expected)
+            self.assertEqual(compile_program(program).render(scope), expected)
+
+    def test_convert(self) -> None:
+        data = "{{title := 'it\\'s ' . 1 . true; n := 42; b := false; l := ('a', 'b c');}}"
+        with open(self.path('data.dumbo'), 'w') as f:
+            f.write(data)
+        snapshot(self.path('data.dumbo'), self.path('data.snap'))
+        restore(self.path('data.snap'), self.path('restored.dumbo'))
+        expected = data_loader.parse(data)
+        self.assertEqual(dict(load_data(self.path('data.snap'))), expected)
+        self.assertEqual(load_data(self.path('restored.dumbo')), expected)
+        self.assertEqual(load_data(self.path('data.dumbo')), expected)
+        with self.assertRaises(SnapshotError):
+            to_source({'x': "it's"})
+
+    def test_main(self) -> None:
+        write(SCOPE, self.path('data.snap'))
+        with open(self.path('template.dumbo'), 'w') as f:
+            f.write("{{print title . ' ' . count;}}")
+        for options in [{}, {'cache_dir': self.path('cache')}]:
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                main(self.path('data.snap'), self.path('template.dumbo'), **options)
+            self.assertEqual(output.getvalue(), 'Mes vacances dété 3\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
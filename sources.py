@@ -0,0 +1,81 @@
+from __future__ import annotations
+from typing import Callable, Iterable, Iterator, Union
+from abc import ABC, abstractmethod
+
+
+class ListSource(ABC):
+    """List read lazily by the for loops, for data too big to be held in memory.
+    Loops accept a source wherever they accept a list, every loop iterates it again from the start."""
+    __slots__ = ()
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[str]:
+        pass
+
+
+class RangeSource(ListSource):
+    """Integers of a range, produced by the loops instead of being held in a list. Unlike other sources its length
+    and slices are known without iterating it, and it renders like the list of its integers."""
+    __slots__ = ('range',)
+
+    def __init__(self, range_: range):
+        self.range = range_
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.range)
+
+    def __len__(self) -> int:
+        return len(self.range)
+
+    def __eq__(self, other) -> bool:
+        if type(other) is RangeSource:
+            return list(self.range) == list(other.range)
+        return type(other) is list and list(self.range) == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'RangeSource({self.range.start}, {self.range.stop})'
+
+
+class LineSource(ListSource):
+    """Lines of a text file without their line ending, the file is read incrementally and reopened by each loop"""
+    __slots__ = ('path', 'encoding')
+
+    def __init__(self, path: str, encoding: str = 'utf-8'):
+        self.path = path
+        self.encoding = encoding
+
+    def __iter__(self) -> Iterator[str]:
+        with open(self.path, encoding=self.encoding, newline='') as f:
+            for line in f:
+                yield line.rstrip('\r\n')
+
+    def __repr__(self):
+        return f'LineSource({self.path!r})'
+
+
+class IteratorSource(ListSource):
+    """Values produced by Python code. Given a function returning an iterable, each loop calls it again; given an
+    iterable, each loop iterates it again, which a one-shot iterator or generator only allows once."""
+    __slots__ = ('values',)
+
+    def __init__(self, values: Union[Iterable[str], Callable[[], Iterable[str]]]):
+        self.values = values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.values() if callable(self.values) else self.values)
+
+    def __repr__(self):
+        return f'IteratorSource({self.values!r})'
+
+
+def parse_bindings(bindings: Iterable[str]) -> dict[str, LineSource]:
+    """Line sources of 'name=path' strings, as given on the command line"""
+    sources = {}
+    for binding in bindings:
+        name, separator, path = binding.partition('=')
+        if not separator or not name.isidentifier() or not path:
+            raise ValueError(f"Expected name=path, got '{binding}'")
+        sources[name] = LineSource(path)
+    return sources
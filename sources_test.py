@@ -0,0 +1,85 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import dumboParser as dp
+from dumbo import Interpreter, main
+from compiler import compile_program
+from bytecode import assemble
+from rendercache import RenderCache
+from typecheck import typecheck
+from sources import ListSource, LineSource, IteratorSource, parse_bindings
+
+SRC = ("{{n := 0; for line in lines do n := n + 1; print n . ':' . line . ' '; endfor; print join(lines, ',');"
+       " print ' ' . len(lines) . join(slice(lines, 1), '|') . join(slice(lines, 0 - 1, 3), '|');}}")
+
+
+class SourcesTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'lines.txt')
+        with open(self.path, 'w', newline='') as f:
+            f.write('a\nb b\r\nc')
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_lineSource(self) -> None:
+        source = LineSource(self.path)
+        self.assertEqual(list(source), ['a', 'b b', 'c'])
+        self.assertEqual(list(source), ['a', 'b b', 'c'])
+
+    def test_abstract(self) -> None:
+        with self.assertRaises(TypeError):
+            ListSource()
+
+    def test_iteratorSource(self) -> None:
+        self.assertEqual(list(IteratorSource(lambda: (str(i) for i in range(3)))), ['0', '1', '2'])
+        source = IteratorSource(str(i) for i in range(3))
+        self.assertEqual(list(source), ['0', '1', '2'])
+        self.assertEqual(list(source), [])
+
+    def test_engines(self) -> None:
+        expected = '1:a 2:b b 3:c a,b b,c 3b b|cc'
+        program = dp.parse(SRC)
+        for scope in [{'lines': LineSource(self.path)}, {'lines': IteratorSource(lambda: ['a', 'b b', 'c'])}]:
+            interpreter = Interpreter(scope)
+            program.accept(interpreter)
+            self.assertEqual(interpreter.result, expected)
+            interpreter = Interpreter(scope)
+            self.assertEqual(''.join(interpreter.iter_render(program)), expected)
+            interpreter = Interpreter(scope)
+            typecheck(program, scope).accept(interpreter)
+            self.assertEqual(interpreter.result, expected)
+            self.assertEqual(compile_program(program).render(scope), expected)
+            self.assertEqual(assemble(program).render(scope), expected)
+            cache = RenderCache(program)
+            self.assertEqual(cache.render(scope), expected)
+            self.assertEqual(cache.render(scope), expected)
+            self.assertEqual(cache.cache_info().hits, 0)
+
+    def test_main(self) -> None:
+        data = os.path.join(self.dir.name, 'data.dumbo')
+        template = os.path.join(self.dir.name, 'template.dumbo')
+        with open(data, 'w') as f:
+            f.write("{{title := 'lines';}}")
+        with open(template, 'w') as f:
+            f.write("{{print title;}} " + SRC)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main(data, template, lines=f'lines={self.path}')
+        self.assertEqual(output.getvalue(), 'lines 1:a 2:b b 3:c a,b b,c 3b b|cc\n')
+
+    def test_parseBindings(self) -> None:
+        sources = parse_bindings(['a=x.txt', 'b=y=z.txt'])
+        self.assertEqual((sources['a'].path, sources['b'].path), ('x.txt', 'y=z.txt'))
+        for binding in ['a', 'a=', '1a=x.txt']:
+            with self.assertRaises(ValueError):
+                parse_bindings([binding])
+
+
+if __name__ == '__main__':
+    unittest.main()
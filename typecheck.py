@@ -0,0 +1,211 @@
+from __future__ import annotations
+from typing import Mapping, Optional, Union
+import dumboParser as dp
+from functions import FUNCTIONS
+from sources import ListSource, RangeSource
+from includes import registry, resolve, check_cycle
+from visitors import Visitor
+
+Type = Optional[type]  # int, str, bool or list, None when unknown
+
+MAX_PASSES = 8  # types only flow through copies, chains of copies longer than this stay unknown
+
+
+class DumboTypeError(TypeError):
+    def __init__(self, errors: list[str]):
+        self.errors = errors
+        super().__init__('\n'.join(errors))
+
+
+def describe(value) -> str:
+    if type(value) is dp.VariableElement:
+        return f"variable '{value.name}'"
+    if type(value) in dp.primitives:
+        return repr(value)
+    return 'expression'
+
+
+class TypeChecker(Visitor):
+    """Infers the type of every expression and rebuilds the tree with specialized elements where the types are
+    known, recording the operations that would fail or misbehave at runtime.
+
+    Variable types are flow-insensitive: a variable has a known type when the data and every assignment of the
+    template agree on it, the same goes for the type of the items of list variables.
+    Expression visits return (element, type), statement visits the new element.
+    Included templates are checked for their assignments, path is the file includes are resolved from."""
+
+    def __init__(self, variables: dict[str, Type], items: Optional[dict[str, Type]] = None,
+                 path: Optional[str] = None):
+        self.variables = variables
+        self.items = items or {}
+        self.assigned = {}
+        self.assigned_items = {}
+        self.errors = []
+        self.including = [resolve(path)] if path else []
+
+    def expression(self, value) -> tuple[object, Type]:
+        if type(value) in dp.primitives:
+            return value, type(value)
+        return value.accept(self)
+
+    def expect(self, value, value_type: Type, expected: Union[type, tuple[type, ...]], context: str) -> None:
+        expected = expected if type(expected) is tuple else (expected,)
+        if value_type is not None and value_type not in expected:
+            names = ' or '.join(t.__name__ for t in expected)
+            self.errors.append(f'{context} expects {names}, {describe(value)} is {value_type.__name__}')
+
+    def assign(self, name: str, value_type: Type) -> None:
+        self.assigned.setdefault(name, set()).add(value_type)
+
+    def item_type(self, value) -> Type:
+        """Type of the items of a list expression, literal lists hold strings and ranges integers"""
+        if type(value) is list:
+            return str
+        if type(value) is dp.VariableElement:
+            return self.items.get(value.name)
+        if type(value) is dp.CallElement:
+            if value.name == 'range':
+                return int
+            if value.name == 'slice':
+                return self.item_type(value.arguments[0])
+        return None
+
+    def visit_if_element(self, element: dp.IfElement) -> dp.IfElement:
+        condition, _ = self.expression(element.boolean_expression)
+        return dp.IfElement(condition, element.expressions_list.accept(self))
+
+    def visit_print_element(self, element: dp.PrintElement) -> dp.PrintElement:
+        expression, expression_type = self.expression(element.str_expression)
+        if expression_type is str and type(expression) is not str:
+            return dp.StrPrintElement(expression)
+        return dp.PrintElement(expression)
+
+    def visit_for_element(self, element: dp.ForElement) -> dp.ForElement:
+        iterator, iterator_type = self.expression(element.iterator)
+        self.expect(element.iterator, iterator_type, list, 'for')
+        self.assign(element.iterator_var.name, self.item_type(element.iterator))
+        cls = dp.ListForElement if iterator_type is list else dp.ForElement
+        return cls(element.iterator_var, iterator, element.expressions_list.accept(self))
+
+    def visit_se_element(self, element: dp.SEElement) -> tuple[dp.SEElement, Type]:
+        parts, types = [], []
+        for e in element.subExpressions:
+            e, e_type = self.expression(e)
+            parts.append(e)
+            types.append(e_type)
+        cls = dp.StrSEElement if all(t is str for t in types) else dp.SEElement
+        return cls(parts), str
+
+    def visit_ae_element(self, element: dp.AEElement) -> tuple[dp.AEElement, Type]:
+        left, left_type = self.expression(element.left)
+        right, right_type = self.expression(element.right)
+        self.expect(element.left, left_type, int, f"'{element.op}'")
+        self.expect(element.right, right_type, int, f"'{element.op}'")
+        cls = dp.IntAEElement if left_type is int and right_type is int else dp.AEElement
+        return cls(left, element.op, right), int
+
+    def visit_be_element(self, element: dp.BEElement) -> tuple[dp.BEElement, Type]:
+        left, left_type = self.expression(element.left)
+        right, right_type = self.expression(element.right)
+        cls = dp.BEElement
+        if element.op in ('and', 'or'):
+            self.expect(element.left, left_type, bool, f"'{element.op}'")
+            self.expect(element.right, right_type, bool, f"'{element.op}'")
+            if left_type is bool and right_type is bool:
+                cls = dp.BoolBEElement
+        else:
+            if element.op in ('<', '>'):
+                self.expect(element.left, left_type, int, f"'{element.op}'")
+                self.expect(element.right, right_type, int, f"'{element.op}'")
+            if left_type is int and right_type is int:
+                cls = dp.IntBEElement
+        return cls(left, element.op, right), bool
+
+    def visit_expressions_list_element(self, element: dp.ExpressionsListElement) -> dp.ExpressionsListElement:
+        return dp.ExpressionsListElement([exp.accept(self) for exp in element.expressions_list])
+
+    def visit_assign_element(self, element: dp.AssignElement) -> dp.AssignElement:
+        value, value_type = self.expression(element.value)
+        self.assign(element.variable.name, value_type)
+        if value_type is list:
+            self.assigned_items.setdefault(element.variable.name, set()).add(self.item_type(value))
+        return dp.AssignElement(element.variable, value)
+
+    def visit_program_element(self, element: dp.ProgramElement) -> dp.ProgramElement:
+        return dp.ProgramElement([el if type(el) is str else el.accept(self) for el in element.content])
+
+    def visit_variable_element(self, element: dp.VariableElement) -> tuple[dp.VariableElement, Type]:
+        return element, self.variables.get(element.name)
+
+    def visit_call_element(self, element: dp.CallElement) -> tuple[dp.CallElement, Type]:
+        _, parameters, _, result = FUNCTIONS[element.name]
+        arguments, types = [], []
+        for argument, expected in zip(element.arguments, parameters):
+            argument_element, argument_type = self.expression(argument)
+            self.expect(argument, argument_type, expected, f"'{element.name}'")
+            arguments.append(argument_element)
+            types.append(argument_type)
+        if result is None and types[0] in (list, str):
+            # slice returns the type of what it slices
+            result = types[0]
+        return dp.CallElement(element.name, arguments), result
+
+    def visit_include_element(self, element: dp.IncludeElement) -> dp.IncludeElement:
+        path = resolve(element.path, self.including[-1] if self.including else None)
+        check_cycle(path, self.including)
+        self.including.append(path)
+        for el in registry.get(path).content:
+            if type(el) is not str:
+                el.accept(self)
+        self.including.pop()
+        return element
+
+
+def merge(known: dict[str, set], assigned: dict[str, set]) -> dict[str, Type]:
+    types = {name: set(value_types) for name, value_types in known.items()}
+    for name, value_types in assigned.items():
+        types.setdefault(name, set()).update(value_types)
+    return {name: value_types.pop() if len(value_types) == 1 else None for name, value_types in types.items()}
+
+
+def data_item_type(value) -> Type:
+    """Type of the items of a list or source of the data, None unless they are known to share it"""
+    if type(value) is RangeSource:
+        return int
+    if type(value) is list and all(type(item) is str for item in value):
+        return str
+    return None
+
+
+def infer_types(program: dp.ProgramElement, scope: Mapping,
+                path: Optional[str] = None) -> tuple[dict[str, Type], dict[str, Type]]:
+    """Type of every variable of the data and the template and type of the items of the list variables,
+    None for those with several or unknown types"""
+    # sources are lists to the template
+    data_types = {name: {list if isinstance(value, ListSource) else type(value)} for name, value in scope.items()}
+    data_items = {name: {data_item_type(value)} for name, value in scope.items() if list in data_types[name]}
+    variables, items = {}, {}
+    for _ in range(MAX_PASSES):
+        checker = TypeChecker(variables, items, path)
+        program.accept(checker)
+        inferred = merge(data_types, checker.assigned)
+        inferred_items = merge(data_items, checker.assigned_items)
+        if inferred == variables and inferred_items == items:
+            return variables, items
+        variables, items = inferred, inferred_items
+    return {}, {}
+
+
+def infer_variables(program: dp.ProgramElement, scope: Mapping) -> dict[str, Type]:
+    """Type of every variable of the data and the template, None for those with several or unknown types"""
+    return infer_types(program, scope)[0]
+
+
+def typecheck(program: dp.ProgramElement, scope: Mapping, path: Optional[str] = None) -> dp.ProgramElement:
+    """Returns program with type-specialized elements for data of the same types as scope,
+    raises DumboTypeError listing every type error found"""
+    checker = TypeChecker(*infer_types(program, scope, path), path=path)
+    typed = program.accept(checker)
+    if checker.errors:
+        raise DumboTypeError(checker.errors)
+    return typed
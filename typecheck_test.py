@@ -0,0 +1,97 @@
+import unittest
+
+import dumboParser as dp
+import dumbo_test
+from dumbo import Interpreter
+from compiler import compile_program
+from bytecode import assemble
+from sources import IteratorSource, RangeSource
+from typecheck import typecheck, infer_variables, DumboTypeError
+
+SRC = """{{n := 0; for p in photos do n := n + 1; print p . ' '; endfor;
+if n > 1 and true do print 'many ' . title; endif; print n; }}"""
+SCOPE = {'photos': ['a.png', 'b.png'], 'title': 'photos'}
+
+
+class TypedInterpreterTest(dumbo_test.InterpreterTest):
+
+    def execute(self, src) -> str:
+        typecheck(dp.parse(src, self.backend), {}).accept(self.interpreter)
+        return self.interpreter.result
+
+    def test_notIterError(self) -> None:
+        with self.assertRaises(DumboTypeError):
+            self.execute("{{list := 42; for i in list do print 'ok'; endfor;}}")
+
+
+class TypeCheckTest(unittest.TestCase):
+
+    def test_inferVariables(self) -> None:
+        variables = infer_variables(dp.parse(SRC + "{{m := n; t := title; t := 1;}}"), SCOPE)
+        self.assertEqual(variables, {'photos': list, 'title': str, 'n': int, 'p': str, 'm': int, 't': None})
+
+    def test_specialize(self) -> None:
+        typed = typecheck(dp.parse(SRC), SCOPE)
+        loop, condition, print_n = typed.content[0].expressions_list[1:]
+        self.assertIs(type(loop), dp.ListForElement)
+        n_plus_1, print_p = loop.expressions_list.expressions_list
+        self.assertIs(type(n_plus_1.value), dp.IntAEElement)
+        self.assertIs(type(print_p), dp.StrPrintElement)
+        self.assertIs(type(print_p.str_expression), dp.StrSEElement)
+        self.assertIs(type(condition.boolean_expression), dp.BoolBEElement)
+        self.assertIs(type(condition.boolean_expression.left), dp.IntBEElement)
+        self.assertIs(type(print_n), dp.PrintElement)
+
+    def test_engines(self) -> None:
+        program = dp.parse(SRC)
+        typed = typecheck(program, SCOPE)
+        interpreter = Interpreter(SCOPE)
+        program.accept(interpreter)
+        expected = interpreter.result
+        self.assertEqual(expected, 'a.png b.png many photos2')
+        interpreter = Interpreter(SCOPE)
+        typed.accept(interpreter)
+        self.assertEqual(interpreter.result, expected)
+        self.assertEqual(compile_program(typed).render(SCOPE), expected)
+        self.assertEqual(assemble(typed).render(SCOPE), expected)
+
+    def test_errors(self) -> None:
+        with self.assertRaises(DumboTypeError) as cm:
+            typecheck(dp.parse("{{print title + 1; for t in title do print t; endfor; print n < title;}}"), SCOPE)
+        self.assertEqual(cm.exception.errors, ["'+' expects int, variable 'title' is str",
+                                               "for expects list, variable 'title' is str",
+                                               "'<' expects int, variable 'title' is str"])
+        typecheck(dp.parse("{{print title = 1;}}"), SCOPE)
+
+    def test_calls(self) -> None:
+        src = "{{r := range(len(photos)); for i in slice(r, 1) do print i + 1; endfor; print join(photos, title);}}"
+        variables = infer_variables(dp.parse(src), SCOPE)
+        self.assertEqual((variables['r'], variables['i']), (list, int))
+        loop = typecheck(dp.parse(src), SCOPE).content[0].expressions_list[1]
+        self.assertIs(type(loop), dp.ListForElement)
+        self.assertIs(type(loop.expressions_list.expressions_list[0].str_expression), dp.IntAEElement)
+        with self.assertRaises(DumboTypeError) as cm:
+            typecheck(dp.parse("{{print len(1); print join(1); print range(title);}}"), SCOPE)
+        self.assertEqual(cm.exception.errors, ["'len' expects list or str, 1 is int",
+                                               "'join' expects list or str, 1 is int",
+                                               "'range' expects int, variable 'title' is str"])
+
+    def test_joinStr(self) -> None:
+        program = typecheck(dp.parse("{{print join('abc', ',');}}"), {})
+        interpreter = Interpreter({})
+        program.accept(interpreter)
+        self.assertEqual(interpreter.result, 'a,b,c')
+
+    def test_dataItems(self) -> None:
+        src = "{{for a in words do x := a; endfor; for b in numbers do y := b; endfor; " \
+              "for c in lines do z := c; endfor; for d in r do w := d; endfor;}}"
+        scope = {'words': ['a', 'b'], 'numbers': [1, 2], 'lines': IteratorSource(['a']), 'r': RangeSource(range(3))}
+        variables = infer_variables(dp.parse(src), scope)
+        self.assertEqual([variables[name] for name in 'xyzw'], [str, None, None, int])
+        interpreter = Interpreter(scope)
+        typecheck(dp.parse("{{for b in numbers do print b + 1; endfor;}}"), scope).accept(interpreter)
+        self.assertEqual(interpreter.result, '23')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -49,3 +49,31 @@ class Visitor(ABC):
     @abstractmethod
     def visit_variable_element(self, element: dp.VariableElement) -> Union[int, str, bool, list[str]]:
         pass
+
+    @abstractmethod
+    def visit_call_element(self, element: dp.CallElement) -> Union[int, str, list]:
+        pass
+
+    @abstractmethod
+    def visit_include_element(self, element: dp.IncludeElement) -> None:
+        pass
+
+    # specialized elements produced by the type checker, handled as their generic element unless overridden
+
+    def visit_int_ae_element(self, element: dp.IntAEElement) -> int:
+        return self.visit_ae_element(element)
+
+    def visit_int_be_element(self, element: dp.IntBEElement) -> bool:
+        return self.visit_be_element(element)
+
+    def visit_bool_be_element(self, element: dp.BoolBEElement) -> bool:
+        return self.visit_be_element(element)
+
+    def visit_str_se_element(self, element: dp.StrSEElement) -> str:
+        return self.visit_se_element(element)
+
+    def visit_str_print_element(self, element: dp.StrPrintElement) -> None:
+        return self.visit_print_element(element)
+
+    def visit_list_for_element(self, element: dp.ListForElement) -> None:
+        return self.visit_for_element(element)
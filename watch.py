@@ -0,0 +1,150 @@
+from __future__ import annotations
+from typing import Callable, Optional
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import dumboParser as dp
+from compiler import compile_program
+from data import data_loader
+from batch import data_jobs
+
+DEFAULT_MANIFEST = '.dumbo-manifest.json'
+
+
+class Resident:
+    """A source file kept parsed in memory. It is read again only when its mtime or size change,
+    and parsed again, when needed, only when its content hash changed."""
+
+    def __init__(self, path: str, parse: Callable[[bytes], object]):
+        self.path = path
+        self.parse = parse
+        self.stat = None
+        self.digest = None
+        self._content = None
+        self._value = None
+        self._error = None
+
+    def refresh(self) -> str:
+        """Returns the content hash, reading the file again if it changed"""
+        st = os.stat(self.path)
+        stat = (st.st_mtime_ns, st.st_size)
+        if stat != self.stat:
+            self.stat = stat
+            with open(self.path, 'rb') as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            if digest != self.digest:
+                self.digest, self._content = digest, content
+        return self.digest
+
+    def reload(self) -> None:
+        """Reads and parses the file again, even if it didn't change"""
+        self.stat = self.digest = None
+        self.refresh()
+
+    @property
+    def value(self):
+        """Parsed content, raises the parsing error until a change fixes the file"""
+        if self._content is not None:
+            try:
+                self._value, self._error = self.parse(self._content), None
+            except Exception as e:
+                self._value, self._error = None, e
+            self._content = None
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+class Builder:
+    """Incremental renderer of (template, data file, output file) targets.
+    Parsed templates and data stay resident between builds, and a manifest of the input hashes of every output
+    lets a new Builder skip the outputs that are already up to date."""
+
+    def __init__(self, manifest_path: Optional[str] = DEFAULT_MANIFEST, parser: str = 'lark'):
+        self.manifest_path = manifest_path
+        self.parser = parser
+        self.templates = {}
+        self.data = {}
+        self.manifest = {}
+        if manifest_path is not None and os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+
+    def _parse_template(self, content: bytes, path: Optional[str] = None):
+        return compile_program(dp.parse(content.decode(), self.parser), path)
+
+    def _resident(self, files: dict, path: str, parse: Callable[[bytes], object]) -> Resident:
+        if path not in files:
+            files[path] = Resident(path, parse)
+        return files[path]
+
+    def build(self, targets: list[tuple[str, str, str]]) -> tuple[list[str], dict[str, str]]:
+        """Renders the targets whose inputs changed since they were last built,
+        returns the outputs written and the errors by output"""
+        built, errors = [], {}
+        changed = False
+        for template_path, data_path, output in targets:
+            try:
+                template = self._resident(self.templates, template_path,
+                                          lambda content: self._parse_template(content, template_path))
+                data = self._resident(self.data, data_path, data_loader.parse)
+                inputs = {'template': template.refresh(), 'data': data.refresh()}
+                program = template.value
+                if program.stale():
+                    # an included template changed, it is inlined in the compiled program
+                    template.reload()
+                    program = template.value
+                inputs['includes'] = {path: f'{mtime}:{size}' for path, (mtime, size) in program.dependencies.items()}
+                if self.manifest.get(output) == inputs and os.path.exists(output):
+                    continue
+                result = program.render(data.value)
+                os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+                with open(output, 'w') as output_file:
+                    output_file.write(result)
+            except Exception as e:
+                errors[output] = f'{type(e).__name__}: {e}'
+                changed |= self.manifest.pop(output, None) is not None
+                continue
+            self.manifest[output] = inputs
+            built.append(output)
+        if built or changed:
+            self.save_manifest()
+        return built, errors
+
+    def save_manifest(self) -> None:
+        if self.manifest_path is None:
+            return
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.manifest_path) or '.', suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+
+def watch(src_file_name, *data, output='{name}.html', interval=0.5, manifest=DEFAULT_MANIFEST, parser='lark',
+          once=False):
+    """Renders the template against every data file, given as files, directories or glob patterns,
+    then polls them every interval seconds and rebuilds the outputs whose template or data changed"""
+    builder = Builder(manifest or None, parser)
+    reported = {}
+    while True:
+        start = time.perf_counter()
+        # the manifest is not a data file either
+        jobs = data_jobs(src_file_name, list(data), output, manifest)
+        targets = [(src_file_name, data_file_name, output_file_name) for data_file_name, output_file_name in jobs]
+        built, errors = builder.build(targets)
+        for output_file_name, error in errors.items():
+            if reported.get(output_file_name) != error:
+                print(f'{output_file_name}: {error}', file=sys.stderr)
+        if built or errors != reported or once:
+            print(f'{len(built)} rendered, {len(errors)} failed, {len(targets) - len(built) - len(errors)} '
+                  f'up to date in {(time.perf_counter() - start) * 1000:.1f} ms')
+        reported = errors
+        if once:
+            if errors:
+                sys.exit(1)
+            return
+        time.sleep(interval)
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from watch import Builder
+
+
+class BuilderTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.template = self.write('page.dumbo', "<h1>{{print title;}}</h1>")
+        self.data = [self.write(f'd{i}.dumbo', f"{{{{title := 'page {i}';}}}}") for i in range(3)]
+        self.manifest = os.path.join(self.tmp.name, 'manifest.json')
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def write(self, name, content) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def targets(self):
+        return [(self.template, d, d.replace('.dumbo', '.html')) for d in self.data]
+
+    def read(self, path) -> str:
+        with open(path) as f:
+            return f.read()
+
+    def test_incremental(self) -> None:
+        builder = Builder(self.manifest)
+        built, errors = builder.build(self.targets())
+        self.assertEqual((len(built), errors), (3, {}))
+        self.assertEqual(builder.build(self.targets()), ([], {}))
+
+        self.write('d1.dumbo', "{{title := 'changed page';}}")
+        self.assertEqual(builder.build(self.targets()), ([self.targets()[1][2]], {}))
+        self.assertEqual(self.read(self.targets()[1][2]), '<h1>changed page</h1>')
+
+        # quick rewrites may keep the same mtime, changing the size makes them visible
+        self.write('page.dumbo', "<h2>{{print title . '!';}}</h2>")
+        self.assertEqual(len(builder.build(self.targets())[0]), 3)
+        self.assertEqual(self.read(self.targets()[0][2]), '<h2>page 0!</h2>')
+
+    def test_restart(self) -> None:
+        Builder(self.manifest).build(self.targets())
+        self.assertEqual(Builder(self.manifest).build(self.targets()), ([], {}))
+        os.remove(self.targets()[2][2])
+        self.assertEqual(Builder(self.manifest).build(self.targets()), ([self.targets()[2][2]], {}))
+
+    def test_includes(self) -> None:
+        self.write('page.dumbo', "<h1>{{print title;}}</h1>{{include 'footer.dumbo';}}")
+        self.write('footer.dumbo', "<p>footer</p>")
+        builder = Builder(self.manifest)
+        self.assertEqual(len(builder.build(self.targets())[0]), 3)
+        self.assertEqual(builder.build(self.targets()), ([], {}))
+        self.write('footer.dumbo', "<p>new footer</p>")
+        self.assertEqual(len(builder.build(self.targets())[0]), 3)
+        self.assertEqual(self.read(self.targets()[0][2]), '<h1>page 0</h1><p>new footer</p>')
+        self.assertEqual(Builder(self.manifest).build(self.targets()), ([], {}))
+
+    def test_errors(self) -> None:
+        builder = Builder(None)
+        self.write('d0.dumbo', "{{title := }}")
+        built, errors = builder.build(self.targets())
+        self.assertEqual((len(built), list(errors)), (2, [self.targets()[0][2]]))
+        self.assertEqual(builder.build(self.targets())[1], errors)
+        self.write('d0.dumbo', "{{title := 'fixed';}}")
+        self.assertEqual(builder.build(self.targets()), ([self.targets()[0][2]], {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
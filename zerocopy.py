@@ -0,0 +1,140 @@
+"""Rendering with the literal text of the template left in the memory mapped source file.
+
+The source is scanned for code blocks without being decoded: literal text is kept as byte offsets into the
+mapping and only code blocks are decoded and parsed. Rendering gathers memoryview slices of the mapping for
+the text and the encoded output of the blocks, and hands them to os.writev, so static markup is never copied
+into Python objects.
+"""
+from __future__ import annotations
+from typing import Mapping, Optional, Union
+import mmap
+import os
+import re
+import dumboParser as dp
+from descentParser import descent_parser, _BlockParser, DumboSyntaxError
+from dumbo import Interpreter, DEFAULT_BUFFER_SIZE
+
+# a code block up to its closing braces, string literals included: they may contain '}}'
+_BLOCK = re.compile(rb"(?:[^'}]|}(?!})|'(?:[^'\\\n]|\\.)*')*}}")
+
+IOV_MAX = os.sysconf('SC_IOV_MAX') if hasattr(os, 'sysconf') and 'SC_IOV_MAX' in os.sysconf_names else 1024
+
+Part = Union[tuple[int, int], dp.ExpressionsListElement]
+
+
+def writev_all(fd: int, buffers: list) -> None:
+    """Writes every buffer to fd, in calls of at most IOV_MAX buffers, resuming after partial writes"""
+    buffers = [memoryview(b) for b in buffers if len(b)]
+    while buffers:
+        written = os.writev(fd, buffers[:IOV_MAX])
+        while buffers and written >= buffers[0].nbytes:
+            written -= buffers[0].nbytes
+            buffers.pop(0)
+        if written:
+            buffers[0] = buffers[0][written:]
+
+
+class VectorWriter:
+    """Sink gathering buffers for writev: the text written by an Interpreter is encoded, other buffers are queued
+    as they are. Queued buffers are written once they hold buffer_size encoded bytes or IOV_MAX buffers."""
+
+    def __init__(self, fd: int, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.fd = fd
+        self.buffer_size = buffer_size
+        self.buffers = []
+        self.pending = 0
+
+    def append(self, buffer) -> None:
+        self.buffers.append(buffer)
+        if len(self.buffers) >= IOV_MAX:
+            self.flush()
+
+    def write(self, text: str) -> None:
+        output = text.encode()
+        self.pending += len(output)
+        self.append(output)
+        if self.pending >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        writev_all(self.fd, self.buffers)
+        self.buffers.clear()
+        self.pending = 0
+
+
+class MappedTemplate:
+    """Template parsed from a memory mapped UTF-8 file, literal text stays in the mapping as (start, stop) offsets.
+    Renders with the same output as Interpreter, path is the template file, from which includes are resolved."""
+
+    def __init__(self, buffer: Union[mmap.mmap, bytes], path: Optional[str] = None):
+        self.buffer = buffer
+        self.path = path
+        self.parts = self._parse(buffer)
+
+    @classmethod
+    def open(cls, file_name: str) -> MappedTemplate:
+        with open(file_name, 'rb') as f:
+            try:
+                return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), file_name)
+            except ValueError:  # an empty file can't be mapped
+                return cls(b'', file_name)
+
+    def close(self) -> None:
+        if type(self.buffer) is mmap.mmap:
+            self.buffer.close()
+
+    def __enter__(self) -> MappedTemplate:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def _parse(buffer) -> list[Part]:
+        parts = []
+        pos = 0
+        end = len(buffer)
+        while pos < end:
+            start = buffer.find(b'{{', pos)
+            if start == -1:
+                parts.append((pos, end))
+                break
+            if start > pos:
+                parts.append((pos, start))
+            m = _BLOCK.match(buffer, start + 2)
+            stop = m.end() if m else end
+            try:
+                block, _ = _BlockParser(buffer[start + 2:stop].decode(), 0).parse()
+            except DumboSyntaxError:
+                # reparse the whole source for an error located in the file
+                descent_parser.parse(bytes(buffer).decode())
+                raise
+            parts.append(block)
+            pos = stop
+        if not parts:
+            descent_parser.parse('')
+        return parts
+
+    def render_to(self, file, scope: Mapping, buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        """Writes the render to file, a file descriptor or an object with a fileno() method such as a file or a
+        socket. Python file objects are flushed first so that the output keeps its order."""
+        if hasattr(file, 'flush'):
+            file.flush()
+        writer = VectorWriter(file if type(file) is int else file.fileno(), buffer_size)
+        interpreter = Interpreter(scope, sink=writer, buffer_size=buffer_size, path=self.path)
+        view = memoryview(self.buffer)
+        try:
+            for part in self.parts:
+                if type(part) is tuple:
+                    writer.append(view[part[0]:part[1]])
+                else:
+                    part.accept(interpreter)
+                    interpreter.flush()
+            writer.flush()
+        finally:
+            writer.buffers.clear()
+            view.release()
+
+    def text_size(self) -> int:
+        """Bytes of literal text, held only by the mapping"""
+        return sum(part[1] - part[0] for part in self.parts if type(part) is tuple)
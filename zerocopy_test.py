@@ -0,0 +1,98 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+import dumboParser as dp
+from data import data_loader
+from dumbo import Interpreter
+from descentParser import DumboSyntaxError
+from zerocopy import MappedTemplate, writev_all
+
+SOURCES = ["text only", "{{print 1;}}", "a}}b{{print '}}';}}c",
+           "<p>été {{print 'ça' . 2;}}</p>\n{{x := 1;}}{{print x;}}",
+           "{{for i in range(3) do print i; endfor;}} {{ print 'it\\'s }}'; }}"]
+EXAMPLES = [('exemples/data_t1.dumbo', 'exemples/template1.dumbo'),
+            ('exemples/data_t2.dumbo', 'exemples/template2.dumbo'),
+            ('exemples/data_t3.dumbo', 'exemples/template3.dumbo')]
+
+
+def interpret(src, scope) -> bytes:
+    interpreter = Interpreter(scope)
+    dp.parse(src).accept(interpreter)
+    return interpreter.result.encode()
+
+
+class ZeroCopyTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def render(self, template: MappedTemplate, scope) -> bytes:
+        path = os.path.join(self.dir.name, 'output')
+        with open(path, 'wb') as f:
+            template.render_to(f, scope, buffer_size=16)
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_render(self) -> None:
+        for src in SOURCES:
+            with MappedTemplate(src.encode()) as template:
+                self.assertEqual(self.render(template, {}), interpret(src, {}))
+        for data_file, template_file in EXAMPLES:
+            scope = data_loader.load(data_file)
+            with open(template_file) as f:
+                expected = interpret(f.read(), scope)
+            with MappedTemplate.open(template_file) as template:
+                self.assertEqual(self.render(template, scope), expected)
+
+    def test_offsets(self) -> None:
+        template = MappedTemplate("<p>{{print 1;}}</p>".encode())
+        self.assertEqual(template.parts[0], (0, 3))
+        self.assertIs(type(template.parts[1]), dp.ExpressionsListElement)
+        self.assertEqual(template.parts[2], (15, 19))
+        self.assertEqual(template.text_size(), 7)
+
+    def test_syntaxError(self) -> None:
+        for src in ["", "text\n{{print ;}}", "{{print 'a}}", "{{print 1"]:
+            with self.assertRaises(DumboSyntaxError) as cm:
+                MappedTemplate(src.encode())
+            if src.startswith('text'):
+                self.assertEqual((cm.exception.line, cm.exception.column), (2, 9))
+
+    def test_socket(self) -> None:
+        scope = {'items': [f'item {i}' for i in range(20000)]}
+        src = "<ul>{{for i in items do print '<li>' . i . '</li>'; endfor;}}</ul>" * 3
+        left, right = socket.socketpair()
+        received = []
+
+        def read():
+            while chunk := right.recv(65536):
+                received.append(chunk)
+        reader = threading.Thread(target=read)
+        reader.start()
+        with left, right, MappedTemplate(src.encode()) as template:
+            template.render_to(left, scope)
+            left.shutdown(socket.SHUT_WR)
+            reader.join()
+        self.assertEqual(b''.join(received), interpret(src, scope))
+
+    def test_writevAll(self) -> None:
+        read_fd, write_fd = os.pipe()
+        buffers = [b'a' * 100000, memoryview(b'bc')[1:], b'', b'd' * 70000]
+        received = []
+        with os.fdopen(read_fd, 'rb') as r:
+            thread = threading.Thread(target=lambda: received.append(r.read()))
+            thread.start()
+            with os.fdopen(write_fd, 'wb') as w:
+                writev_all(w.fileno(), buffers)
+            thread.join()
+        self.assertEqual(received[0], b'a' * 100000 + b'c' + b'd' * 70000)
+
+
+if __name__ == '__main__':
+    unittest.main()